@@ -1,7 +1,9 @@
 import ky from "ky";
 
+const API_BASE = "http://localhost:5555";
+
 export const api = ky.create({
-  prefixUrl: "http://localhost:5555",
+  prefixUrl: API_BASE,
   hooks: {
     beforeRequest: [
       (request) => {
@@ -21,3 +23,10 @@ export const api = ky.create({
     ],
   },
 });
+
+// Provider images go through the server's cached /images proxy;
+// size is "grid" (plan rows) or "list" (search cards).
+export function imageUrl(src, size) {
+  if (!src || !/^https?:\/\//.test(src)) return src;
+  return `${API_BASE}/images?url=${encodeURIComponent(src)}&size=${size}`;
+}
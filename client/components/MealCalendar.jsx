@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { api } from "../api";
+import { api, imageUrl } from "../api";
 import { useToast } from "../toast/ToastContext";
 
 const DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"];
@@ -151,7 +151,7 @@ function MealCell({ day, type, items, recipes, onAdd, onDelete }) {
             <li key={i.id} style={{ display: "flex", alignItems: "center", gap: 8 }}>
               {img ? (
                 <img
-                  src={img} 
+                  src={imageUrl(img, "grid")}
                   alt=""
                   width={28}
                   height={28}
@@ -1,7 +1,7 @@
 // src/components/RecipeCatalog.jsx
 import React, { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { api } from "../api";
+import { api, imageUrl } from "../api";
 import { useToast } from "../toast/ToastContext";
 
 const DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"];
@@ -205,7 +205,7 @@ export default function RecipeCatalog() {
                   style={{ cursor: "pointer" }}
                 >
                   <img
-                    src={r.image}
+                    src={imageUrl(r.image, "list")}
                     alt={r.title}
                     style={{
                       width: "100%",
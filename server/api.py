@@ -1,11 +1,19 @@
-from flask import Blueprint, request, jsonify, current_app
+import json
+import time
+from flask import Blueprint, Response, abort, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from .extensions import db
-from .models import Recipe, MealPlan, MealItem, ShoppingItem, User
+from .extensions import db, events, prefetcher, quota
+from .models import Recipe, MealPlan, MealItem, IngredientSnapshot, SnapshotIngredient, ShoppingItem, User
 from .pagination import paginate
-import re, json
+from .serialization import parse_fields, project
+from .search import EXTERNAL_SOURCES, federated_search, search_catalog, search_local_recipes
+from .etags import bump_plans, bump_plans_using_recipe, make_etag, not_modified, with_etag
+from .snapshots import apply_recipe, get_or_create_snapshot
+from .ingredients import clean_name, recipe_lines, summarize_groups
 from datetime import date
 from flask_cors import cross_origin
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.orm import joinedload, selectinload, undefer_group
 
 
 api_bp = Blueprint("api", __name__)
@@ -16,8 +24,16 @@ api_bp = Blueprint("api", __name__)
 @jwt_required()
 def list_recipes():
     uid = int(get_jwt_identity())
+    version = db.session.execute(
+        select(func.count(), func.max(Recipe.id), func.sum(Recipe.revision)).where(Recipe.user_id == uid)
+    ).one()
+    etag = make_etag("recipes", uid, *version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     query = Recipe.query.filter_by(user_id=uid).order_by(Recipe.id.desc())
-    return paginate(query, request)
+    # summaries only: ingredients/steps stay deferred (see GET /recipes/<id>)
+    return with_etag(paginate(query, request, serializer=Recipe.to_summary, keys=[(Recipe.id, "desc")]), etag)
 
 @api_bp.post("/recipes")
 @jwt_required()
@@ -33,21 +49,42 @@ def create_recipe():
 @jwt_required()
 def get_recipe(recipe_id):
     uid = int(get_jwt_identity())
-    recipe = Recipe.query.filter_by(id=recipe_id, user_id=uid).first_or_404()
-    return recipe.to_dict(), 200
+    revision = db.session.execute(
+        select(Recipe.revision).where(Recipe.id == recipe_id, Recipe.user_id == uid)
+    ).scalar_one_or_none()
+    if revision is None:
+        abort(404)
+    etag = make_etag("recipe", recipe_id, revision)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    recipe = Recipe.query.options(undefer_group("body")).filter_by(id=recipe_id, user_id=uid).first_or_404()
+    return with_etag((project(recipe.to_dict(), parse_fields(request)), 200), etag)
 
 @api_bp.patch("/recipes/<int:recipe_id>")
 @jwt_required()
 def update_recipe(recipe_id):
     uid = int(get_jwt_identity())
-    recipe = Recipe.query.filter_by(id=recipe_id, user_id=uid).first_or_404()
+    recipe = Recipe.query.options(undefer_group("body")).filter_by(id=recipe_id, user_id=uid).first_or_404()
     data = request.get_json() or {}
     if "title" in data:
         recipe.title = data["title"]
     if "ingredients" in data:
         recipe.ingredients = data["ingredients"]
+        # keep planned meals pointing at the snapshot of the current text
+        snapshot = get_or_create_snapshot(recipe_lines(recipe.ingredients))
+        db.session.execute(
+            update(MealItem)
+            .where(MealItem.recipe_id == recipe.id, MealItem.external_id.is_(None))
+            .values(snapshot_id=snapshot.id),
+            execution_options={"synchronize_session": False},
+        )
     if "steps" in data:
         recipe.steps = data["steps"]
+    if data.keys() & {"title", "ingredients", "steps"}:
+        recipe.revision = Recipe.revision + 1
+        # plans embed the recipe in their items
+        bump_plans_using_recipe(recipe.id)
     db.session.commit()
     return recipe.to_dict(), 200
 
@@ -57,8 +94,12 @@ def update_recipe(recipe_id):
 @jwt_required()
 def list_meal_plans():
     uid = int(get_jwt_identity())
-    query = MealPlan.query.filter_by(user_id=uid).order_by(MealPlan.week_start.desc())
-    return paginate(query, request, serializer=lambda meal_plan: meal_plan.to_dict())
+    query = MealPlan.query.filter_by(user_id=uid).order_by(MealPlan.week_start.desc(), MealPlan.id.desc())
+    return paginate(
+        query, request,
+        serializer=lambda meal_plan: meal_plan.to_dict(),
+        keys=[(MealPlan.week_start, "desc"), (MealPlan.id, "desc")],
+    )
 
 
 @api_bp.post("/meal_plans")
@@ -83,8 +124,30 @@ def create_meal_plan():
 @jwt_required()
 def get_meal_plan(meal_plan_id):
     uid = int(get_jwt_identity())
-    meal_plan = MealPlan.query.filter_by(id=meal_plan_id, user_id=uid).first_or_404()
-    return meal_plan.to_dict(include_items=True, include_shopping=True)
+    # check the revision first so a 304 skips loading items and shopping rows
+    revision = db.session.execute(
+        select(MealPlan.revision).where(MealPlan.id == meal_plan_id, MealPlan.user_id == uid)
+    ).scalar_one_or_none()
+    if revision is None:
+        abort(404)
+    etag = make_etag("meal_plan", meal_plan_id, revision)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    fields = parse_fields(request)
+    item_fields = fields.get("items") if fields else None
+    # items carry recipe summaries; snapshot JSON is only loaded when asked
+    # for with ?fields=items.ingredient_snapshot (or via GET /meal_items/<id>)
+    options = []
+    if fields is None or "items" in fields:
+        options.append(selectinload(MealPlan.items).joinedload(MealItem.recipe))
+        if item_fields is not None and "ingredient_snapshot" in item_fields:
+            options.append(selectinload(MealPlan.items).joinedload(MealItem.snapshot).undefer(IngredientSnapshot.ingredients))
+    if fields is None or "shopping_items" in fields:
+        options.append(selectinload(MealPlan.shopping_items))
+    meal_plan = MealPlan.query.options(*options).filter_by(id=meal_plan_id, user_id=uid).first_or_404()
+    data = meal_plan.to_dict(include_items=True, include_shopping=True, fields=fields)
+    return with_etag(project(data, fields), etag)
 
 
 @api_bp.delete("/meal_plans/<int:meal_plan_id>")
@@ -97,6 +160,15 @@ def delete_meal_plan(meal_plan_id):
     return {"ok": True}
 
 
+@api_bp.post("/meal_plans/<int:meal_plan_id>/snapshots/resume")
+@jwt_required()
+def resume_meal_plan_snapshots(meal_plan_id):
+    """Restart snapshot jobs lost with a restarted worker and retry failed ones."""
+    uid = int(get_jwt_identity())
+    MealPlan.query.filter_by(id=meal_plan_id, user_id=uid).first_or_404()
+    return {"resumed": len(_resume_stuck_snapshots(meal_plan_id))}
+
+
 # -------- Meal Items --------
 @api_bp.post("/meal_items")
 @jwt_required()
@@ -105,9 +177,27 @@ def create_meal_item():
     data = request.get_json() or {}
     meal_plan = MealPlan.query.filter_by(id=data.get("meal_plan_id"), user_id=uid).first_or_404()
     meal_item = MealItem(meal_plan_id=meal_plan.id, recipe_id=data.get("recipe_id"), day=data.get("day"), meal_type=data.get("meal_type"))
+    apply_recipe(meal_item, db.session.get(Recipe, meal_item.recipe_id) if meal_item.recipe_id else None)
     db.session.add(meal_item)
+    bump_plans(meal_plan.id)
     db.session.commit()
-    return meal_item.to_dict(), 201
+    return meal_item.to_dict(detail=True), 201
+
+
+@api_bp.get("/meal_items/<int:meal_item_id>")
+@jwt_required()
+def get_meal_item(meal_item_id):
+    """Full meal item: recipe body and ingredient snapshot included."""
+    uid = int(get_jwt_identity())
+    meal_item = (
+        MealItem.query.options(
+            joinedload(MealItem.recipe).undefer_group("body"),
+            joinedload(MealItem.snapshot).undefer(IngredientSnapshot.ingredients),
+        )
+        .join(MealPlan).filter(MealItem.id==meal_item_id, MealPlan.user_id==uid)
+        .first_or_404()
+    )
+    return meal_item.to_dict(detail=True)
 
 
 @api_bp.patch("/meal_items/<int:meal_item_id>")
@@ -118,12 +208,15 @@ def update_meal_item(meal_item_id):
     data = request.get_json() or {}
     if "recipe_id" in data:
         meal_item.recipe_id = data["recipe_id"]
+        if not meal_item.external_id:
+            apply_recipe(meal_item, db.session.get(Recipe, meal_item.recipe_id) if meal_item.recipe_id else None)
     if "day" in data:
         meal_item.day = data["day"]
     if "meal_type" in data:
         meal_item.meal_type = data["meal_type"]
+    bump_plans(meal_item.meal_plan_id)
     db.session.commit()
-    return meal_item.to_dict()
+    return meal_item.to_dict(detail=True)
 
 
 @api_bp.delete("/meal_items/<int:meal_item_id>")
@@ -132,20 +225,39 @@ def delete_meal_item(meal_item_id):
     uid = int(get_jwt_identity())
     meal_item = MealItem.query.join(MealPlan).filter(MealItem.id==meal_item_id, MealPlan.user_id==uid).first_or_404()
     db.session.delete(meal_item)
+    bump_plans(meal_item.meal_plan_id)
     db.session.commit()
     return {"ok": True}
 
 
 # -------- Shopping Items --------
+def _shopping_channel(plan_id):
+    return f"shopping:{plan_id}"
+
+def _publish_shopping(plan_id, message):
+    """Send ``message`` to the plan's live stream once this transaction commits."""
+    events.publish_after_commit(_shopping_channel(plan_id), dict(message, meal_plan_id=plan_id))
+
+
 @api_bp.get("/shopping_items")
 @jwt_required()
 def list_shopping_items():
     uid = int(get_jwt_identity())
     meal_plan_id = request.args.get("meal_plan_id", type=int)
+    # shopping rows only change through plan-level writes, so the owning
+    # plans' revisions version the list
+    version = select(func.count(), func.max(MealPlan.id), func.sum(MealPlan.revision)).where(MealPlan.user_id == uid)
+    if meal_plan_id:
+        version = version.where(MealPlan.id == meal_plan_id)
+    etag = make_etag("shopping_items", uid, *db.session.execute(version).one())
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
     query = ShoppingItem.query.join(MealPlan).filter(MealPlan.user_id==uid)
     if meal_plan_id:
         query = query.filter(ShoppingItem.meal_plan_id==meal_plan_id)
-    return paginate(query, request)
+    query = query.order_by(ShoppingItem.id)
+    return with_etag(paginate(query, request, keys=[(ShoppingItem.id, "asc")]), etag)
 
 
 @api_bp.post("/shopping_items")
@@ -156,36 +268,200 @@ def create_shopping_item():
     meal_plan = MealPlan.query.filter_by(id=data.get("meal_plan_id"), user_id=uid).first_or_404()
     shopping_item = ShoppingItem(meal_plan_id=meal_plan.id, name=data.get("name"), quantity=data.get("quantity"))
     db.session.add(shopping_item)
+    bump_plans(meal_plan.id)
+    db.session.flush()
+    _publish_shopping(meal_plan.id, {"type": "created", "item": shopping_item.to_dict()})
     db.session.commit()
     return shopping_item.to_dict(), 201
 
 
+SHOPPING_TEXT_MAX = ShoppingItem.__table__.c.name.type.length  # name and quantity are both String(255)
+
 @api_bp.patch("/shopping_items/<int:shopping_item_id>")
 @jwt_required()
 def update_shopping_item(shopping_item_id):
     uid = int(get_jwt_identity())
     shopping_item = ShoppingItem.query.join(MealPlan).filter(ShoppingItem.id==shopping_item_id, MealPlan.user_id==uid).first_or_404()
     data = request.get_json() or {}
+    for field in ("name", "quantity"):
+        if isinstance(data.get(field), str) and len(data[field]) > SHOPPING_TEXT_MAX:
+            return {"error": f"{field} must be at most {SHOPPING_TEXT_MAX} characters"}, 400
     if "name" in data:
         shopping_item.name = data["name"]
     if "quantity" in data:
         shopping_item.quantity = data["quantity"]
     if "checked" in data:
         shopping_item.checked = data["checked"]
+    bump_plans(shopping_item.meal_plan_id)
+    _publish_shopping(shopping_item.meal_plan_id, {"type": "updated", "item": shopping_item.to_dict()})
     db.session.commit()
     return shopping_item.to_dict()
 
 
+MAX_BULK_SHOPPING_ITEMS = 500
+BULK_SHOPPING_FIELDS = ("name", "quantity", "checked")
+
+def _bulk_shopping_error(change):
+    if not isinstance(change, dict) or type(change.get("id")) is not int:
+        return "id is required"
+    if not any(f in change for f in BULK_SHOPPING_FIELDS):
+        return "nothing to change"
+    if "checked" in change and not isinstance(change["checked"], bool):
+        return "checked must be a boolean"
+    if "name" in change and not (isinstance(change["name"], str) and change["name"].strip()):
+        return "name must be a non-empty string"
+    if "quantity" in change and change["quantity"] is not None and not isinstance(change["quantity"], str):
+        return "quantity must be a string or null"
+    for field in ("name", "quantity"):
+        if isinstance(change.get(field), str) and len(change[field]) > SHOPPING_TEXT_MAX:
+            return f"{field} must be at most {SHOPPING_TEXT_MAX} characters"
+    return None
+
+@api_bp.patch("/shopping_items")
+@jwt_required()
+def bulk_update_shopping_items():
+    """Apply many shopping item edits in one transaction.
+
+    Body: ``[{"id", "checked"?, "name"?, "quantity"?}, ...]`` (or
+    ``{"items": [...]}``). Ownership of the whole set is checked with one
+    query, the updates go out as a single executemany, and the response has a
+    result per entry in request order. Send an ``Idempotency-Key`` header to
+    make retries safe: a replay returns the first response unchanged.
+    """
+    from . import idempotency
+    from sqlalchemy.exc import IntegrityError
+    uid = int(get_jwt_identity())
+
+    key = request.headers.get(idempotency.HEADER)
+    if key is not None:
+        if not key or len(key) > idempotency.MAX_KEY_LENGTH:
+            return {"error": f"{idempotency.HEADER} must be 1-{idempotency.MAX_KEY_LENGTH} characters"}, 400
+        fingerprint = idempotency.request_fingerprint()
+        stored = idempotency.find(uid, key)
+        if stored is not None:
+            return idempotency.replay(stored, fingerprint)
+
+    data = request.get_json(silent=True)
+    changes = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(changes, list) or not changes:
+        return {"error": "expected a non-empty list of {id, checked?, name?, quantity?}"}, 400
+    if len(changes) > MAX_BULK_SHOPPING_ITEMS:
+        return {"error": f"at most {MAX_BULK_SHOPPING_ITEMS} items per request"}, 400
+
+    results = [None] * len(changes)
+    wanted = {}
+    for idx, change in enumerate(changes):
+        error = _bulk_shopping_error(change)
+        if error is None and change["id"] in wanted:
+            error = "duplicate id"
+        if error is not None:
+            results[idx] = {"index": idx, "id": change.get("id") if isinstance(change, dict) else None, "ok": False, "error": error}
+            continue
+        wanted[change["id"]] = idx
+
+    # one ownership check for the whole set
+    owned = {
+        row.id: row
+        for row in db.session.execute(
+            select(ShoppingItem.id, ShoppingItem.meal_plan_id, ShoppingItem.name, ShoppingItem.quantity, ShoppingItem.checked)
+            .join(MealPlan, MealPlan.id == ShoppingItem.meal_plan_id)
+            .where(ShoppingItem.id.in_(wanted), MealPlan.user_id == uid)
+        )
+    } if wanted else {}
+
+    rows, by_plan = [], {}
+    for item_id, idx in wanted.items():
+        row = owned.get(item_id)
+        if row is None:
+            results[idx] = {"index": idx, "id": item_id, "ok": False, "error": "not found"}
+            continue
+        values = {f: changes[idx][f] for f in BULK_SHOPPING_FIELDS if f in changes[idx]}
+        rows.append(dict(values, id=item_id))
+        item = dict(row._asdict(), **values)
+        results[idx] = {"index": idx, "id": item_id, "ok": True, "item": item}
+        by_plan.setdefault(row.meal_plan_id, []).append(item)
+
+    if rows:
+        # executemany; rows touching the same columns share one statement
+        rows.sort(key=lambda r: sorted(r))
+        db.session.execute(update(ShoppingItem), rows)
+        bump_plans(*by_plan)
+        for plan_id, items in by_plan.items():
+            _publish_shopping(plan_id, {"type": "bulk_updated", "items": items})
+
+    body = {"results": results, "updated": len(rows)}
+    if key is not None:
+        idempotency.remember(uid, key, fingerprint, body, 200)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # the same key committed concurrently: answer like a replay
+        db.session.rollback()
+        stored = idempotency.find(uid, key) if key is not None else None
+        if stored is None:
+            raise
+        return idempotency.replay(stored, fingerprint)
+    return body, 200
+
+
 @api_bp.delete("/shopping_items/<int:shopping_item_id>")
 @jwt_required()
 def delete_shopping_item(shopping_item_id):
     uid = int(get_jwt_identity())
     shopping_item = ShoppingItem.query.join(MealPlan).filter(ShoppingItem.id==shopping_item_id, MealPlan.user_id==uid).first_or_404()
     db.session.delete(shopping_item)
+    bump_plans(shopping_item.meal_plan_id)
+    _publish_shopping(shopping_item.meal_plan_id, {"type": "deleted", "id": shopping_item.id})
     db.session.commit()
     return {"ok": True}
 
 
+@api_bp.get("/meal_plans/<int:meal_plan_id>/shopping/stream")
+@jwt_required(locations=["headers", "query_string"])  # EventSource can't send headers: ?jwt=<token>
+def stream_shopping(meal_plan_id):
+    """Server-Sent Events: one ``created``/``updated``/``bulk_updated``/
+    ``deleted``/``regenerated`` event per committed shopping list write on
+    this plan.
+
+    The first event is ``ready`` with the plan's current revision; a
+    ``resync`` event means deltas were dropped and the client should re-fetch
+    /shopping_items. Streams close after SSE_MAX_SECONDS and the browser
+    reconnects on its own.
+    """
+    uid = int(get_jwt_identity())
+    owned = db.session.execute(
+        select(MealPlan.id).where(MealPlan.id == meal_plan_id, MealPlan.user_id == uid)
+    ).scalar_one_or_none()
+    if owned is None:
+        abort(404)
+
+    # subscribe before reading the revision so nothing committed in between is missed
+    sub = events.subscribe(_shopping_channel(meal_plan_id))
+    revision = db.session.execute(select(MealPlan.revision).where(MealPlan.id == meal_plan_id)).scalar_one()
+    db.session.remove()  # don't hold a pooled connection for the life of the stream
+    heartbeat = current_app.config["SSE_HEARTBEAT_SECONDS"]
+    deadline = time.monotonic() + current_app.config["SSE_MAX_SECONDS"]
+
+    def frame(kind, data):
+        return f"event: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+    def stream():
+        yield "retry: 3000\n\n"
+        yield frame("ready", {"meal_plan_id": meal_plan_id, "revision": revision})
+        while time.monotonic() < deadline:
+            message = sub.get(timeout=heartbeat)
+            if message is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield frame(message["type"], message)
+
+    resp = Response(stream(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    resp.call_on_close(sub.close)
+    return resp
+
+
 # ---- Generate Shopping List (CORS-safe) ----
 
 # Preflight handler: no auth, just say "OK to POST with these headers"
@@ -198,40 +474,61 @@ def delete_shopping_item(shopping_item_id):
 def generate_shopping_preflight(plan_id):
     return ("", 204)
 
-def _is_instruction_like(text: str) -> bool:
-    if not text:
-        return True
-    t = text.strip().lower()
-    # very long lines tend to be sentences/instructions
-    if len(t) > 120:
-        return True
-    # sentence punctuation is a strong hint
-    if "." in t:
-        return True
-    # common instruction words/contexts
-    VERBS = [
-        "preheat","bake","mix","stir","combine","roll","cut","arrange","place",
-        "serve","cool","heat","cook","simmer","bring","whisk","beat","drain",
-        "transfer","cover","uncover","reduce","increase","fold","sprinkle",
-        "spoon","pour","garnish","press","set aside","until","degree","oven",
-        "minutes","pan","skillet","bowl","sheet","line","grease","divide"
+def _resume_stuck_snapshots(plan_id):
+    """Re-enqueue the plan's pending and failed snapshots; returns their ids."""
+    from .snapshots import resume_snapshots
+    stuck = db.session.execute(
+        select(MealItem.id, MealItem.snapshot_status)
+        .where(MealItem.meal_plan_id == plan_id, MealItem.snapshot_status.in_(("pending", "failed")))
+    ).all()
+    if stuck:
+        resume_snapshots(
+            plan_id,
+            [mid for mid, status in stuck if status == "pending"],
+            [mid for mid, status in stuck if status == "failed"],
+        )
+    return [mid for mid, _status in stuck]
+
+
+def _pending_snapshot_ids(plan_id):
+    return db.session.execute(
+        select(MealItem.id).where(MealItem.meal_plan_id == plan_id, MealItem.snapshot_status == "pending")
+    ).scalars().all()
+
+def _sync_shopping_items(plan_id, dedup):
+    """Bring a plan's shopping rows in line with ``dedup`` (key -> {name, quantity})
+    using bulk INSERT/UPDATE/DELETE for only the rows that differ."""
+    existing = db.session.execute(
+        select(ShoppingItem.id, ShoppingItem.name, ShoppingItem.quantity)
+        .where(ShoppingItem.meal_plan_id == plan_id)
+        .order_by(ShoppingItem.id)
+    ).all()
+
+    seen, to_update, to_delete = set(), [], []
+    for row in existing:
+        key = clean_name(row.name).lower()
+        want = dedup.get(key)
+        if want is None or key in seen:
+            to_delete.append(row.id)
+            continue
+        seen.add(key)
+        if row.name != want["name"] or (row.quantity or "") != want["quantity"]:
+            to_update.append({"id": row.id, "name": want["name"], "quantity": want["quantity"]})
+    to_insert = [
+        {"meal_plan_id": plan_id, "name": it["name"], "quantity": it["quantity"], "checked": False}
+        for key, it in dedup.items() if key not in seen
     ]
-    if any(v in t for v in VERBS):
-        return True
-    # junky names we definitely don't want as items
-    if t in {"serving","servings"}:
-        return True
-    return False
-
-def _clean_name(name: str) -> str:
-    if not isinstance(name, str):
-        return ""
-    n = name.strip()
-    # strip bullets like '-', '*', '•'
-    n = re.sub(r'^[\-\*\u2022]\s*', "", n)
-    # collapse whitespace
-    n = re.sub(r'\s+', " ", n)
-    return n
+
+    if to_delete:
+        db.session.execute(
+            delete(ShoppingItem).where(ShoppingItem.id.in_(to_delete)),
+            execution_options={"synchronize_session": False},
+        )
+    if to_update:
+        db.session.execute(update(ShoppingItem), to_update)
+    if to_insert:
+        db.session.execute(insert(ShoppingItem), to_insert)
+    return {"inserted": len(to_insert), "updated": len(to_update), "deleted": len(to_delete)}
 
 @api_bp.post("/meal_plans/<int:plan_id>/generate_shopping")
 @jwt_required()
@@ -241,83 +538,138 @@ def _clean_name(name: str) -> str:
     methods=["POST", "OPTIONS"],
 )
 def generate_shopping(plan_id):
+    from .snapshots import wait_for_snapshots
     try:
         uid = int(get_jwt_identity())
-        meal_plan = MealPlan.query.filter_by(id=plan_id, user_id=uid).first_or_404()
-
-        # 1) collect raw items (external snapshots preferred; local lines as fallback)
-        raw_items = []
-        for mi in meal_plan.items:
-            if mi.ingredient_snapshot:  # external recipe snapshot: list[{name, quantity}]
-                try:
-                    raw_items.extend(json.loads(mi.ingredient_snapshot) or [])
-                except Exception:
-                    current_app.logger.warning("Bad ingredient_snapshot on meal_item %s", mi.id)
-            elif mi.recipe:  # local recipe (legacy): split ingredients field by lines
-                for line in (mi.recipe.ingredients or "").splitlines():
-                    name = line.strip()
-                    if name:
-                        raw_items.append({"name": name, "quantity": ""})
-
-        # 2) normalize + FILTER OUT instruction-like entries
-        MAX_NAME = 255
-        MAX_QTY  = 255
-        dedup = {}
-        for it in raw_items:
-            name = _clean_name(it.get("name") or "")
-            qty  = (it.get("quantity") or "").strip()
-
-            if not name:
-                continue
-            if _is_instruction_like(name):
-                continue
-
-            # also drop 'servings' in quantity; it's usually noise for shopping lists
-            ql = qty.lower()
-            if "serving" in ql:
-                qty = ""
-
-            # clip to avoid DB constraints
-            name = name[:MAX_NAME]
-            qty  = qty[:MAX_QTY]
-
-            key = name.lower()
-            if key in dedup:
-                if qty:
-                    dedup[key]["quantity"] = (
-                        (dedup[key]["quantity"] + " + " + qty).strip(" +")
-                    )[:MAX_QTY]
-            else:
-                dedup[key] = {"name": name, "quantity": qty}
-
-        # 3) replace existing items
-        ShoppingItem.query.filter_by(meal_plan_id=plan_id).delete()
-        for it in dedup.values():
-            db.session.add(
-                ShoppingItem(
-                    meal_plan_id=plan_id,
-                    name=it["name"],
-                    quantity=it["quantity"],
-                )
+        MealPlan.query.filter_by(id=plan_id, user_id=uid).first_or_404()
+
+        # 0) retry failed snapshots, restart lost ones, and give them all a
+        #    moment to land
+        pending_ids = _resume_stuck_snapshots(plan_id)
+        if pending_ids:
+            wait_for_snapshots(pending_ids, current_app.config["SNAPSHOT_WAIT_SECONDS"])
+            pending_ids = _pending_snapshot_ids(plan_id)
+        skipped = len(pending_ids)
+
+        # 1) aggregate the plan's normalized ingredient rows in one query
+        #    (instruction-like lines were filtered when the rows were written)
+        groups = db.session.execute(
+            select(
+                SnapshotIngredient.name_key,
+                func.min(SnapshotIngredient.name).label("name"),
+                SnapshotIngredient.family,
+                SnapshotIngredient.unit,
+                func.max(SnapshotIngredient.quantity).label("quantity"),
+                func.sum(SnapshotIngredient.base_amount).label("total"),
+                func.count().label("count"),
+                func.min(SnapshotIngredient.id).label("first_id"),
+            )
+            .join(MealItem, MealItem.snapshot_id == SnapshotIngredient.snapshot_id)
+            .where(
+                MealItem.meal_plan_id == plan_id,
+                or_(MealItem.snapshot_status.is_(None), MealItem.snapshot_status != "pending"),
             )
+            .group_by(
+                SnapshotIngredient.name_key,
+                SnapshotIngredient.family,
+                SnapshotIngredient.unit,
+                case((SnapshotIngredient.family.is_(None), SnapshotIngredient.quantity)),
+            )
+        ).all()
+
+        # 2) sum amounts per unit family; unparseable quantities stay as text
+        dedup = summarize_groups(groups)
+
+        # 3) write the list: diff against existing rows (keeps `checked`), or
+        #    ?mode=replace to throw everything away and start over
+        if request.args.get("mode") == "replace":
+            ShoppingItem.query.filter_by(meal_plan_id=plan_id).delete()
+            changes = {"inserted": len(dedup), "updated": 0, "deleted": None}
+            if dedup:
+                db.session.execute(
+                    insert(ShoppingItem),
+                    [{"meal_plan_id": plan_id, "name": it["name"], "quantity": it["quantity"], "checked": False}
+                     for it in dedup.values()],
+                )
+        else:
+            changes = _sync_shopping_items(plan_id, dedup)
+        changed = any(changes.values()) or changes["deleted"] is None
+        if changed:
+            bump_plans(plan_id)
         db.session.commit()
 
-        return jsonify([s.to_dict() for s in meal_plan.shopping_items]), 200
+        items = [s.to_dict() for s in ShoppingItem.query.filter_by(meal_plan_id=plan_id).order_by(ShoppingItem.id)]
+        if changed:
+            events.publish(_shopping_channel(plan_id), {
+                "type": "regenerated", "meal_plan_id": plan_id, "changes": changes, "items": items,
+            })
+        return (
+            jsonify(items),
+            200,
+            {
+                "X-Pending-Snapshots": str(skipped),
+                "X-Shopping-Changes": ",".join(f"{k}={v}" for k, v in changes.items() if v is not None),
+            },
+        )
 
     except Exception as e:
         current_app.logger.exception("generate_shopping failed")
         return jsonify({"error": "GENERATE_SHOPPING_FAILED", "message": str(e)}), 500
 
 
+@api_bp.get("/recipes/local_search")
+@jwt_required()
+def recipes_local_search():
+    """Ranked full-text search over the user's own recipes (title + ingredients)."""
+    uid = int(get_jwt_identity())
+    q = (request.args.get("q") or "").strip()
+    page = max(1, request.args.get("page", 1, type=int) or 1)
+    per = max(1, min(50, request.args.get("per_page", 10, type=int) or 10))
+    if not q:
+        return {"items": [], "page": page, "per_page": per, "total": 0, "pages": 0}, 200
+
+    rows, total = search_local_recipes(uid, q, limit=per, offset=(page - 1) * per)
+    return {
+        "items": [
+            {"id": r.id, "user_id": r.user_id, "title": r.title, "rank": float(r.rank)}
+            for r in rows
+        ],
+        "page": page,
+        "per_page": per,
+        "total": total,
+        "pages": (total + per - 1) // per,
+    }, 200
+
+
+@api_bp.get("/recipes/unified_search")
+@jwt_required()
+def recipes_unified_search():
+    """Own recipes, cached catalog and (only if needed) the provider in one
+    ranked, de-duplicated page. ``partial: true`` means the provider missed
+    its deadline and the page holds local results only. Pass the returned
+    ``external_source`` back when asking for the next pages."""
+    uid = int(get_jwt_identity())
+    q = (request.args.get("q") or "").strip()
+    page = max(1, request.args.get("page", 1, type=int) or 1)
+    per = max(1, min(50, request.args.get("per_page", 10, type=int) or 10))
+    source = request.args.get("external_source") or None
+    if source is not None and source not in EXTERNAL_SOURCES:
+        return {"error": f"external_source must be one of {', '.join(EXTERNAL_SOURCES)}"}, 400
+    if not q:
+        return {"items": [], "page": page, "per_page": per, "total": 0, "pages": 0}, 200
+    return federated_search(uid, q, page=page, per_page=per, source=source), 200
+
+
 @api_bp.get("/recipes/search")
 @jwt_required()
 def recipes_search():
-    from .recipes_api import search_recipes 
+    from .recipes_api import QuotaExceeded, search_recipes
     from flask import current_app, request
 
     q = (request.args.get("q") or "").strip()
     page = max(1, int(request.args.get("page", 1) or 1))
     per = max(1, min(50, int(request.args.get("per_page", 10) or 10)))
+    rich = request.args.get("rich", "").lower() in ("1", "true", "yes")
 
     if not q:
         return {
@@ -330,14 +682,37 @@ def recipes_search():
     
     try:
         offset = (page - 1) * per
-        data = search_recipes(q, offset=offset, number=per)
+        cache = current_app.extensions["search_cache"]
+        key = (" ".join(q.lower().split()), offset, per)
+        if rich:
+            key += ("rich",)
+        data = cache.get_or_load(key, lambda: search_recipes(q, offset=offset, number=per, rich=rich))
+        if data["items"]:
+            prefetcher.schedule(
+                current_app._get_current_object(), int(get_jwt_identity()),
+                data["items"][0].provider, [hit.external_id for hit in data["items"]],
+            )
         return {
-            "items": data["items"],
+            "items": [hit._asdict() for hit in data["items"]],
             "page": page,
             "per_page": per,
             "total": data["total"],
             "pages": (data["total"] + per - 1) // per,
         }, 200
+    except QuotaExceeded:
+        # out of provider budget: answer from the local catalog instead
+        rows, total = search_catalog(q, limit=per, offset=offset, provider="spoonacular")
+        return {
+            "items": [
+                {"provider": r.provider, "external_id": r.external_id, "title": r.title, "image": r.image}
+                for r in rows
+            ],
+            "page": page,
+            "per_page": per,
+            "total": total,
+            "pages": (total + per - 1) // per,
+            "degraded": True,
+        }, 200
     except Exception:
         current_app.logger.exception("recipes_search failed")
         return {
@@ -351,19 +726,71 @@ def recipes_search():
         }, 502
 
 
+@api_bp.get("/images")
+def image_proxy():
+    # no JWT: <img> tags can't send one, and only provider hosts are fetched
+    from flask import send_file
+    from .images import ImageError
+
+    cache = current_app.extensions["image_cache"]
+    url = request.args.get("url", "")
+    size = request.args.get("size") or None
+    for attempt in range(2):
+        try:
+            image = cache.get(url, size)
+            resp = send_file(
+                image.path, mimetype=image.content_type, etag=image.etag,
+                max_age=current_app.config["IMAGE_MAX_AGE"], conditional=True,
+            )
+            break
+        except ImageError as e:
+            return {"error": str(e)}, e.status
+        except FileNotFoundError:
+            if attempt:  # evicted by another worker between lookup and send
+                raise
+    resp.cache_control.public = True
+    return resp
+
+
+@api_bp.get("/recipes/cache_stats")
+@jwt_required()
+def recipes_cache_stats():
+    from .recipe_cache import cache_stats
+    from .ingredients import parse_quantity
+    return {
+        "detail": cache_stats(),
+        "search": current_app.extensions["search_cache"].stats(),
+        "prefetch": prefetcher.stats(),
+        "quota": quota.stats(),
+        "images": current_app.extensions["image_cache"].stats(),
+        "quantities": parse_quantity.cache_info()._asdict(),
+    }, 200
+
+
+def _upstream_error(e):
+    """The JSON answer for a recipe detail the provider couldn't give us."""
+    from .recipes_api import QuotaExceeded
+    if isinstance(e, QuotaExceeded):
+        return {
+            "error": "RECIPE_QUOTA_EXHAUSTED",
+            "message": "Recipe provider budget is used up for now; try again later.",
+        }, 503
+    current_app.logger.exception("recipe detail failed")
+    return {
+        "error": "RECIPE_UPSTREAM_ERROR",
+        "message": str(e),
+    }, 502
+
+
 @api_bp.get("/recipes/<provider>/<external_id>")
 @jwt_required()
 @cross_origin(origins=["http://localhost:5173", "http://127.0.0.1:5173"])
 def recipe_detail(provider, external_id):
-    from .recipes_api import get_recipe_detail
+    from .recipe_cache import get_recipe_detail
     try:
-        raw = get_recipe_detail(external_id)
+        raw = get_recipe_detail(provider, external_id)
     except Exception as e:
-        current_app.logger.exception("recipe_detail failed")
-        return {
-            "error": "RECIPE_UPSTREAM_ERROR",
-            "message": str(e),
-        }, 502
+        return _upstream_error(e)
 
     # Normalize -> always return {title, image, ingredients[], steps}
     title = raw.get("title") or raw.get("name") or ""
@@ -399,7 +826,9 @@ def recipe_detail(provider, external_id):
 @api_bp.post("/meal_items/external")
 @jwt_required()
 def add_external_meal_item():
-    from .recipes_api import get_recipe_detail 
+    from .recipe_cache import get_recipe_detail
+    from .recipes_api import UpstreamError
+    from .snapshots import apply_snapshot, schedule_snapshot
     uid = int(get_jwt_identity())
     data = request.get_json() or {}
     meal_plan_id = data.get("meal_plan_id")
@@ -409,11 +838,37 @@ def add_external_meal_item():
     day = data.get("day")
     meal_type = data.get("meal_type")
     provider = data.get("provider") or "spoonacular"
-    external_id = str(data.get("external_id"))
+    if data.get("external_id") in (None, ""):
+        return {"error": "external_id is required"}, 400
+    external_id = str(data["external_id"])
+
+    run_async = data.get("async", current_app.config["SNAPSHOT_MODE"] == "async")
+    if not isinstance(run_async, bool):
+        return {"error": "async must be true or false"}, 400
+
+    # async mode: insert now with the client's title/image, snapshot later
+    if run_async:
+        mi = MealItem(
+            meal_plan_id=meal_plan.id,
+            day=day,
+            meal_type=meal_type,
+            external_provider=provider,
+            external_id=external_id,
+            external_title=(data.get("title") or "")[:300],
+            external_image=data.get("image"),
+            snapshot_status="pending",
+        )
+        db.session.add(mi)
+        bump_plans(meal_plan.id)
+        db.session.commit()
+        schedule_snapshot(mi.id)
+        return mi.to_dict(detail=True), 201
 
     # fetch details and snapshot ingredients
-    detail = get_recipe_detail(external_id)
-    snapshot = json.dumps(detail["ingredients"])  # store list of {name,quantity}
+    try:
+        detail = get_recipe_detail(provider, external_id)
+    except UpstreamError as e:
+        return _upstream_error(e)
 
     mi = MealItem(
         meal_plan_id=meal_plan.id,
@@ -423,8 +878,83 @@ def add_external_meal_item():
         external_id=external_id,
         external_title=detail["title"],
         external_image=detail.get("image"),
-        ingredient_snapshot=snapshot,
+        snapshot_status="ready",
     )
+    apply_snapshot(mi, detail["ingredients"])  # list of {name,quantity}
     db.session.add(mi)
+    bump_plans(meal_plan.id)
+    db.session.commit()
+    return mi.to_dict(detail=True), 201
+
+MAX_BATCH_ITEMS = 100
+
+@api_bp.post("/meal_items/external/batch")
+@jwt_required()
+def add_external_meal_items_batch():
+    """Fill many plan slots at once.
+
+    Body: {"meal_plan_id": 1, "items": [{"day", "meal_type", "external_id",
+    "provider"?}, ...]}. Missing recipe details are fetched in one bulk call,
+    every MealItem is inserted in a single transaction, and the response lists
+    a result per slot in request order.
+    """
+    from .recipe_cache import get_recipe_details
+    uid = int(get_jwt_identity())
+    data = request.get_json() or {}
+    meal_plan = MealPlan.query.filter_by(id=data.get("meal_plan_id"), user_id=uid).first_or_404()
+
+    slots = data.get("items")
+    if not isinstance(slots, list) or not slots:
+        return {"error": "items must be a non-empty list"}, 400
+    if len(slots) > MAX_BATCH_ITEMS:
+        return {"error": f"at most {MAX_BATCH_ITEMS} items per batch"}, 400
+
+    results = [None] * len(slots)
+    wanted = {}  # provider -> [external_id, ...]
+    for idx, slot in enumerate(slots):
+        if not isinstance(slot, dict) or not slot.get("day") or not slot.get("meal_type") or not slot.get("external_id"):
+            results[idx] = {"index": idx, "ok": False, "error": "day, meal_type and external_id are required"}
+            continue
+        provider = slot.get("provider") or "spoonacular"
+        wanted.setdefault(provider, []).append(str(slot["external_id"]))
+
+    details = {provider: get_recipe_details(provider, ids) for provider, ids in wanted.items()}
+
+    created, snapshots = [], {}
+    for idx, slot in enumerate(slots):
+        if results[idx] is not None:
+            continue
+        provider = slot.get("provider") or "spoonacular"
+        external_id = str(slot["external_id"])
+        detail = details[provider].get(external_id)
+        if detail is None:
+            results[idx] = {"index": idx, "ok": False, "error": "RECIPE_UPSTREAM_ERROR"}
+            continue
+        mi = MealItem(
+            meal_plan_id=meal_plan.id,
+            day=slot["day"],
+            meal_type=slot["meal_type"],
+            external_provider=provider,
+            external_id=external_id,
+            external_title=detail["title"],
+            external_image=detail.get("image"),
+            snapshot_status="ready",
+        )
+        if (provider, external_id) not in snapshots:
+            snapshots[(provider, external_id)] = get_or_create_snapshot(detail["ingredients"])
+        mi.snapshot = snapshots[(provider, external_id)]
+        db.session.add(mi)
+        created.append((idx, mi))
+    if created:
+        bump_plans(meal_plan.id)
     db.session.commit()
-    return mi.to_dict(), 201
\ No newline at end of file
+
+    for idx, mi in created:
+        results[idx] = {"index": idx, "ok": True, "item": mi.to_dict()}
+    if created:
+        status = 201
+    elif any(r["error"] == "RECIPE_UPSTREAM_ERROR" for r in results):
+        status = 502
+    else:
+        status = 400  # nothing but invalid slots
+    return {"results": results, "created": len(created)}, status
@@ -1,8 +1,13 @@
 # app.py
+import os
+
 from flask import Flask, jsonify, current_app
 from flask_cors import CORS
-from .extensions import db, bcrypt, migrate, jwt
+from .extensions import db, bcrypt, migrate, jwt, jobs, events, prefetcher, quota
 from .config import Config
+from .cache import TTLCache
+from .images import ImageCache
+from . import serialization
 
 ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -12,22 +17,40 @@ ALLOWED_ORIGINS = [
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    serialization.init_app(app)
 
     # CORS: app-wide, includes errors and OPTIONS
     CORS(
         app,
         resources={r"/*": {"origins": ALLOWED_ORIGINS}},
         supports_credentials=False,                 # True only if you actually use cookies
-        allow_headers=["Authorization", "Content-Type"],
-        expose_headers=["Authorization", "Content-Type"],
+        allow_headers=["Authorization", "Content-Type", "If-None-Match", "Idempotency-Key"],
+        expose_headers=["Authorization", "Content-Type", "ETag", "Idempotent-Replayed", "X-Pending-Snapshots", "X-Shopping-Changes"],
         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     )
 
     # Init extensions
     bcrypt.init_app(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    # keep autogenerate away from the full-text search DDL (see search.py)
+    from .search import include_object
+    migrate.init_app(app, db, include_object=include_object)
     jwt.init_app(app)
+    jobs.init_app(app)
+    events.init_app(app)
+    prefetcher.init_app(app)
+    quota.init_app(app)
+
+    # Per-process caches
+    app.extensions["search_cache"] = TTLCache(
+        maxsize=app.config["SEARCH_CACHE_SIZE"],
+        ttl=app.config["SEARCH_CACHE_TTL"],
+    )
+    app.extensions["image_cache"] = ImageCache(
+        app.config["IMAGE_CACHE_DIR"] or os.path.join(app.instance_path, "images"),
+        max_bytes=app.config["IMAGE_CACHE_MAX_BYTES"],
+        allowed_hosts=[h.strip() for h in app.config["IMAGE_PROXY_HOSTS"].split(",") if h.strip()],
+    )
 
     # Blueprints
     from .auth import auth_bp
@@ -36,6 +59,10 @@ def create_app(config_class=Config):
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(api_bp)
 
+    # CLI: flask import-catalog DUMP
+    from .catalog_import import import_catalog
+    app.cli.add_command(import_catalog)
+
     @app.get("/")
     def health():
         return {"status": "ok"}
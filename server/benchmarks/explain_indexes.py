@@ -0,0 +1,112 @@
+# server/benchmarks/explain_indexes.py
+"""Query plans and timings for the ownership-scoped lookups, with and without
+the lookup indexes.
+
+    python -m server.benchmarks.explain_indexes            # in-memory SQLite
+    python -m server.benchmarks.explain_indexes --url postgresql+psycopg2://...
+
+Against PostgreSQL point --url at a scratch database: the script creates and
+drops its own tables.
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert, text
+
+from server.extensions import db
+from server.models import Recipe, MealPlan, MealItem, ShoppingItem, User
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MEALS = ["breakfast", "lunch", "dinner", "snack"]
+
+QUERIES = {
+    "list_recipes": db.select(Recipe).where(Recipe.user_id == 7).order_by(Recipe.id.desc()).limit(10),
+    "list_meal_plans": db.select(MealPlan).where(MealPlan.user_id == 7).order_by(MealPlan.week_start.desc()).limit(10),
+    "plan_items": db.select(MealItem).where(MealItem.meal_plan_id == 70),
+    "plan_slot": db.select(MealItem).where(MealItem.meal_plan_id == 70, MealItem.day == "mon", MealItem.meal_type == "dinner"),
+    "external_usage": db.select(MealItem).where(MealItem.external_provider == "spoonacular", MealItem.external_id == "123"),
+    "user_shopping": db.select(ShoppingItem).join(MealPlan).where(MealPlan.user_id == 7).order_by(ShoppingItem.id).limit(10),
+}
+
+
+def seed(conn, users, per_user):
+    conn.execute(insert(User.__table__), [
+        {"id": u, "email": f"u{u}@example.com", "username": f"u{u}", "_password_hash": "x"} for u in range(1, users + 1)
+    ])
+    conn.execute(insert(Recipe.__table__), [
+        {"user_id": u, "title": f"recipe {u}-{i}", "ingredients": "1 egg"}
+        for u in range(1, users + 1) for i in range(per_user)
+    ])
+    weeks = max(1, per_user // 10)
+    plans = [
+        {"id": (u - 1) * weeks + w + 1, "user_id": u, "week_start": date(2024, 1, 1) + timedelta(weeks=w)}
+        for u in range(1, users + 1) for w in range(weeks)
+    ]
+    conn.execute(insert(MealPlan.__table__), plans)
+    conn.execute(insert(MealItem.__table__), [
+        {"meal_plan_id": p["id"], "day": d, "meal_type": m,
+         "external_provider": "spoonacular", "external_id": str((p["id"] * 31 + i) % 5000)}
+        for p in plans for i, (d, m) in enumerate((d, m) for d in DAYS for m in MEALS)
+    ])
+    conn.execute(insert(ShoppingItem.__table__), [
+        {"meal_plan_id": p["id"], "name": f"item {i}", "quantity": "1"} for p in plans for i in range(20)
+    ])
+
+
+def explain(conn, stmt):
+    sql = stmt.compile(conn, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = conn.execute(text(prefix + str(sql))).fetchall()
+    return [str(r[-1]) for r in rows]
+
+
+def timeit(conn, stmt, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(stmt).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def report(conn, label, repeat):
+    print(f"\n===== {label} =====")
+    for name, stmt in QUERIES.items():
+        ms = timeit(conn, stmt, repeat)
+        print(f"\n-- {name}: {ms:.3f} ms/query")
+        for line in explain(conn, stmt):
+            print("   ", line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--per-user", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    metadata = db.metadata
+    indexes = [ix for t in metadata.sorted_tables for ix in t.indexes]
+
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        for ix in indexes:
+            ix.drop(conn)
+        seed(conn, args.users, args.per_user)
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+        report(conn, "without lookup indexes", args.repeat)
+
+        for ix in indexes:
+            ix.create(conn)
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE"))
+        report(conn, "with lookup indexes", args.repeat)
+
+    metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# server/benchmarks/ingredient_classifier.py
+"""Accuracy and speed of the instruction-line classifier vs. the old VERBS scan.
+
+    python -m server.benchmarks.ingredient_classifier [--fixtures PATH] [--repeat N]
+
+Fixtures are a JSON list of {"line": str, "instruction": bool}.
+"""
+import argparse
+import json
+import os
+import timeit
+
+from server.ingredients import classify_lines, is_instruction_like
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "ingredient_lines.json")
+
+
+def legacy_is_instruction_like(text):
+    # verbatim copy of the pre-regex implementation from api.py
+    if not text:
+        return True
+    t = text.strip().lower()
+    if len(t) > 120:
+        return True
+    if "." in t:
+        return True
+    VERBS = [
+        "preheat","bake","mix","stir","combine","roll","cut","arrange","place",
+        "serve","cool","heat","cook","simmer","bring","whisk","beat","drain",
+        "transfer","cover","uncover","reduce","increase","fold","sprinkle",
+        "spoon","pour","garnish","press","set aside","until","degree","oven",
+        "minutes","pan","skillet","bowl","sheet","line","grease","divide"
+    ]
+    if any(v in t for v in VERBS):
+        return True
+    if t in {"serving","servings"}:
+        return True
+    return False
+
+
+def score(name, predictions, fixtures):
+    tp = fp = fn = tn = 0
+    wrong = []
+    for fx, pred in zip(fixtures, predictions):
+        truth = fx["instruction"]
+        if pred and truth:
+            tp += 1
+        elif pred and not truth:
+            fp += 1
+            wrong.append(("dropped", fx["line"]))
+        elif truth:
+            fn += 1
+            wrong.append(("kept", fx["line"]))
+        else:
+            tn += 1
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"{name:<10} accuracy {(tp + tn) / len(fixtures):.3f}  precision {precision:.3f}  recall {recall:.3f}")
+    for kind, line in wrong:
+        print(f"    {kind:<8} {line!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.fixtures) as f:
+        fixtures = json.load(f)
+    lines = [fx["line"] for fx in fixtures]
+
+    score("legacy", [legacy_is_instruction_like(l) for l in lines], fixtures)
+    score("regex", classify_lines(lines), fixtures)
+
+    n = len(lines) * args.repeat
+    timings = {
+        "legacy": timeit.timeit(lambda: [legacy_is_instruction_like(l) for l in lines], number=args.repeat),
+        "regex": timeit.timeit(lambda: [is_instruction_like(l) for l in lines], number=args.repeat),
+        "batch": timeit.timeit(lambda: classify_lines(lines), number=args.repeat),
+    }
+    print()
+    for name, seconds in timings.items():
+        print(f"{name:<10} {seconds / n * 1e6:7.3f} us/line  ({timings['legacy'] / seconds:4.1f}x legacy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# server/benchmarks/search_payload.py
+"""Payload size and decode cost of a complexSearch page: the old
+addRecipeInformation request parsed into dicts vs. the lean request parsed
+into SearchHit tuples.
+
+    python -m server.benchmarks.search_payload [--repeat N] [--mbps N]
+    python -m server.benchmarks.search_payload --record QUERY   # needs SPOONACULAR_KEY
+
+Fixtures are complexSearch response bodies (fixtures/complex_search_*.json);
+sizes are measured on the compact encoding the provider sends. Transfer time
+is modelled at ``--mbps``; decode time is measured.
+"""
+import argparse
+import json
+import os
+import timeit
+
+from server import recipes_api
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+LEAN = os.path.join(FIXTURES, "complex_search_lean.json")
+RICH = os.path.join(FIXTURES, "complex_search_rich.json")
+
+
+def legacy_parse(content):
+    # the pre-lean search_recipes body: requests' .json() and a dict per hit
+    data = json.loads(content.decode("utf-8"))
+    items = []
+    for it in data.get("results", []):
+        items.append({
+            "provider": "spoonacular",
+            "external_id": str(it["id"]),
+            "title": it.get("title"),
+            "image": it.get("image"),
+        })
+    return {"items": items, "total": data.get("totalResults", 0)}
+
+
+def wire(path):
+    with open(path, encoding="utf-8") as f:
+        return json.dumps(json.load(f), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def record(query, number=10):
+    recipes_api.require_key()
+    for path, extra in ((LEAN, {}), (RICH, {"addRecipeInformation": True})):
+        params = {"apiKey": recipes_api.SPOONACULAR_KEY, "query": query, "number": number, **extra}
+        resp = recipes_api.client.get("/recipes/complexSearch", params=params, endpoint="search")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(resp.json(), f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"wrote {path} ({len(resp.content)} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--mbps", type=float, default=20.0, help="modelled link speed for transfer time")
+    parser.add_argument("--record", metavar="QUERY", help="refresh the fixtures from the live API")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+        return
+
+    lean, rich = wire(LEAN), wire(RICH)
+    assert [h._asdict() for h in recipes_api._parse_search(lean)["items"]] == legacy_parse(rich)["items"]
+
+    cases = (
+        ("before (rich request, dicts)", rich, legacy_parse),
+        ("rich=True (RichSearchHit)", rich, lambda c: recipes_api._parse_search(c, rich=True)),
+        ("lean (SearchHit)", lean, recipes_api._parse_search),
+    )
+    print(f"{len(legacy_parse(lean)['items'])} hits per page, {args.repeat} runs, {args.mbps:g} Mbit/s\n")
+    baseline = None
+    for label, content, parse in cases:
+        decode = timeit.timeit(lambda: parse(content), number=args.repeat) / args.repeat
+        transfer = len(content) * 8 / (args.mbps * 1e6)
+        total = decode + transfer
+        if baseline is None:
+            baseline = total
+        print(
+            f"{label:<30} {len(content):7d} bytes  decode {decode * 1e6:8.1f} us  "
+            f"transfer {transfer * 1e3:6.2f} ms  ({baseline / total:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
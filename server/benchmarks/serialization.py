@@ -0,0 +1,111 @@
+# server/benchmarks/serialization.py
+"""to_dict + JSON encoding cost of a full-week meal plan payload, per JSON
+backend: items in full detail (the pre-summary payload), the default
+summary, and a ``?fields=`` grid selection.
+
+    python -m server.benchmarks.serialization [--repeat N] [--meals N]
+
+Runs on transient model objects, so no database is needed. Backends that
+are not installed are skipped.
+"""
+import argparse
+import json
+import timeit
+from datetime import date
+
+from flask import Flask
+
+from server.models import IngredientSnapshot, MealItem, MealPlan, Recipe, ShoppingItem
+from server.serialization import BACKENDS, parse_fields, project
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MEALS = ["breakfast", "lunch", "dinner", "snack"]
+
+# what the plan grid actually renders
+GRID_FIELDS = "id,week_Start,items.id,items.day,items.meal_type,items.title,items.image,items.snapshot_status,shopping_items"
+
+
+class _Args:
+    def __init__(self, fields):
+        self.args = {"fields": fields}
+
+
+def full_week(meals_per_day):
+    ingredients = "\n".join(f"{i + 1} cups ingredient number {i} finely chopped" for i in range(14))
+    steps = "\n\n".join(f"Step {i + 1}: " + "stir the pot and keep cooking gently " * 6 for i in range(8))
+    snapshot = IngredientSnapshot(ingredients=json.dumps(
+        [{"name": f"ingredient {i}", "quantity": f"{i + 1} tbsp ingredient {i}"} for i in range(12)]
+    ))
+    plan = MealPlan(id=1, user_id=1, week_start=date(2026, 10, 12))
+    n = 0
+    for day in DAYS:
+        for meal_type in MEALS[:meals_per_day]:
+            n += 1
+            if n % 2:
+                recipe = Recipe(id=n, user_id=1, title=f"Recipe {n}", ingredients=ingredients, steps=steps)
+                item = MealItem(id=n, meal_plan_id=1, day=day, meal_type=meal_type, recipe_id=n, recipe=recipe)
+            else:
+                item = MealItem(
+                    id=n, meal_plan_id=1, day=day, meal_type=meal_type,
+                    external_provider="spoonacular", external_id=str(600000 + n),
+                    external_title=f"External {n}", external_image=f"https://img.spoonacular.com/recipes/{n}-556x370.jpg",
+                    snapshot=snapshot, snapshot_status="ready",
+                )
+            plan.items.append(item)
+    for i in range(60):
+        plan.shopping_items.append(ShoppingItem(id=i + 1, meal_plan_id=1, name=f"item {i}", quantity="2 cups", checked=i % 3 == 0))
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--meals", type=int, default=3, help="meals per day (1-4)")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    plan = full_week(max(1, min(args.meals, len(MEALS))))
+    grid = parse_fields(_Args(GRID_FIELDS))
+
+    def detail():
+        data = plan.to_dict(include_shopping=True)
+        data["items"] = [item.to_dict(detail=True) for item in plan.items]
+        return data
+
+    def summary():
+        return plan.to_dict(include_items=True, include_shopping=True)
+
+    def trimmed():
+        return project(plan.to_dict(include_items=True, include_shopping=True, fields=grid), grid)
+
+    print(f"{len(plan.items)} meal items, {len(plan.shopping_items)} shopping items, {args.repeat} runs\n")
+    baseline = None
+    for name in ("stdlib", "orjson", "msgspec"):
+        cls, available = BACKENDS[name]
+        if not available():
+            print(f"{name:<8} (not installed)")
+            continue
+        provider = cls(app)
+        encode = provider._encode if hasattr(provider, "_encode") else (
+            lambda obj: provider.dumps(obj, separators=(",", ":")).encode("utf-8")
+        )
+        for label, build in (("detail", detail), ("summary", summary), ("fields", trimmed)):
+            size = len(encode(build()))
+            seconds = timeit.timeit(lambda: encode(build()), number=args.repeat) / args.repeat
+            if baseline is None:
+                baseline = seconds
+            print(f"{name:<8} {label:<8} {seconds * 1e6:9.1f} us/payload  {size:7d} bytes  ({baseline / seconds:4.1f}x stdlib detail)")
+
+    # encoding alone, to separate it from to_dict
+    data = detail()
+    print()
+    for name in ("stdlib", "orjson", "msgspec"):
+        cls, available = BACKENDS[name]
+        if available():
+            provider = cls(app)
+            seconds = timeit.timeit(lambda: provider.dumps(data), number=args.repeat) / args.repeat
+            print(f"{name:<8} encode  {seconds * 1e6:9.1f} us/payload")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# server/catalog_import.py
+"""``flask import-catalog DUMP``: bulk-load provider recipes into external_recipes.
+
+The dump is either NDJSON (one recipe per line) or a JSON array, read as a
+stream so its size doesn't matter. Records can be raw provider recipe
+information (``id``, ``title``, ``extendedIngredients``, ...) or already
+normalized (``external_id``, ``title``, ``ingredients`` [{name, quantity}],
+``instructions``, ``sourceUrl``); records without ingredients only add
+title/image and never blank out a cached detail. Records that aren't valid
+JSON are logged with their byte offset and counted as skipped.
+
+Rows are upserted in batches, one transaction each: COPY into a temp table
+plus one INSERT ... ON CONFLICT on PostgreSQL, an executemany upsert on
+SQLite. After every batch the position is saved to ``DUMP.checkpoint``, so
+an interrupted import picks up where it stopped (``--restart`` ignores it);
+it is removed once the import completes.
+
+    flask import-catalog recipes.ndjson [--provider spoonacular] [--batch-size 2000]
+"""
+import csv
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.dialects import sqlite
+
+from .extensions import db
+from .models import ExternalRecipe
+from .recipes_api import _normalize_detail
+
+log = logging.getLogger(__name__)
+
+READ_CHUNK = 1 << 20
+COLUMNS = ("provider", "external_id", "title", "image", "ingredients", "instructions", "source_url", "fetched_at")
+# updated only when the incoming record has a value
+KEEP_COLUMNS = ("image", "ingredients", "instructions", "source_url", "fetched_at")
+
+
+# -------- reading --------
+def _first_char(f):
+    """The first non-whitespace character and how many characters were read."""
+    n = 0
+    while True:
+        c = f.read(1)
+        n += 1
+        if not c or not c.isspace():
+            return c, n
+
+
+def _skip_malformed(offset, error):
+    log.warning("skipping malformed record at byte %d: %s", offset, error)
+    return None
+
+
+def iter_ndjson(f, offset=0):
+    """(record, offset after it) for each line of a binary NDJSON stream;
+    the record is None for a line that isn't valid JSON."""
+    f.seek(offset)
+    for line in iter(f.readline, b""):
+        start, offset = offset, offset + len(line)
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = _skip_malformed(start, e)
+            yield record, offset
+
+
+def iter_json_array(f):
+    """(record, None) for each element of a binary JSON array stream,
+    decoding one READ_CHUNK at a time; the record is None for an element
+    that isn't valid JSON."""
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(f, encoding="utf-8")
+    try:
+        first, read = _first_char(text)
+        if first != "[":
+            raise click.ClickException("expected a JSON array or NDJSON")
+        yield from _array_elements(text, decoder, read)  # only whitespace before "[": chars == bytes
+    finally:
+        text.detach()  # leave the caller's file open
+
+
+def _element_end(buf, pos):
+    """Index of the comma or bracket closing the array element at ``pos``, or
+    None if ``buf`` ends first. Follows bracket nesting outside strings; a
+    mismatched closer also closes whatever is still open inside it."""
+    stack, in_string, escaped = [], False, False
+    for i in range(pos, len(buf)):
+        c = buf[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "[{":
+            stack.append(c)
+        elif c in "]}":
+            opener = "[" if c == "]" else "{"
+            if opener in stack:
+                del stack[len(stack) - 1 - stack[::-1].index(opener):]
+            elif c == "]":
+                return i  # the array's own closing bracket
+        elif c == "," and not stack:
+            return i
+    return None
+
+
+def _array_elements(text, decoder, consumed=0):
+    # consumed: bytes of the stream before buf, for error offsets
+    buf, pos, eof = "", 0, False
+    while True:
+        # skip whitespace and commas between elements
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            consumed += len(buf.encode("utf-8"))
+            buf, pos = text.read(READ_CHUNK), 0
+            eof = not buf
+        if pos >= len(buf):
+            raise click.ClickException("unexpected end of JSON array")
+        if buf[pos] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except ValueError as e:
+            end = _element_end(buf, pos)
+            if end is None:
+                if eof:
+                    raise click.ClickException("unexpected end of JSON array") from e
+                # cut off by the chunk boundary: read on
+                consumed += len(buf[:pos].encode("utf-8"))
+                more = text.read(READ_CHUNK)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield _skip_malformed(consumed + len(buf[:pos].encode("utf-8")), e), None
+            pos = end
+            continue
+        yield record, None
+        pos = end
+
+
+def iter_records(f, offset=0):
+    """Records of a binary dump stream, NDJSON or JSON array (sniffed)."""
+    head = f.read(4096).lstrip()
+    f.seek(0)
+    if head[:1] == b"[":
+        return iter_json_array(f)
+    return iter_ndjson(f, offset)
+
+
+# -------- rows --------
+def to_row(record, provider, fetched_at):
+    """external_recipes values for one dump record, or None if unusable."""
+    if not isinstance(record, dict):
+        return None
+    external_id = record.get("external_id", record.get("id"))
+    if external_id is None:
+        return None
+    if "extendedIngredients" in record or "analyzedInstructions" in record:
+        record = dict(record, **_normalize_detail(record))
+    title = (record.get("title") or "").strip()
+    if not title:
+        return None
+    ingredients = record.get("ingredients")
+    return {
+        "provider": record.get("provider") or provider,
+        "external_id": str(external_id),
+        "title": title[:300],
+        "image": record.get("image"),
+        "ingredients": json.dumps(ingredients) if isinstance(ingredients, list) else None,
+        "instructions": record.get("instructions") if isinstance(ingredients, list) else None,
+        "source_url": record.get("sourceUrl") or record.get("source_url"),
+        "fetched_at": fetched_at if isinstance(ingredients, list) else None,
+    }
+
+
+# -------- writing --------
+def _upsert_sqlite(rows):
+    table = ExternalRecipe.__table__
+    stmt = sqlite.insert(table)
+    # a summary-only record must not blank out a cached detail
+    set_ = {c: db.func.coalesce(stmt.excluded[c], table.c[c]) for c in KEEP_COLUMNS}
+    set_["title"] = stmt.excluded.title
+    stmt = stmt.on_conflict_do_update(index_elements=["provider", "external_id"], set_=set_)
+    db.session.execute(stmt, rows)
+
+
+def _upsert_postgres(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        # \N marks NULL (the default for CSV is an unquoted empty string)
+        writer.writerow([r"\N" if row[c] is None else row[c] for c in COLUMNS])
+    buf.seek(0)
+    cols = ", ".join(COLUMNS)
+    conn = db.session.connection()
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE IF NOT EXISTS catalog_import ("
+        "provider text, external_id text, title text, image text, ingredients text,"
+        " instructions text, source_url text, fetched_at timestamp, ord bigserial) ON COMMIT DELETE ROWS"
+    )
+    with conn.connection.driver_connection.cursor() as cur:
+        cur.copy_expert(f"COPY catalog_import ({cols}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+    keep = ", ".join(f"{c} = COALESCE(EXCLUDED.{c}, external_recipes.{c})" for c in KEEP_COLUMNS)
+    # ord follows the COPY order: a recipe listed twice in a batch keeps its last record
+    conn.exec_driver_sql(
+        f"INSERT INTO external_recipes ({cols}) "
+        f"SELECT DISTINCT ON (provider, external_id) {cols} FROM catalog_import "
+        f"ORDER BY provider, external_id, ord DESC "
+        f"ON CONFLICT (provider, external_id) DO UPDATE SET title = EXCLUDED.title, {keep}"
+    )
+
+
+WRITERS = {"postgresql": _upsert_postgres, "sqlite": _upsert_sqlite}
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def write_batch(rows):
+    WRITERS[_dialect()](rows)
+    db.session.commit()
+
+
+# -------- checkpoint --------
+def _load_checkpoint(path, dump_size):
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("size") == dump_size else None
+
+
+def _save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+@click.command("import-catalog")
+@click.argument("dump", type=click.Path(exists=True, dir_okay=False))
+@click.option("--provider", default="spoonacular", show_default=True, help="for records that don't name one")
+@click.option("--batch-size", default=2000, show_default=True)
+@click.option("--checkpoint", "checkpoint_path", help="default: DUMP.checkpoint")
+@click.option("--restart", is_flag=True, help="ignore an existing checkpoint")
+@with_appcontext
+def import_catalog(dump, provider, batch_size, checkpoint_path, restart):
+    """Bulk-load a JSON/NDJSON dump of provider recipes into external_recipes."""
+    if _dialect() not in WRITERS:
+        raise click.ClickException(f"catalog import is not available on {_dialect()}")
+    checkpoint_path = checkpoint_path or dump + ".checkpoint"
+    dump_size = os.path.getsize(dump)
+    state = None if restart else _load_checkpoint(checkpoint_path, dump_size)
+    state = state or {"size": dump_size, "records": 0, "offset": 0, "imported": 0, "skipped": 0}
+    if state["records"]:
+        click.echo(f"resuming after {state['records']:,} records")
+
+    fetched_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    started = last_report = time.monotonic()
+    done_before = state["records"]
+
+    with open(dump, "rb") as f:
+        records = iter_records(f, state["offset"])
+        # arrays can't be seeked into; skip what the checkpoint already covers
+        to_skip = state["records"] if state["offset"] == 0 else 0
+
+        batch = []
+
+        def flush(offset):
+            nonlocal last_report
+            if batch:
+                write_batch(batch)
+                state["imported"] += len(batch)
+                batch.clear()
+            if offset is not None:
+                state["offset"] = offset
+            _save_checkpoint(checkpoint_path, state)
+            now = time.monotonic()
+            if now - last_report >= 2:
+                last_report = now
+                rate = (state["records"] - done_before) / (now - started)
+                click.echo(f"{state['records']:,} records ({rate:,.0f}/s, {100 * f.tell() / max(dump_size, 1):.0f}%)")
+
+        offset = None
+        for record, offset in records:
+            if to_skip:
+                to_skip -= 1
+                continue
+            state["records"] += 1
+            row = to_row(record, provider, fetched_at)
+            if row is None:
+                state["skipped"] += 1
+            else:
+                batch.append(row)
+            if len(batch) >= batch_size:
+                flush(offset)
+        flush(offset)
+    os.remove(checkpoint_path)  # finished; a rerun starts over
+
+    elapsed = time.monotonic() - started
+    count = state["records"] - done_before
+    click.echo(
+        f"done: {state['records']:,} records, {state['imported']:,} imported, {state['skipped']:,} skipped "
+        f"in {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f}/s)"
+    )
@@ -8,4 +8,72 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt")
-    CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173")
\ No newline at end of file
+    CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173")
+
+    # Spoonacular detail cache (seconds): fresh for TTL, then served stale
+    # while a background refresh runs for up to SWR more.
+    RECIPE_CACHE_TTL = int(os.getenv("RECIPE_CACHE_TTL", 7 * 24 * 3600))
+    RECIPE_CACHE_SWR = int(os.getenv("RECIPE_CACHE_SWR", 30 * 24 * 3600))
+
+    # In-process LRU cache for normalized Spoonacular search pages
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 2048))
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 15 * 60))
+
+    # Background jobs (ingredient snapshots, cache refreshes)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+    # "sync" fetches recipe detail before inserting an external meal item,
+    # "async" inserts immediately and snapshots ingredients in the background
+    SNAPSHOT_MODE = os.getenv("SNAPSHOT_MODE", "sync")
+    # how long generate_shopping waits for pending snapshots before skipping them
+    SNAPSHOT_WAIT_SECONDS = float(os.getenv("SNAPSHOT_WAIT_SECONDS", 5))
+
+    # Live shopping list updates: "memory" (single process) or "postgres"
+    # (LISTEN/NOTIFY, for several workers/hosts)
+    EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 100))
+    # SSE keep-alive comment interval, and how long one stream stays open
+    # before the client is told to reconnect (frees the worker periodically)
+    SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+    SSE_MAX_SECONDS = float(os.getenv("SSE_MAX_SECONDS", 300))
+
+    # How long a stored Idempotency-Key response can be replayed (seconds)
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 24 * 3600))
+
+    # Response JSON encoder: auto | orjson | msgspec | stdlib (see serialization.py)
+    JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+    # /recipes/unified_search: how long to wait for the provider when local
+    # results can't fill the page (seconds), and its worker pool size
+    FEDERATED_DEADLINE = float(os.getenv("FEDERATED_DEADLINE", 1.5))
+    FEDERATED_PROVIDER_WORKERS = int(os.getenv("FEDERATED_PROVIDER_WORKERS", 4))
+
+    # Warm the detail cache for the top search hits in the background (see
+    # prefetch.py). Budgets count upstream fetches per BUDGET_WINDOW seconds.
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes")
+    PREFETCH_TOP_K = int(os.getenv("PREFETCH_TOP_K", 3))
+    PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", 2))
+    PREFETCH_USER_BUDGET = int(os.getenv("PREFETCH_USER_BUDGET", 30))
+    PREFETCH_GLOBAL_BUDGET = int(os.getenv("PREFETCH_GLOBAL_BUDGET", 300))
+    PREFETCH_BUDGET_WINDOW = int(os.getenv("PREFETCH_BUDGET_WINDOW", 3600))
+    # how long a detail request waits for an in-flight prefetch of the same recipe
+    PREFETCH_WAIT_SECONDS = float(os.getenv("PREFETCH_WAIT_SECONDS", 3))
+
+    # Shared Spoonacular point budget (see quota.py). Off by default: set
+    # QUOTA_DAILY_POINTS to the plan's daily points (150 on the free plan) to
+    # turn it on. QUOTA_BURST is how many points can go at once; 0 means a
+    # quarter of the day's budget. Refresh and prefetch calls stop when less
+    # than their reserve fraction is left.
+    QUOTA_DAILY_POINTS = float(os.getenv("QUOTA_DAILY_POINTS", 0))
+    QUOTA_BURST = float(os.getenv("QUOTA_BURST", 0))
+    QUOTA_RESERVE_REFRESH = float(os.getenv("QUOTA_RESERVE_REFRESH", 0.2))
+    QUOTA_RESERVE_PREFETCH = float(os.getenv("QUOTA_RESERVE_PREFETCH", 0.4))
+    # SQLite file shared by the workers on this host (default: instance/quota.sqlite3)
+    QUOTA_STORE = os.getenv("QUOTA_STORE")
+
+    # /images proxy (see images.py): disk cache location (default
+    # instance/images) and size, browser cache lifetime, and the only hosts
+    # it will fetch from
+    IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR")
+    IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    IMAGE_MAX_AGE = int(os.getenv("IMAGE_MAX_AGE", 7 * 24 * 3600))
+    IMAGE_PROXY_HOSTS = os.getenv("IMAGE_PROXY_HOSTS", "img.spoonacular.com,spoonacular.com")
@@ -0,0 +1,59 @@
+# server/etags.py
+"""Revision-based ETags and conditional GET helpers.
+
+MealPlan.revision is bumped by every write to the plan's items or shopping
+list (bump_plans), Recipe.revision by recipe edits. Views compute an ETag from
+those counters *before* loading anything else, so a matching If-None-Match
+costs one small query and no serialization.
+"""
+import hashlib
+
+from flask import make_response, request
+from sqlalchemy import select, update
+
+from .extensions import db
+from .models import MealItem, MealPlan
+
+
+def bump_plans(*plan_ids):
+    """Increment the revision of the given plans (part of the caller's transaction)."""
+    ids = {i for i in plan_ids if i is not None}
+    if ids:
+        db.session.execute(
+            update(MealPlan).where(MealPlan.id.in_(ids)).values(revision=MealPlan.revision + 1),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def bump_plans_using_recipe(recipe_id):
+    """Plans embed their recipes, so a recipe edit changes those plans too."""
+    db.session.execute(
+        update(MealPlan)
+        .where(MealPlan.id.in_(select(MealItem.meal_plan_id).where(MealItem.recipe_id == recipe_id)))
+        .values(revision=MealPlan.revision + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def make_etag(*parts):
+    """Weak ETag over ``parts`` plus the query string (pagination, fields...)."""
+    raw = "|".join(str(p) for p in parts) + "|" + request.query_string.decode("latin-1")
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def not_modified(etag):
+    """A 304 response if the client already has ``etag``, else None."""
+    if request.if_none_match.contains_weak(etag):
+        resp = make_response("", 304)
+        resp.set_etag(etag, weak=True)
+        return resp
+    return None
+
+
+def with_etag(rv, etag):
+    """Response for ``rv``; only successful ones carry ``etag``, so a client
+    never revalidates against an error."""
+    resp = make_response(rv)
+    if 200 <= resp.status_code < 300:
+        resp.set_etag(etag, weak=True)
+    return resp
@@ -0,0 +1,258 @@
+# server/events.py
+"""Publish/subscribe for live updates (the shopping list SSE stream).
+
+Views call ``events.publish_after_commit(channel, message)``; messages are
+delivered only once the surrounding transaction commits and are dropped on
+rollback. Delivery goes through a pluggable broker:
+
+* ``LocalBroker`` (EVENTS_BACKEND=memory) fans out to subscribers in this
+  process. Fine for a single worker.
+* ``PostgresBroker`` (EVENTS_BACKEND=postgres) sends every message through
+  ``pg_notify`` and runs one LISTEN thread per process that feeds the local
+  fan-out, so every worker sees every commit. The thread reconnects when its
+  connection drops and sends subscribers a ``resync``.
+"""
+import contextlib
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One subscriber's bounded queue. A subscriber that falls too far behind
+    gets a single ``resync`` message instead of an unbounded backlog."""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._overflowed = False
+
+    def _deliver(self, message):
+        if self._overflowed:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self._overflowed = True
+
+    def get(self, timeout):
+        """Next message, or None after ``timeout`` seconds of silence."""
+        if self._overflowed:
+            self._overflowed = False
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            return {"type": "resync"}
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalBroker:
+    """In-process fan-out keyed by channel name."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        sub = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel]
+
+    def deliver(self, channel, message):
+        with self._lock:
+            subs = list(self._subscribers.get(channel, ()))
+        for sub in subs:
+            sub._deliver(message)
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+
+class PostgresBroker(LocalBroker):
+    """Cross-process delivery over PostgreSQL LISTEN/NOTIFY."""
+
+    PG_CHANNEL = "app_events"
+    # NOTIFY payloads are capped at 8000 bytes; larger messages become a
+    # resync hint and clients re-fetch (cheaply, thanks to ETags)
+    MAX_PAYLOAD = 7900
+    # seconds between LISTEN reconnect attempts, doubling up to the max
+    RETRY_DELAY = 1.0
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, engine, queue_size=100, poll_interval=5.0):
+        super().__init__(queue_size)
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, channel, message):
+        payload = json.dumps({"c": channel, "m": message}, separators=(",", ":"))
+        if len(payload.encode("utf-8")) > self.MAX_PAYLOAD:
+            payload = json.dumps({"c": channel, "m": {"type": "resync"}})
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.PG_CHANNEL, "payload": payload})
+            conn.commit()
+
+    def subscribe(self, channel):
+        self._ensure_listener()
+        return super().subscribe(channel)
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="events-listen", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        # runs for the life of the process; a dropped connection (database
+        # restart, failover) is reopened here, backing off while the database
+        # stays unreachable
+        delay = self.RETRY_DELAY
+        connected_before = False
+        while True:
+            try:
+                conn = self._connect()
+            except Exception:
+                log.warning("events LISTEN connect failed; retrying in %.0fs", delay, exc_info=True)
+                time.sleep(delay)
+                delay = min(delay * 2, self.MAX_RETRY_DELAY)
+                continue
+            delay = self.RETRY_DELAY
+            if connected_before:
+                # whatever was published while we were away is lost
+                self._resync_all()
+            connected_before = True
+            try:
+                self._drain(conn)
+            except Exception:
+                log.warning("events LISTEN connection lost; reconnecting", exc_info=True)
+            finally:
+                with contextlib.suppress(Exception):
+                    conn.close()
+            time.sleep(delay)
+
+    def _connect(self):
+        # a dedicated connection taken out of the pool
+        fairy = self.engine.raw_connection()
+        fairy.detach()
+        conn = fairy.driver_connection
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {self.PG_CHANNEL}")
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _drain(self, conn):
+        """Feed notifications to the local subscribers until the connection fails."""
+        while True:
+            if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                note = conn.notifies.pop(0)
+                try:
+                    data = json.loads(note.payload)
+                except ValueError:
+                    continue
+                self.deliver(data["c"], data["m"])
+
+    def _resync_all(self):
+        with self._lock:
+            channels = list(self._subscribers)
+        for channel in channels:
+            self.deliver(channel, {"type": "resync"})
+
+
+class EventBus:
+    """Flask extension wrapping the configured broker."""
+
+    def __init__(self, app=None):
+        self.broker = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get("EVENTS_BACKEND", "memory")
+        queue_size = app.config.get("EVENTS_QUEUE_SIZE", 100)
+        if backend == "postgres":
+            from .extensions import db
+            with app.app_context():
+                self.broker = PostgresBroker(db.engine, queue_size=queue_size)
+        elif backend == "memory":
+            self.broker = LocalBroker(queue_size=queue_size)
+        else:
+            raise ValueError(f"unknown EVENTS_BACKEND {backend!r}")
+        app.extensions["events"] = self
+        _install_session_hooks()
+
+    def subscribe(self, channel):
+        return self.broker.subscribe(channel)
+
+    def publish(self, channel, message):
+        self.broker.publish(channel, message)
+
+    def publish_after_commit(self, channel, message, session=None):
+        """Queue ``message`` on the (request) session; sent when it commits."""
+        if session is None:
+            from .extensions import db
+            session = db.session()
+        session.info.setdefault("pending_events", []).append((self, channel, message))
+
+
+_hooks_installed = False
+
+
+def _install_session_hooks():
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    @event.listens_for(Session, "after_commit")
+    def _flush_events(session):
+        for bus, channel, message in session.info.pop("pending_events", ()):
+            try:
+                bus.publish(channel, message)
+            except Exception:
+                # live updates are best-effort; the write itself succeeded
+                log.exception("event publish failed on %s", channel)
+
+    @event.listens_for(Session, "after_soft_rollback")
+    def _drop_events(session, previous_transaction):
+        # a savepoint rolling back leaves the outer transaction (and its events) alive
+        if not previous_transaction.nested:
+            session.info.pop("pending_events", None)
@@ -2,8 +2,16 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
+from .events import EventBus
+from .jobs import JobRunner
+from .prefetch import Prefetcher
+from .quota import QuotaManager
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 migrate = Migrate()
-jwt = JWTManager()
\ No newline at end of file
+jwt = JWTManager()
+jobs = JobRunner()
+events = EventBus()
+prefetcher = Prefetcher()
+quota = QuotaManager()
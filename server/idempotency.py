@@ -0,0 +1,73 @@
+# server/idempotency.py
+"""Idempotency-Key support for retried writes.
+
+The first request with a given key stores its response in the same
+transaction as its writes; a retry with the same key and the same request
+gets that response back (with ``Idempotent-Replayed: true``) instead of
+being applied again. Reusing a key for a different request is a 422.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, make_response, request
+from sqlalchemy import delete, select
+
+from .extensions import db
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _cutoff():
+    return _utcnow() - timedelta(seconds=current_app.config["IDEMPOTENCY_TTL"])
+
+
+def request_fingerprint():
+    h = hashlib.sha256()
+    h.update(request.method.encode())
+    h.update(b" ")
+    h.update(request.path.encode())
+    h.update(b"\n")
+    h.update(request.get_data())
+    return h.hexdigest()
+
+
+def find(user_id, key):
+    """The live stored response for ``key``, or None."""
+    return db.session.execute(
+        select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at >= _cutoff(),
+        )
+    ).scalar_one_or_none()
+
+
+def replay(stored, fingerprint):
+    if stored.fingerprint != fingerprint:
+        return {"error": f"{HEADER} was already used for a different request"}, 422
+    resp = make_response(json.loads(stored.response), stored.status_code)
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+def remember(user_id, key, fingerprint, body, status_code):
+    """Store the response in the current transaction (commit is the caller's)."""
+    db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.created_at < _cutoff()),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.add(IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        fingerprint=fingerprint,
+        status_code=status_code,
+        response=json.dumps(body),
+        created_at=_utcnow(),
+    ))
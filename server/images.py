@@ -0,0 +1,254 @@
+# server/images.py
+"""Image proxy with a content-addressed disk cache.
+
+``GET /images?url=<provider image url>&size=grid|list`` fetches each image
+from the provider once and serves it (or a thumbnail of it) from disk with a
+strong ETag and a long Cache-Control, so plan and search pages stop pulling
+full-size images from the provider's CDN on every render.
+
+Layout under IMAGE_CACHE_DIR::
+
+    urls/<sha256(url)>             "<digest> <content type>" of what the url returned
+    objects/<dd>/<digest>          the original bytes, named by their sha256
+    thumbs/<dd>/<digest>-<size>    resized copies
+
+Files are written atomically (tmp + rename), so several workers can share the
+directory. Every read bumps the file's mtime; once the cache grows past
+IMAGE_CACHE_MAX_BYTES the least recently used files (index entries included)
+are deleted. Only hosts in IMAGE_PROXY_HOSTS are fetched, only raster types
+in RASTER_TYPES are kept, and query strings are dropped from urls, so
+variants of one url share an entry.
+
+Thumbnails need Pillow (optional); without it every size serves the original.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:  # optional
+    Image = None
+
+log = logging.getLogger(__name__)
+
+# bounding boxes (px), roughly 2x what the UI draws them at
+SIZES = {
+    "grid": (64, 64),     # plan grid / calendar rows
+    "list": (480, 320),   # search result cards
+}
+
+# what the proxy serves; anything else (notably image/svg+xml, which can carry
+# script) is refused
+RASTER_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp"})
+
+CachedImage = namedtuple("CachedImage", "path content_type etag")
+
+
+class ImageError(Exception):
+    def __init__(self, message, status=502):
+        super().__init__(message)
+        self.status = status
+
+
+def fetch_image(url, timeout=10, max_bytes=10 * 1024 * 1024):
+    """Default fetcher: ``url`` -> (bytes, content type). No redirects, so an
+    allowed host can't bounce us somewhere else."""
+    with requests.get(url, timeout=timeout, stream=True, allow_redirects=False) as resp:
+        if resp.status_code != 200:
+            raise ImageError(f"upstream {resp.status_code} for image")
+        content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in RASTER_TYPES:
+            raise ImageError(f"upstream sent {content_type or 'no content type'}, not a raster image")
+        chunks, total = [], 0
+        for chunk in resp.iter_content(64 * 1024):
+            total += len(chunk)
+            if total > max_bytes:
+                raise ImageError("image too large")
+            chunks.append(chunk)
+    return b"".join(chunks), content_type
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class ImageCache:
+    def __init__(self, root, max_bytes=256 * 1024 * 1024, allowed_hosts=(), fetcher=fetch_image):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.allowed_hosts = {h.lower() for h in allowed_hosts}
+        self.fetcher = fetcher
+        self._locks = [threading.Lock() for _ in range(64)]
+        self._evict_lock = threading.Lock()
+        self._bytes = sum(size for _path, size, _mtime in self._entries())
+
+    # -------- paths --------
+    def _index_path(self, url):
+        return os.path.join(self.root, "urls", _sha256(url.encode("utf-8")))
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def _thumb_path(self, digest, size):
+        return os.path.join(self.root, "thumbs", digest[:2], f"{digest}-{size}")
+
+    def check_url(self, url):
+        """The canonical form of ``url`` (lowercase host, no query or fragment);
+        raises ImageError(400) for hosts that aren't allowed."""
+        parts = urlsplit(url or "")
+        host = (parts.hostname or "").lower()
+        if parts.scheme not in ("http", "https") or host not in self.allowed_hosts:
+            raise ImageError("image host not allowed", status=400)
+        port = f":{parts.port}" if parts.port else ""
+        return f"{parts.scheme}://{host}{port}{parts.path or '/'}"
+
+    # -------- lookup --------
+    def get(self, url, size=None):
+        """The cached original (``size`` None) or thumbnail for ``url``,
+        fetching and resizing on first use."""
+        url = self.check_url(url)
+        if size is not None and size not in SIZES:
+            raise ImageError(f"unknown size {size!r}", status=400)
+        index = self._index_path(url)
+        with self._locks[hash(url) % len(self._locks)]:
+            image = self._get(url, index, size)
+        self._evict_if_needed(keep=image.path)
+        return image
+
+    def _get(self, url, index, size):
+        entry = self._read_index(index)
+        if entry is not None:
+            _touch(index)
+        thumbnail = size is not None and Image is not None
+        if thumbnail and entry is not None and os.path.exists(self._thumb_path(entry[0], size)):
+            return self._thumbnail(entry[0], entry[1], size)
+        if entry is None or not os.path.exists(self._object_path(entry[0])):
+            entry = self._fetch(url, index)
+        digest, content_type = entry
+        if not thumbnail:
+            path = self._object_path(digest)
+            _touch(path)
+            return CachedImage(path, content_type, digest[:32])
+        return self._thumbnail(digest, content_type, size)
+
+    def _read_index(self, index):
+        try:
+            with open(index, encoding="ascii") as f:
+                digest, content_type = f.read().split(" ", 1)
+        except (OSError, ValueError):
+            return None
+        return digest, content_type
+
+    def _fetch(self, url, index):
+        try:
+            data, content_type = self.fetcher(url)
+        except ImageError:
+            raise
+        except Exception as e:
+            raise ImageError(f"image fetch failed: {e}") from e
+        content_type = (content_type or "").lower()
+        if content_type not in RASTER_TYPES:
+            raise ImageError(f"upstream sent {content_type or 'no content type'}, not a raster image")
+        digest = _sha256(data)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+            self._grew(len(data))
+        entry = f"{digest} {content_type}".encode("ascii")
+        existed = os.path.exists(index)
+        _write_atomic(index, entry)
+        if not existed:
+            self._grew(len(entry))
+        return digest, content_type
+
+    def _thumbnail(self, digest, content_type, size):
+        path = self._thumb_path(digest, size)
+        etag = f"{digest[:32]}-{size}"
+        if os.path.exists(path):
+            _touch(path)
+            return CachedImage(path, self._thumb_type(path), etag)
+        with open(self._object_path(digest), "rb") as f:
+            original = f.read()
+        try:
+            img = Image.open(io.BytesIO(original))
+            img.thumbnail(SIZES[size])
+            out = io.BytesIO()
+            if img.mode in ("RGBA", "LA", "P"):
+                img.save(out, "PNG", optimize=True)
+            else:
+                img.convert("RGB").save(out, "JPEG", quality=82, optimize=True)
+        except Exception:
+            # not something Pillow can read; serve it unresized
+            log.warning("could not resize image %s", digest, exc_info=True)
+            return CachedImage(self._object_path(digest), content_type, digest[:32])
+        data = out.getvalue()
+        _write_atomic(path, data)
+        self._grew(len(data))
+        return CachedImage(path, self._thumb_type(path), etag)
+
+    @staticmethod
+    def _thumb_type(path):
+        with open(path, "rb") as f:
+            return "image/png" if f.read(8) == b"\x89PNG\r\n\x1a\n" else "image/jpeg"
+
+    # -------- eviction --------
+    def _entries(self):
+        for sub in ("urls", "objects", "thumbs"):
+            for dirpath, _dirs, files in os.walk(os.path.join(self.root, sub)):
+                for name in files:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _grew(self, n):
+        with self._evict_lock:
+            self._bytes += n
+
+    def _evict_if_needed(self, keep):
+        with self._evict_lock:
+            if self._bytes <= self.max_bytes:
+                return
+            # rescan so other workers' writes count too
+            entries = sorted(self._entries(), key=lambda e: e[2])
+            total = sum(size for _path, size, _mtime in entries)
+            target = int(self.max_bytes * 0.9)
+            for path, size, _mtime in entries:
+                if total <= target:
+                    break
+                if path == keep:  # about to be sent
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+            self._bytes = total
+
+    def stats(self):
+        with self._evict_lock:
+            return {"bytes": self._bytes, "max_bytes": self.max_bytes, "thumbnails": Image is not None}
@@ -0,0 +1,292 @@
+# server/ingredients.py
+"""Ingredient line helpers shared by shopping list generation."""
+import hashlib
+import json
+import re
+from collections import namedtuple
+from fractions import Fraction
+from functools import lru_cache
+
+# Imperative verbs only count as the first word of the line ("Stir in the
+# sugar"), so names such as "cake mix", "bacon grease" or "cooked rice" survive.
+_VERBS = [
+    "preheat", "bake", "mix", "stir", "combine", "roll", "cut", "arrange", "place",
+    "serve", "cool", "heat", "cook", "simmer", "bring", "whisk", "beat", "drain",
+    "transfer", "cover", "uncover", "reduce", "increase", "fold", "sprinkle",
+    "spoon", "pour", "garnish", "press", "line", "grease", "divide",
+]
+# Words/phrases that mark a cooking step wherever they appear. Matched on word
+# boundaries: "pan" no longer hits "panko", nor "line" "gasoline".
+_CONTEXT = [
+    "set aside", "until", "degrees?", "oven", "minutes?", "pans?", "saucepans?",
+    "skillets?", "bowls?", "baking sheets?", "sheet pans?", "baking dish(?:es)?",
+]
+
+_INSTRUCTION_RE = re.compile(
+    r"^[\s\-\*\u2022]*(?:%s)\b|\b(?:%s)\b" % ("|".join(_VERBS), "|".join(_CONTEXT)),
+    re.IGNORECASE | re.MULTILINE,
+)
+_JUNK = frozenset({"serving", "servings"})
+MAX_LINE = 120
+
+
+def _prefilter(t):
+    """Cheap checks that don't need the regex; None means 'ask the regex'."""
+    if not t:
+        return True
+    # very long lines tend to be sentences/instructions
+    if len(t) > MAX_LINE:
+        return True
+    # sentence punctuation is a strong hint
+    if "." in t:
+        return True
+    # junky names we definitely don't want as items
+    if t.lower() in _JUNK:
+        return True
+    return None
+
+
+def is_instruction_like(text: str) -> bool:
+    t = text.strip() if text else ""
+    verdict = _prefilter(t)
+    if verdict is not None:
+        return verdict
+    return _INSTRUCTION_RE.search(t) is not None
+
+
+def classify_lines(lines):
+    """Batch form of is_instruction_like, returning a list of booleans aligned
+    with ``lines``. Lookups are hoisted out of the loop, which matters when a
+    whole week's ingredient lines are classified at once."""
+    search = _INSTRUCTION_RE.search
+    junk = _JUNK
+    result = []
+    append = result.append
+    for line in lines:
+        t = line.strip() if line else ""
+        if not t or len(t) > MAX_LINE or "." in t or t.lower() in junk:
+            append(True)
+        else:
+            append(search(t) is not None)
+    return result
+
+
+def clean_name(name: str) -> str:
+    if not isinstance(name, str):
+        return ""
+    n = name.strip()
+    # strip bullets like '-', '*', '•'
+    n = re.sub(r'^[\-\*\u2022]\s*', "", n)
+    # collapse whitespace
+    n = re.sub(r'\s+', " ", n)
+    return n
+
+
+# ---- quantities ----
+
+Quantity = namedtuple("Quantity", "amount unit family")
+
+# alias -> (canonical unit, family, factor to the family's base unit)
+_UNITS = {}
+for _canonical, _family, _factor, _aliases in [
+    ("tsp", "volume", 4.92892, ["t", "tsp", "tsps", "teaspoon", "teaspoons"]),
+    ("tbsp", "volume", 14.7868, ["T", "tbs", "tbsp", "tbsps", "tablespoon", "tablespoons"]),
+    ("fl oz", "volume", 29.5735, ["fl oz", "fl. oz", "fluid ounce", "fluid ounces"]),
+    ("cup", "volume", 236.588, ["c", "cup", "cups"]),
+    ("pint", "volume", 473.176, ["pt", "pint", "pints"]),
+    ("quart", "volume", 946.353, ["qt", "quart", "quarts"]),
+    ("gallon", "volume", 3785.41, ["gal", "gallon", "gallons"]),
+    ("ml", "volume", 1.0, ["ml", "milliliter", "milliliters", "millilitre", "millilitres"]),
+    ("cl", "volume", 10.0, ["cl", "centiliter", "centiliters"]),
+    ("dl", "volume", 100.0, ["dl", "deciliter", "deciliters"]),
+    ("l", "volume", 1000.0, ["l", "liter", "liters", "litre", "litres"]),
+    ("mg", "mass", 0.001, ["mg", "milligram", "milligrams"]),
+    ("g", "mass", 1.0, ["g", "gr", "gram", "grams", "gramme", "grammes"]),
+    ("kg", "mass", 1000.0, ["kg", "kgs", "kilogram", "kilograms"]),
+    ("oz", "mass", 28.3495, ["oz", "ounce", "ounces"]),
+    ("lb", "mass", 453.592, ["lb", "lbs", "pound", "pounds"]),
+]:
+    for _alias in _aliases:
+        _UNITS[_alias] = (_canonical, _family, _factor)
+
+# units that only add up with themselves ("2 cloves" + "1 clove")
+_COUNT_UNITS = {
+    "clove": ["clove", "cloves"], "can": ["can", "cans"], "slice": ["slice", "slices"],
+    "stick": ["stick", "sticks"], "pinch": ["pinch", "pinches"], "dash": ["dash", "dashes"],
+    "bunch": ["bunch", "bunches"], "sprig": ["sprig", "sprigs"], "head": ["head", "heads"],
+    "package": ["package", "packages", "pkg"], "piece": ["piece", "pieces"],
+}
+for _canonical, _aliases in _COUNT_UNITS.items():
+    for _alias in _aliases:
+        _UNITS[_alias] = (_canonical, "count:" + _canonical, 1.0)
+
+_UNICODE_FRACTIONS = {
+    "½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅕": "1/5",
+    "⅖": "2/5", "⅗": "3/5", "⅘": "4/5", "⅙": "1/6", "⅚": "5/6", "⅛": "1/8",
+    "⅜": "3/8", "⅝": "5/8", "⅞": "7/8",
+}
+_UNICODE_FRACTION_RE = re.compile("(\\d)?([%s])" % "".join(_UNICODE_FRACTIONS))
+_AMOUNT = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d*\.\d+|\d+)"
+_UNIT_ALIASES = sorted(_UNITS, key=len, reverse=True)
+_QUANTITY_RE = re.compile(
+    r"^\s*(?P<low>%s)(?:\s*(?:-|to)\s*(?P<high>%s))?\s*(?P<unit>(?:%s)\b\.?)?"
+    % (_AMOUNT, _AMOUNT, "|".join(re.escape(a) for a in _UNIT_ALIASES)),
+    re.IGNORECASE,
+)
+
+
+def _to_number(text):
+    parts = text.split()
+    return float(sum(Fraction(p) for p in parts))
+
+
+def _lookup_unit(token):
+    token = token.rstrip(".")
+    # "T" (tablespoon) and "t" (teaspoon) are the only case-sensitive aliases
+    return _UNITS.get(token) or _UNITS.get(token.lower())
+
+
+@lru_cache(maxsize=4096)
+def parse_quantity(text):
+    """Parse the leading amount/unit of a quantity string.
+
+    "1 1/2 cups flour" -> Quantity(1.5, "cup", "volume"); "2-3 cloves" ->
+    Quantity(3.0, "clove", "count:clove") (ranges take the upper bound);
+    "2 eggs" -> Quantity(2.0, None, "count"). Returns None when there is no
+    leading number. Results are cached per distinct string.
+    """
+    if not text:
+        return None
+    t = _UNICODE_FRACTION_RE.sub(
+        lambda m: (m.group(1) + " " if m.group(1) else "") + _UNICODE_FRACTIONS[m.group(2)], text
+    ).replace("\u2013", "-").replace("\u2014", "-")
+    m = _QUANTITY_RE.match(t)
+    if not m:
+        return None
+    try:
+        amount = _to_number(m.group("high") or m.group("low"))
+    except (ValueError, ZeroDivisionError):
+        return None
+    unit = m.group("unit") and _lookup_unit(m.group("unit"))
+    if not unit:
+        # no unit, or one that only matched case-insensitively through a
+        # folding character (IGNORECASE maps "ſ" to "s"): count it unitless
+        return Quantity(amount, None, "count")
+    canonical, family, _ = unit
+    return Quantity(amount, canonical, family)
+
+
+def _format_amount(amount):
+    whole = int(amount)
+    eighths = round((amount - whole) * 8)
+    if abs(amount - (whole + eighths / 8)) < 0.01:
+        if eighths == 8:
+            return str(whole + 1)
+        frac = Fraction(eighths, 8)
+        if not frac:
+            return str(whole)
+        return f"{whole} {frac}" if whole else str(frac)
+    return f"{amount:.2f}".rstrip("0").rstrip(".")
+
+
+_PLURAL = {"cup", "pint", "quart", "gallon"} | set(_COUNT_UNITS)
+
+
+def format_quantity(amount, unit):
+    text = _format_amount(amount)
+    if not unit:
+        return text
+    if unit in _PLURAL and amount > 1:
+        unit = unit + ("es" if unit.endswith(("ch", "sh")) else "s")
+    return f"{text} {unit}"
+
+
+def _unit_factor(unit):
+    return _UNITS[unit][2] if unit else 1.0
+
+
+MAX_FIELD = 255
+
+
+def normalize_ingredients(raw_items):
+    """Turn raw [{name, quantity}] into rows ready for meal_item_ingredients.
+
+    Names are cleaned and instruction-like lines dropped, serving counts are
+    blanked, and each quantity is parsed once so shopping generation can sum
+    ``base_amount`` (ml, g or a count) in SQL.
+    """
+    raw_items = [it for it in raw_items or [] if isinstance(it, dict)]
+    names = [clean_name(it.get("name") or "") for it in raw_items]
+    rows = []
+    for it, name, skip in zip(raw_items, names, classify_lines(names)):
+        if not name or skip:
+            continue
+        qty = (it.get("quantity") or "").strip()
+        # also drop 'servings' in quantity; it's usually noise for shopping lists
+        if "serving" in qty.lower():
+            qty = ""
+        name, qty = name[:MAX_FIELD], qty[:MAX_FIELD]
+        parsed = parse_quantity(qty) if qty else None
+        rows.append({
+            "position": len(rows),
+            "name": name,
+            "name_key": name.lower(),
+            "quantity": qty,
+            "base_amount": parsed.amount * _unit_factor(parsed.unit) if parsed else None,
+            "unit": parsed.unit if parsed else None,
+            "family": parsed.family if parsed else None,
+        })
+    return rows
+
+
+def recipe_lines(text):
+    """Local recipes keep ingredients as free text, one per line."""
+    return [{"name": line.strip(), "quantity": ""} for line in (text or "").splitlines() if line.strip()]
+
+
+def summarize_groups(groups):
+    """Build shopping entries from pre-aggregated ingredient groups.
+
+    ``groups`` are rows of (name_key, name, family, unit, quantity, total,
+    count, first_id) as produced by GROUP BY name_key, family, unit and (for
+    unparsed rows) quantity. One occurrence keeps its original text; otherwise
+    parsed amounts are summed within a unit family (volume, mass, or the same
+    count unit) and shown in the unit seen first, and unparsed text is listed
+    once.
+    """
+    by_key = {}
+    for g in sorted(groups, key=lambda g: g.first_id):
+        entry = by_key.setdefault(g.name_key, {"name": g.name, "families": {}, "loose": [], "count": 0, "only": ""})
+        if not g.quantity:
+            continue
+        entry["count"] += g.count
+        entry["only"] = g.quantity
+        if g.family is None:
+            entry["loose"].append(g.quantity)
+            continue
+        fam = entry["families"].setdefault(g.family, [0.0, g.unit])
+        fam[0] += g.total or 0.0
+
+    result = {}
+    for key, entry in by_key.items():
+        if entry["count"] <= 1:
+            quantity = entry["only"] if entry["count"] else ""
+        else:
+            parts = [format_quantity(base / _unit_factor(unit), unit) for base, unit in entry["families"].values()]
+            quantity = " + ".join(parts + entry["loose"])
+        result[key] = {"name": entry["name"], "quantity": quantity[:MAX_FIELD]}
+    return result
+
+
+def canonical_snapshot(raw_items):
+    """Reduce raw ingredients to the [{name, quantity}] list that gets stored."""
+    return [
+        {"name": (it.get("name") or "").strip(), "quantity": (it.get("quantity") or "").strip()}
+        for it in raw_items or [] if isinstance(it, dict)
+    ]
+
+
+def snapshot_hash(items):
+    """Content address of a canonical snapshot list."""
+    payload = json.dumps(items, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
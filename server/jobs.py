@@ -0,0 +1,55 @@
+# server/jobs.py
+"""Tiny in-process background job runner (thread pool + app context)."""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class JobRunner:
+    def __init__(self, app=None):
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.RLock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get("JOB_WORKERS", 4),
+            thread_name_prefix="jobs",
+        )
+        app.extensions["jobs"] = self
+
+    def submit(self, app, fn, *args, key=None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` inside an app context on the pool.
+
+        Jobs submitted with a ``key`` are de-duplicated: while one is queued or
+        running, submitting the same key returns the existing future.
+        """
+        def run():
+            from .extensions import db
+            with app.app_context():
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    db.session.remove()
+
+        with self._lock:
+            if key is not None and key in self._futures:
+                return self._futures[key]
+            future = self._executor.submit(run)
+            if key is not None:
+                self._futures[key] = future
+                future.add_done_callback(lambda _f: self._forget(key, _f))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def wait_for(self, keys, timeout=None):
+        """Block until the jobs for ``keys`` (if any are running) finish."""
+        with self._lock:
+            futures = [self._futures[k] for k in keys if k in self._futures]
+        if futures:
+            wait(futures, timeout=timeout)
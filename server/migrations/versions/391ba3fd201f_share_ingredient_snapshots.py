@@ -0,0 +1,174 @@
+"""share ingredient snapshots across meal items (content-addressed)
+
+Revision ID: 391ba3fd201f
+Revises: 5d2ef8e2fa77
+Create Date: 2026-10-18 15:02:11.482760
+
+"""
+import hashlib
+import json
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '391ba3fd201f'
+down_revision = '5d2ef8e2fa77'
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger('alembic.runtime.migration')
+
+
+# frozen copies of the server.ingredients helpers this revision used; the
+# normalized rows themselves are copied from meal_item_ingredients
+def recipe_lines(text):
+    return [{"name": line.strip(), "quantity": ""} for line in (text or "").splitlines() if line.strip()]
+
+
+def canonical_snapshot(raw_items):
+    return [
+        {"name": (it.get("name") or "").strip(), "quantity": (it.get("quantity") or "").strip()}
+        for it in raw_items or [] if isinstance(it, dict)
+    ]
+
+
+def snapshot_hash(items):
+    payload = json.dumps(items, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+ROW_COLUMNS = ('position', 'name', 'name_key', 'quantity', 'base_amount', 'unit', 'family')
+
+
+def _row_columns():
+    return [
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('name_key', sa.String(length=255), nullable=False),
+        sa.Column('quantity', sa.String(length=255), nullable=True),
+        sa.Column('base_amount', sa.Float(), nullable=True),
+        sa.Column('unit', sa.String(length=20), nullable=True),
+        sa.Column('family', sa.String(length=30), nullable=True),
+    ]
+
+
+def upgrade():
+    op.create_table('ingredient_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('ingredients', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_hash')
+    )
+    op.create_table('snapshot_ingredients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('snapshot_id', sa.Integer(), nullable=False),
+    *_row_columns(),
+    sa.ForeignKeyConstraint(['snapshot_id'], ['ingredient_snapshots.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_snapshot_ingredients_snapshot_id', 'snapshot_ingredients', ['snapshot_id'], unique=False)
+    with op.batch_alter_table('meal_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('snapshot_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_meal_items_snapshot_id', ['snapshot_id'], unique=False)
+        batch_op.create_foreign_key('fk_meal_items_snapshot_id', 'ingredient_snapshots', ['snapshot_id'], ['id'])
+
+    # backfill: one snapshot per distinct ingredient list
+    bind = op.get_bind()
+    snapshots = sa.table('ingredient_snapshots',
+        sa.column('id', sa.Integer), sa.column('content_hash', sa.String), sa.column('ingredients', sa.Text))
+    meal_items = sa.table('meal_items', sa.column('id', sa.Integer), sa.column('snapshot_id', sa.Integer),
+        sa.column('snapshot_status', sa.String))
+
+    items = bind.execute(sa.text(
+        "SELECT mi.id, mi.external_id, mi.ingredient_snapshot, r.ingredients "
+        "FROM meal_items mi LEFT JOIN recipes r ON r.id = mi.recipe_id"
+    )).fetchall()
+    ids_by_hash, links, broken = {}, [], []
+    for meal_item_id, external_id, snapshot, recipe_text in items:
+        if external_id:
+            if not snapshot:
+                continue  # still pending / never fetched
+            try:
+                raw = json.loads(snapshot)
+            except ValueError:
+                broken.append({"item_id": meal_item_id})
+                continue
+        elif recipe_text is not None:
+            raw = recipe_lines(recipe_text)
+        else:
+            continue
+        canonical = canonical_snapshot(raw)
+        digest = snapshot_hash(canonical)
+        if digest not in ids_by_hash:
+            ids_by_hash[digest] = bind.execute(
+                snapshots.insert().values(content_hash=digest, ingredients=json.dumps(canonical))
+                .returning(snapshots.c.id)
+            ).scalar_one()
+        links.append({"item_id": meal_item_id, "new_snapshot_id": ids_by_hash[digest]})
+    # executemany, 1000 rows per round trip
+    link = (
+        meal_items.update().where(meal_items.c.id == sa.bindparam('item_id'))
+        .values(snapshot_id=sa.bindparam('new_snapshot_id'))
+    )
+    for start in range(0, len(links), 1000):
+        bind.execute(link, links[start:start + 1000])
+    if broken:
+        # unreadable snapshot JSON: mark for a refetch rather than leaving the item empty
+        log.warning("%d meal items had invalid ingredient snapshots; marked failed: %s",
+                    len(broken), ", ".join(str(b["item_id"]) for b in broken))
+        bind.execute(
+            meal_items.update().where(meal_items.c.id == sa.bindparam('item_id')).values(snapshot_status='failed'),
+            broken,
+        )
+
+    # the normalized rows already exist per meal item; copy those of the first
+    # item of each snapshot (the reverse of downgrade)
+    cols = ", ".join(ROW_COLUMNS)
+    op.execute(
+        f"INSERT INTO snapshot_ingredients (snapshot_id, {cols}) "
+        f"SELECT mi.snapshot_id, {', '.join('mii.' + c for c in ROW_COLUMNS)} "
+        "FROM meal_item_ingredients mii JOIN meal_items mi ON mi.id = mii.meal_item_id "
+        "WHERE mi.id = (SELECT min(m2.id) FROM meal_items m2 WHERE m2.snapshot_id = mi.snapshot_id)"
+    )
+
+    op.drop_index('ix_meal_item_ingredients_meal_item_id', table_name='meal_item_ingredients')
+    op.drop_table('meal_item_ingredients')
+    with op.batch_alter_table('meal_items', schema=None) as batch_op:
+        batch_op.drop_column('ingredient_snapshot')
+
+
+def downgrade():
+    with op.batch_alter_table('meal_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ingredient_snapshot', sa.Text(), nullable=True))
+    op.create_table('meal_item_ingredients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('meal_item_id', sa.Integer(), nullable=False),
+    *_row_columns(),
+    sa.ForeignKeyConstraint(['meal_item_id'], ['meal_items.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_meal_item_ingredients_meal_item_id', 'meal_item_ingredients', ['meal_item_id'], unique=False)
+
+    cols = ", ".join(ROW_COLUMNS)
+    op.execute(
+        f"INSERT INTO meal_item_ingredients (meal_item_id, {cols}) "
+        f"SELECT mi.id, {', '.join('si.' + c for c in ROW_COLUMNS)} "
+        "FROM meal_items mi JOIN snapshot_ingredients si ON si.snapshot_id = mi.snapshot_id"
+    )
+    op.execute(
+        "UPDATE meal_items SET ingredient_snapshot = "
+        "(SELECT s.ingredients FROM ingredient_snapshots s WHERE s.id = meal_items.snapshot_id) "
+        "WHERE external_id IS NOT NULL"
+    )
+
+    with op.batch_alter_table('meal_items', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_meal_items_snapshot_id', type_='foreignkey')
+        batch_op.drop_index('ix_meal_items_snapshot_id')
+        batch_op.drop_column('snapshot_id')
+    op.drop_index('ix_snapshot_ingredients_snapshot_id', table_name='snapshot_ingredients')
+    op.drop_table('snapshot_ingredients')
+    op.drop_table('ingredient_snapshots')
@@ -0,0 +1,54 @@
+"""add full-text search over the external recipe catalog
+
+Revision ID: 4b6e0f2d9c71
+Revises: e91b7d3c5a20
+Create Date: 2026-10-18 19:24:40.201733
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4b6e0f2d9c71'
+down_revision = 'e91b7d3c5a20'
+branch_labels = None
+depends_on = None
+
+
+# frozen copies of server.search's builders at the time
+UPGRADE = {
+    'postgresql': [
+        "ALTER TABLE external_recipes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', coalesce(ingredients, '')), 'B')) STORED",
+        'CREATE INDEX ix_external_recipes_search_vector ON external_recipes USING gin (search_vector)',
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS external_recipes_fts USING fts5(title, ingredients, content='external_recipes', content_rowid='id', tokenize='porter unicode61')",
+        'CREATE TRIGGER IF NOT EXISTS external_recipes_fts_ai AFTER INSERT ON external_recipes BEGIN INSERT INTO external_recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, new.ingredients); END',
+        "CREATE TRIGGER IF NOT EXISTS external_recipes_fts_ad AFTER DELETE ON external_recipes BEGIN INSERT INTO external_recipes_fts(external_recipes_fts, rowid, title, ingredients) VALUES ('delete', old.id, old.title, old.ingredients); END",
+        "CREATE TRIGGER IF NOT EXISTS external_recipes_fts_au AFTER UPDATE OF title, ingredients ON external_recipes BEGIN INSERT INTO external_recipes_fts(external_recipes_fts, rowid, title, ingredients) VALUES ('delete', old.id, old.title, old.ingredients); INSERT INTO external_recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, new.ingredients); END",
+        "INSERT INTO external_recipes_fts(external_recipes_fts) VALUES ('rebuild')",
+    ],
+}
+
+DOWNGRADE = {
+    'postgresql': [
+        'DROP INDEX IF EXISTS ix_external_recipes_search_vector',
+        'ALTER TABLE external_recipes DROP COLUMN IF EXISTS search_vector',
+    ],
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS external_recipes_fts_au',
+        'DROP TRIGGER IF EXISTS external_recipes_fts_ad',
+        'DROP TRIGGER IF EXISTS external_recipes_fts_ai',
+        'DROP TABLE IF EXISTS external_recipes_fts',
+    ],
+}
+
+
+def upgrade():
+    for stmt in UPGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(stmt)
+
+
+def downgrade():
+    for stmt in DOWNGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(stmt)
@@ -0,0 +1,184 @@
+"""add meal_item_ingredients (normalized snapshot rows)
+
+Revision ID: 5d2ef8e2fa77
+Revises: e3e9c5987b38
+Create Date: 2026-10-18 13:40:52.906113
+
+"""
+import json
+import re
+from fractions import Fraction
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2ef8e2fa77'
+down_revision = 'e3e9c5987b38'
+branch_labels = None
+depends_on = None
+
+
+# ---- frozen copy of server.ingredients as of this revision ----
+# The backfill must keep producing the rows this schema was written for, so it
+# doesn't import the app's normalizer (which may change later).
+_VERBS = [
+    "preheat", "bake", "mix", "stir", "combine", "roll", "cut", "arrange", "place",
+    "serve", "cool", "heat", "cook", "simmer", "bring", "whisk", "beat", "drain",
+    "transfer", "cover", "uncover", "reduce", "increase", "fold", "sprinkle",
+    "spoon", "pour", "garnish", "press", "line", "grease", "divide",
+]
+_CONTEXT = [
+    "set aside", "until", "degrees?", "oven", "minutes?", "pans?", "saucepans?",
+    "skillets?", "bowls?", "baking sheets?", "sheet pans?", "baking dish(?:es)?",
+]
+_INSTRUCTION_RE = re.compile(
+    r"^[\s\-\*•]*(?:%s)\b|\b(?:%s)\b" % ("|".join(_VERBS), "|".join(_CONTEXT)),
+    re.IGNORECASE | re.MULTILINE,
+)
+MAX_LINE = 120
+MAX_FIELD = 255
+
+# alias -> (canonical unit, family, factor to the family's base unit)
+_UNITS = {}
+for _canonical, _family, _factor, _aliases in [
+    ("tsp", "volume", 4.92892, ["t", "tsp", "tsps", "teaspoon", "teaspoons"]),
+    ("tbsp", "volume", 14.7868, ["T", "tbs", "tbsp", "tbsps", "tablespoon", "tablespoons"]),
+    ("fl oz", "volume", 29.5735, ["fl oz", "fl. oz", "fluid ounce", "fluid ounces"]),
+    ("cup", "volume", 236.588, ["c", "cup", "cups"]),
+    ("pint", "volume", 473.176, ["pt", "pint", "pints"]),
+    ("quart", "volume", 946.353, ["qt", "quart", "quarts"]),
+    ("gallon", "volume", 3785.41, ["gal", "gallon", "gallons"]),
+    ("ml", "volume", 1.0, ["ml", "milliliter", "milliliters", "millilitre", "millilitres"]),
+    ("cl", "volume", 10.0, ["cl", "centiliter", "centiliters"]),
+    ("dl", "volume", 100.0, ["dl", "deciliter", "deciliters"]),
+    ("l", "volume", 1000.0, ["l", "liter", "liters", "litre", "litres"]),
+    ("mg", "mass", 0.001, ["mg", "milligram", "milligrams"]),
+    ("g", "mass", 1.0, ["g", "gr", "gram", "grams", "gramme", "grammes"]),
+    ("kg", "mass", 1000.0, ["kg", "kgs", "kilogram", "kilograms"]),
+    ("oz", "mass", 28.3495, ["oz", "ounce", "ounces"]),
+    ("lb", "mass", 453.592, ["lb", "lbs", "pound", "pounds"]),
+]:
+    for _alias in _aliases:
+        _UNITS[_alias] = (_canonical, _family, _factor)
+for _canonical, _aliases in {
+    "clove": ["clove", "cloves"], "can": ["can", "cans"], "slice": ["slice", "slices"],
+    "stick": ["stick", "sticks"], "pinch": ["pinch", "pinches"], "dash": ["dash", "dashes"],
+    "bunch": ["bunch", "bunches"], "sprig": ["sprig", "sprigs"], "head": ["head", "heads"],
+    "package": ["package", "packages", "pkg"], "piece": ["piece", "pieces"],
+}.items():
+    for _alias in _aliases:
+        _UNITS[_alias] = (_canonical, "count:" + _canonical, 1.0)
+
+_UNICODE_FRACTIONS = {
+    "½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅕": "1/5",
+    "⅖": "2/5", "⅗": "3/5", "⅘": "4/5", "⅙": "1/6", "⅚": "5/6", "⅛": "1/8",
+    "⅜": "3/8", "⅝": "5/8", "⅞": "7/8",
+}
+_UNICODE_FRACTION_RE = re.compile("(\\d)?([%s])" % "".join(_UNICODE_FRACTIONS))
+_AMOUNT = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d*\.\d+|\d+)"
+_QUANTITY_RE = re.compile(
+    r"^\s*(?P<low>%s)(?:\s*(?:-|to)\s*(?P<high>%s))?\s*(?P<unit>(?:%s)\b\.?)?"
+    % (_AMOUNT, _AMOUNT, "|".join(re.escape(a) for a in sorted(_UNITS, key=len, reverse=True))),
+    re.IGNORECASE,
+)
+
+
+def _is_instruction(t):
+    if not t or len(t) > MAX_LINE or "." in t or t.lower() in ("serving", "servings"):
+        return True
+    return _INSTRUCTION_RE.search(t) is not None
+
+
+def _parse_quantity(text):
+    """(base amount, unit, family) of a quantity string, or None."""
+    t = _UNICODE_FRACTION_RE.sub(
+        lambda m: (m.group(1) + " " if m.group(1) else "") + _UNICODE_FRACTIONS[m.group(2)], text
+    ).replace("–", "-").replace("—", "-")
+    m = _QUANTITY_RE.match(t)
+    if not m:
+        return None
+    try:
+        amount = float(sum(Fraction(p) for p in (m.group("high") or m.group("low")).split()))
+    except (ValueError, ZeroDivisionError):
+        return None
+    token = (m.group("unit") or "").rstrip(".")
+    found = token and (_UNITS.get(token) or _UNITS.get(token.lower()))
+    if not found:
+        return amount, None, "count"
+    unit, family, factor = found
+    return amount * factor, unit, family
+
+
+def normalize_ingredients(raw_items):
+    rows = []
+    for it in raw_items or []:
+        if not isinstance(it, dict):
+            continue
+        name = it.get("name") or ""
+        name = re.sub(r"\s+", " ", re.sub(r"^[\-\*•]\s*", "", name.strip())) if isinstance(name, str) else ""
+        if _is_instruction(name.strip()):
+            continue
+        qty = (it.get("quantity") or "").strip()
+        if "serving" in qty.lower():
+            qty = ""
+        name, qty = name[:MAX_FIELD], qty[:MAX_FIELD]
+        base_amount, unit, family = (_parse_quantity(qty) if qty else None) or (None, None, None)
+        rows.append({"position": len(rows), "name": name, "name_key": name.lower(), "quantity": qty,
+                     "base_amount": base_amount, "unit": unit, "family": family})
+    return rows
+
+
+def recipe_lines(text):
+    return [{"name": line.strip(), "quantity": ""} for line in (text or "").splitlines() if line.strip()]
+
+
+def upgrade():
+    op.create_table('meal_item_ingredients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('meal_item_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('name_key', sa.String(length=255), nullable=False),
+    sa.Column('quantity', sa.String(length=255), nullable=True),
+    sa.Column('base_amount', sa.Float(), nullable=True),
+    sa.Column('unit', sa.String(length=20), nullable=True),
+    sa.Column('family', sa.String(length=30), nullable=True),
+    sa.ForeignKeyConstraint(['meal_item_id'], ['meal_items.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_meal_item_ingredients_meal_item_id', 'meal_item_ingredients', ['meal_item_id'], unique=False)
+
+    # backfill from the JSON snapshots / local recipe text
+    bind = op.get_bind()
+    ingredients = sa.table('meal_item_ingredients',
+        sa.column('meal_item_id', sa.Integer), sa.column('position', sa.Integer),
+        sa.column('name', sa.String), sa.column('name_key', sa.String),
+        sa.column('quantity', sa.String), sa.column('base_amount', sa.Float),
+        sa.column('unit', sa.String), sa.column('family', sa.String),
+    )
+    result = bind.execute(sa.text(
+        "SELECT mi.id, mi.ingredient_snapshot, r.ingredients "
+        "FROM meal_items mi LEFT JOIN recipes r ON r.id = mi.recipe_id"
+    ))
+    batch = []
+    for meal_item_id, snapshot, recipe_text in result:
+        if snapshot:
+            try:
+                raw = json.loads(snapshot) or []
+            except ValueError:
+                raw = []
+        else:
+            raw = recipe_lines(recipe_text)
+        batch.extend(dict(row, meal_item_id=meal_item_id) for row in normalize_ingredients(raw))
+        if len(batch) >= 1000:
+            bind.execute(ingredients.insert(), batch)
+            batch = []
+    if batch:
+        bind.execute(ingredients.insert(), batch)
+
+
+def downgrade():
+    op.drop_index('ix_meal_item_ingredients_meal_item_id', table_name='meal_item_ingredients')
+    op.drop_table('meal_item_ingredients')
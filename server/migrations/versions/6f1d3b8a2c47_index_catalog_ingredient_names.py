@@ -0,0 +1,75 @@
+"""index only ingredient names in the catalog full-text search
+
+Revision ID: 6f1d3b8a2c47
+Revises: 4b6e0f2d9c71
+Create Date: 2026-10-18 22:41:07.318254
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6f1d3b8a2c47'
+down_revision = '4b6e0f2d9c71'
+branch_labels = None
+depends_on = None
+
+# the statements are frozen copies of server.search's builders
+DROP = {
+    'postgresql': [
+        'DROP INDEX IF EXISTS ix_external_recipes_search_vector',
+        'ALTER TABLE external_recipes DROP COLUMN IF EXISTS search_vector',
+    ],
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS external_recipes_fts_au',
+        'DROP TRIGGER IF EXISTS external_recipes_fts_ad',
+        'DROP TRIGGER IF EXISTS external_recipes_fts_ai',
+        'DROP TABLE IF EXISTS external_recipes_fts',
+    ],
+}
+
+# ingredients holds JSON [{name, quantity}]; indexing it whole made the keys match every row
+NAMES_ONLY = {
+    'postgresql': [
+        "ALTER TABLE external_recipes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', coalesce(jsonb_path_query_array(ingredients::jsonb, '$[*].name'), '[]')), 'B')) STORED",
+        'CREATE INDEX ix_external_recipes_search_vector ON external_recipes USING gin (search_vector)',
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS external_recipes_fts USING fts5(title, ingredients, content='', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS external_recipes_fts_ai AFTER INSERT ON external_recipes BEGIN INSERT INTO external_recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, (SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each(CASE WHEN json_valid(new.ingredients) THEN new.ingredients END) WHERE type = 'object')); END",
+        "CREATE TRIGGER IF NOT EXISTS external_recipes_fts_ad AFTER DELETE ON external_recipes BEGIN INSERT INTO external_recipes_fts(external_recipes_fts, rowid, title, ingredients) VALUES ('delete', old.id, old.title, (SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each(CASE WHEN json_valid(old.ingredients) THEN old.ingredients END) WHERE type = 'object')); END",
+        "CREATE TRIGGER IF NOT EXISTS external_recipes_fts_au AFTER UPDATE OF title, ingredients ON external_recipes BEGIN INSERT INTO external_recipes_fts(external_recipes_fts, rowid, title, ingredients) VALUES ('delete', old.id, old.title, (SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each(CASE WHEN json_valid(old.ingredients) THEN old.ingredients END) WHERE type = 'object')); INSERT INTO external_recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, (SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each(CASE WHEN json_valid(new.ingredients) THEN new.ingredients END) WHERE type = 'object')); END",
+        "INSERT INTO external_recipes_fts(external_recipes_fts) VALUES ('delete-all')",
+        "INSERT INTO external_recipes_fts(rowid, title, ingredients) SELECT t.id, t.title, (SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each(CASE WHEN json_valid(t.ingredients) THEN t.ingredients END) WHERE type = 'object') FROM external_recipes t",
+    ],
+}
+
+# as created by 4b6e0f2d9c71
+RAW_JSON = {
+    'postgresql': [
+        "ALTER TABLE external_recipes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', coalesce(ingredients, '')), 'B')) STORED",
+        'CREATE INDEX ix_external_recipes_search_vector ON external_recipes USING gin (search_vector)',
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS external_recipes_fts USING fts5(title, ingredients, content='external_recipes', content_rowid='id', tokenize='porter unicode61')",
+        'CREATE TRIGGER IF NOT EXISTS external_recipes_fts_ai AFTER INSERT ON external_recipes BEGIN INSERT INTO external_recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, new.ingredients); END',
+        "CREATE TRIGGER IF NOT EXISTS external_recipes_fts_ad AFTER DELETE ON external_recipes BEGIN INSERT INTO external_recipes_fts(external_recipes_fts, rowid, title, ingredients) VALUES ('delete', old.id, old.title, old.ingredients); END",
+        "CREATE TRIGGER IF NOT EXISTS external_recipes_fts_au AFTER UPDATE OF title, ingredients ON external_recipes BEGIN INSERT INTO external_recipes_fts(external_recipes_fts, rowid, title, ingredients) VALUES ('delete', old.id, old.title, old.ingredients); INSERT INTO external_recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, new.ingredients); END",
+        "INSERT INTO external_recipes_fts(external_recipes_fts) VALUES ('rebuild')",
+    ],
+}
+
+
+def _run(statements):
+    for stmt in statements.get(op.get_bind().dialect.name, []):
+        op.execute(stmt)
+
+
+def upgrade():
+    _run(DROP)
+    _run(NAMES_ONLY)
+
+
+def downgrade():
+    _run(DROP)
+    _run(RAW_JSON)
@@ -0,0 +1,32 @@
+"""cache external recipe details
+
+Revision ID: 80a985bffccb
+Revises: 2957f4186cc0
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '80a985bffccb'
+down_revision = '2957f4186cc0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('external_recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ingredients', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('instructions', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('source_url', sa.String(length=500), nullable=True))
+        batch_op.add_column(sa.Column('fetched_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('external_recipes', schema=None) as batch_op:
+        batch_op.drop_column('fetched_at')
+        batch_op.drop_column('source_url')
+        batch_op.drop_column('instructions')
+        batch_op.drop_column('ingredients')
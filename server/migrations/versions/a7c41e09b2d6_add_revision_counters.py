@@ -0,0 +1,30 @@
+"""add revision counters to recipes and meal_plans
+
+Revision ID: a7c41e09b2d6
+Revises: 391ba3fd201f
+Create Date: 2026-10-18 16:21:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c41e09b2d6'
+down_revision = '391ba3fd201f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), server_default='0', nullable=False))
+    with op.batch_alter_table('meal_plans', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('meal_plans', schema=None) as batch_op:
+        batch_op.drop_column('revision')
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_column('revision')
@@ -0,0 +1,34 @@
+"""add foreign-key / lookup indexes
+
+Revision ID: e3e9c5987b38
+Revises: f50aadb9fd5d
+Create Date: 2026-10-18 11:26:05.774310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3e9c5987b38'
+down_revision = 'f50aadb9fd5d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_recipes_user_id_id', 'recipes', ['user_id', sa.text('id DESC')], unique=False)
+    op.create_index('ix_meal_plans_user_id_week_start', 'meal_plans', ['user_id', sa.text('week_start DESC')], unique=False)
+    op.create_index('ix_meal_items_plan_day_meal_type', 'meal_items', ['meal_plan_id', 'day', 'meal_type'], unique=False)
+    op.create_index('ix_meal_items_provider_external_id', 'meal_items', ['external_provider', 'external_id'], unique=False)
+    op.create_index('ix_meal_items_recipe_id', 'meal_items', ['recipe_id'], unique=False)
+    op.create_index('ix_shopping_items_meal_plan_id', 'shopping_items', ['meal_plan_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_shopping_items_meal_plan_id', table_name='shopping_items')
+    op.drop_index('ix_meal_items_recipe_id', table_name='meal_items')
+    op.drop_index('ix_meal_items_provider_external_id', table_name='meal_items')
+    op.drop_index('ix_meal_items_plan_day_meal_type', table_name='meal_items')
+    op.drop_index('ix_meal_plans_user_id_week_start', table_name='meal_plans')
+    op.drop_index('ix_recipes_user_id_id', table_name='recipes')
@@ -0,0 +1,54 @@
+"""add full-text search over recipes (tsvector + GIN / FTS5)
+
+Revision ID: e91b7d3c5a20
+Revises: c2f8d61a4e53
+Create Date: 2026-10-18 18:12:03.554871
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91b7d3c5a20'
+down_revision = 'c2f8d61a4e53'
+branch_labels = None
+depends_on = None
+
+
+# frozen copies of server.search's builders at the time
+UPGRADE = {
+    'postgresql': [
+        "ALTER TABLE recipes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', coalesce(ingredients, '')), 'B')) STORED",
+        'CREATE INDEX ix_recipes_search_vector ON recipes USING gin (search_vector)',
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(title, ingredients, content='recipes', content_rowid='id', tokenize='porter unicode61')",
+        'CREATE TRIGGER IF NOT EXISTS recipes_fts_ai AFTER INSERT ON recipes BEGIN INSERT INTO recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, new.ingredients); END',
+        "CREATE TRIGGER IF NOT EXISTS recipes_fts_ad AFTER DELETE ON recipes BEGIN INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients) VALUES ('delete', old.id, old.title, old.ingredients); END",
+        "CREATE TRIGGER IF NOT EXISTS recipes_fts_au AFTER UPDATE OF title, ingredients ON recipes BEGIN INSERT INTO recipes_fts(recipes_fts, rowid, title, ingredients) VALUES ('delete', old.id, old.title, old.ingredients); INSERT INTO recipes_fts(rowid, title, ingredients) VALUES (new.id, new.title, new.ingredients); END",
+        "INSERT INTO recipes_fts(recipes_fts) VALUES ('rebuild')",
+    ],
+}
+
+DOWNGRADE = {
+    'postgresql': [
+        'DROP INDEX IF EXISTS ix_recipes_search_vector',
+        'ALTER TABLE recipes DROP COLUMN IF EXISTS search_vector',
+    ],
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS recipes_fts_au',
+        'DROP TRIGGER IF EXISTS recipes_fts_ad',
+        'DROP TRIGGER IF EXISTS recipes_fts_ai',
+        'DROP TABLE IF EXISTS recipes_fts',
+    ],
+}
+
+
+def upgrade():
+    for stmt in UPGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(stmt)
+
+
+def downgrade():
+    for stmt in DOWNGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(stmt)
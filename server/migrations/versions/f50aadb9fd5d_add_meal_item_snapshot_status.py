@@ -0,0 +1,26 @@
+"""add meal_items.snapshot_status
+
+Revision ID: f50aadb9fd5d
+Revises: 80a985bffccb
+Create Date: 2026-10-18 10:03:17.540921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f50aadb9fd5d'
+down_revision = '80a985bffccb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('meal_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('snapshot_status', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('meal_items', schema=None) as batch_op:
+        batch_op.drop_column('snapshot_status')
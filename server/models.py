@@ -1,3 +1,4 @@
+import json
 from .extensions import db, bcrypt
 
 
@@ -35,8 +36,19 @@ class Recipe(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     title = db.Column(db.String(200), nullable=False)
-    ingredients = db.Column(db.Text, nullable=False)
-    steps = db.Column(db.Text)
+    # the recipe body is only loaded on first access (or with
+    # undefer_group("body") on detail reads); lists use to_summary()
+    ingredients = db.deferred(db.Column(db.Text, nullable=False), group="body")
+    steps = db.deferred(db.Column(db.Text), group="body")
+    # bumped on every edit; GET /recipes ETags are derived from it
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    def to_summary(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "title": self.title,
+        }
 
     def to_dict(self):
         return {
@@ -48,26 +60,37 @@ class Recipe(db.Model):
         }
 
 
+# list_recipes: WHERE user_id = ? ORDER BY id DESC
+db.Index("ix_recipes_user_id_id", Recipe.user_id, Recipe.id.desc())
+
+
 class MealPlan(db.Model):
     __tablename__ = "meal_plans"
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     week_start = db.Column(db.Date, nullable=False)
+    # bumped by every write to the plan's items or shopping list (etags.bump_plans)
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     items = db.relationship("MealItem", backref="meal_plan", cascade="all, delete-orphan")
     shopping_items = db.relationship("ShoppingItem", backref="meal_plan", cascade="all, delete-orphan")
 
-    def to_dict(self, include_items=False, include_shopping=False):
+    def to_dict(self, include_items=False, include_shopping=False, fields=None):
         data = {
             "id": self.id,
             "user_id": self.user_id,
             "week_Start": self.week_start.isoformat()
         }
-        if include_items:
-            data["items"] = [items.to_dict() for items in self.items]
-        if include_shopping:
+        if include_items and (fields is None or "items" in fields):
+            item_fields = fields["items"] if fields else None
+            data["items"] = [items.to_dict(fields=item_fields) for items in self.items]
+        if include_shopping and (fields is None or "shopping_items" in fields):
             data["shopping_items"] = [shopping.to_dict() for shopping in self.shopping_items]
         return data
+
+
+# list_meal_plans: WHERE user_id = ? ORDER BY week_start DESC
+db.Index("ix_meal_plans_user_id_week_start", MealPlan.user_id, MealPlan.week_start.desc())
     
 
 class MealItem(db.Model):
@@ -82,12 +105,29 @@ class MealItem(db.Model):
     external_id = db.Column(db.String(100))
     external_title = db.Column(db.String(300))
     external_image = db.Column(db.String(500))
-    ingredient_snapshot = db.Column(db.Text)
+    # shared, content-addressed ingredient list (see snapshots.get_or_create_snapshot)
+    snapshot_id = db.Column(db.Integer, db.ForeignKey("ingredient_snapshots.id"), nullable=True, index=True)
+    snapshot = db.relationship("IngredientSnapshot")
+    # "pending" while a background job fetches the snapshot, then "ready" or
+    # "failed"; NULL for local recipes and rows created before async snapshots
+    snapshot_status = db.Column(db.String(20))
 
     day = db.Column(db.String(10), nullable=False)
     meal_type = db.Column(db.String(20), nullable=False)
 
-    def to_dict(self):
+    @property
+    def ingredient_snapshot(self):
+        """JSON list of {name, quantity} for external recipes."""
+        if self.external_id and self.snapshot is not None:
+            return self.snapshot.ingredients
+        return None
+
+    def to_dict(self, fields=None, detail=False):
+        """Summary by default: the nested recipe is ``Recipe.to_summary()`` and
+        the ingredient snapshot is left out. ``detail=True`` includes both in
+        full; a ``fields`` tree (serialization.parse_fields) can also select
+        ``ingredient_snapshot`` or drop ``recipe``."""
+        recipe = self.recipe
         data = {
             "id": self.id,
             "meal_plan_id": self.meal_plan_id,
@@ -96,16 +136,52 @@ class MealItem(db.Model):
             "external_id": self.external_id,
             "external_title": self.external_title,
             "external_image": self.external_image,
-            "ingredient_snapshot": self.ingredient_snapshot,
+            "snapshot_status": self.snapshot_status,
             "day": self.day,
             "meal_type": self.meal_type,
-            "recipe": self.recipe.to_dict() if self.recipe else None,
         }
-    
-        data["title"] = (self.recipe.title if self.recipe else self.external_title) or ""
-        data["image"] = (getattr(self.recipe, "image", None) if self.recipe else self.external_image) or None
+        if detail or (fields is not None and "ingredient_snapshot" in fields):
+            data["ingredient_snapshot"] = self.ingredient_snapshot
+        if fields is None or "recipe" in fields:
+            if recipe is None:
+                data["recipe"] = None
+            else:
+                data["recipe"] = recipe.to_dict() if detail else recipe.to_summary()
+
+        data["title"] = (recipe.title if recipe else self.external_title) or ""
+        data["image"] = (getattr(recipe, "image", None) if recipe else self.external_image) or None
         return data
 
+
+# plan items by slot, and "which plans use this external recipe"
+db.Index("ix_meal_items_plan_day_meal_type", MealItem.meal_plan_id, MealItem.day, MealItem.meal_type)
+db.Index("ix_meal_items_provider_external_id", MealItem.external_provider, MealItem.external_id)
+db.Index("ix_meal_items_recipe_id", MealItem.recipe_id)
+
+
+class IngredientSnapshot(db.Model):
+    """An ingredient list stored once and shared by every meal item that uses it."""
+    __tablename__ = "ingredient_snapshots"
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)  # sha256 of the canonical JSON
+    ingredients = db.deferred(db.Column(db.Text, nullable=False))         # JSON list[{name, quantity}]
+
+    rows = db.relationship("SnapshotIngredient", cascade="all, delete-orphan", order_by="SnapshotIngredient.position")
+
+
+class SnapshotIngredient(db.Model):
+    """Normalized, pre-filtered ingredient row of a snapshot (see ingredients.normalize_ingredients)."""
+    __tablename__ = "snapshot_ingredients"
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_id = db.Column(db.Integer, db.ForeignKey("ingredient_snapshots.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    name = db.Column(db.String(255), nullable=False)
+    name_key = db.Column(db.String(255), nullable=False)   # lower-cased name, the GROUP BY key
+    quantity = db.Column(db.String(255))                   # original text
+    base_amount = db.Column(db.Float)                      # parsed amount in ml / g / count
+    unit = db.Column(db.String(20))                        # unit the amount was written in
+    family = db.Column(db.String(30))                      # "volume", "mass", "count", "count:clove", ...
+
     
 
 class ShoppingItem(db.Model):
@@ -125,6 +201,9 @@ class ShoppingItem(db.Model):
             "checked": self.checked
         }
 
+
+db.Index("ix_shopping_items_meal_plan_id", ShoppingItem.meal_plan_id, ShoppingItem.id)
+
 class ExternalRecipe(db.Model):
     __tablename__ = "external_recipes"
     id = db.Column(db.Integer, primary_key=True)
@@ -134,5 +213,40 @@ class ExternalRecipe(db.Model):
     image = db.Column(db.String(500))
     # optional: brief summary, cuisine, etc.
 
+    # cached recipe detail (normalized by recipes_api.get_recipe_detail)
+    ingredients = db.Column(db.Text)        # JSON list[{name, quantity}]
+    instructions = db.Column(db.Text)
+    source_url = db.Column(db.String(500))
+    fetched_at = db.Column(db.DateTime)
+
     __table_args__ = (db.UniqueConstraint("provider", "external_id"),)
 
+    def to_detail(self):
+        try:
+            ingredients = json.loads(self.ingredients or "[]")
+        except ValueError:
+            ingredients = []
+        return {
+            "title": self.title,
+            "image": self.image,
+            "ingredients": ingredients,
+            "instructions": self.instructions or "",
+            "analyzedInstructions": [],
+            "sourceUrl": self.source_url,
+        }
+
+
+
+class IdempotencyKey(db.Model):
+    """Stored response for a client-supplied Idempotency-Key (see idempotency.py)."""
+    __tablename__ = "idempotency_keys"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # method + path + body hash; a reused key with a different request is rejected
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint("user_id", "key"),)
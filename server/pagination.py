@@ -1,33 +1,142 @@
+import base64
+import json
+from datetime import date, datetime
 from math import ceil
 
-def paginate(query, req, serializer=lambda x: x.to_dict()):
-    try:
-        page = int(req.args.get("page", 1))
-    except (TypeError, ValueError):
-        page = 1
+from sqlalchemy import and_, func, or_, select, tuple_
+
+from .serialization import parse_fields, project
+
+# count=approx counts at most this many rows and reports a lower bound beyond it
+APPROX_COUNT_CAP = 1000
+
+
+def _per_page(req):
     try:
         per_page = int(req.args.get("per_page", 10))
     except (TypeError, ValueError):
         per_page = 10
+    return max(1, min(per_page, 100))
 
-    page = max(page, 1)
-    per_page = max(1, min(per_page, 100))
 
-    # Fetch results
-    items = query.limit(per_page).offset((page - 1) * per_page).all()
-    total = query.order_by(None).count()
+def _count(query, mode):
+    """Return (total, is_estimate) for count mode exact|approx|none."""
+    if mode == "none":
+        return None, False
+    query = query.order_by(None)
+    if mode == "approx":
+        capped = query.limit(APPROX_COUNT_CAP + 1).subquery()
+        n = query.session.execute(select(func.count()).select_from(capped)).scalar()
+        if n > APPROX_COUNT_CAP:
+            return APPROX_COUNT_CAP, True
+        return n, False
+    return query.count(), False
+
+
+def _encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(token, keys):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        decoded = []
+        for (col, _), v in zip(keys, values):
+            kind = col.type.python_type
+            if v is not None and kind in (date, datetime):
+                v = kind.fromisoformat(v)
+            elif v is not None and kind is int:
+                v = int(v)
+            decoded.append(v)
+        return decoded
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+
+
+def _after(keys, values):
+    """WHERE clause selecting rows that sort strictly after ``values``."""
+    directions = {d for _, d in keys}
+    if len(directions) == 1:
+        cols = tuple_(*(c for c, _ in keys))
+        vals = tuple_(*values)
+        return cols < vals if directions == {"desc"} else cols > vals
+    clauses = []
+    for i, (col, direction) in enumerate(keys):
+        prefix = [c == v for (c, _), v in zip(keys[:i], values[:i])]
+        step = col < values[i] if direction == "desc" else col > values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
 
-    pages = ceil(total / per_page) if total else 0
 
-    data = {
-        "items": [i.to_dict() for i in items],
-        "page": page,
+def _paginate_cursor(query, req, serializer, keys, per_page):
+    token = req.args.get("after") or ""
+    query = query.order_by(None).order_by(*(c.desc() if d == "desc" else c.asc() for c, d in keys))
+    total, estimate = _count(query, req.args.get("count", "none"))
+
+    page_query = query
+    if token:
+        try:
+            page_query = query.filter(_after(keys, _decode_cursor(token, keys)))
+        except ValueError:
+            return {"error": "invalid 'after' cursor"}, 400
+
+    rows = page_query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    next_token = None
+    if has_more:
+        last = rows[-1]
+        next_token = _encode_cursor([getattr(last, c.key) for c, _ in keys])
+
+    fields = parse_fields(req)
+    body = {
+        "items": [project(serializer(i), fields) for i in rows],
         "per_page": per_page,
+        "next": next_token,
+        "has_more": has_more,
         "total": total,
-        "pages": ceil(total / per_page) if total else 0,
     }
-    
-    return {
-        "items": [serializer(i) for i in items],
+    if estimate:
+        body["total_is_estimate"] = True
+    return body, 200
+
+
+def paginate(query, req, serializer=lambda x: x.to_dict(), keys=None):
+    """Paginate ``query`` from request args.
+
+    Default is page/per_page (LIMIT/OFFSET + COUNT). If the view passes
+    ``keys`` -- the ORDER BY as [(column, "asc"|"desc"), ...], ending in a
+    unique column -- then ``?after=<token>`` switches to keyset pagination:
+    an empty ``after`` requests the first page and each response carries the
+    ``next`` token. ``?count=exact|approx|none`` controls the total (cursor
+    mode defaults to none), and ``?fields=`` trims each item (see
+    serialization.parse_fields).
+    """
+    per_page = _per_page(req)
+    if keys and "after" in req.args:
+        return _paginate_cursor(query, req, serializer, keys, per_page)
+
+    try:
+        page = int(req.args.get("page", 1))
+    except (TypeError, ValueError):
+        page = 1
+    page = max(page, 1)
+
+    # Fetch results
+    items = query.limit(per_page).offset((page - 1) * per_page).all()
+    total, estimate = _count(query, req.args.get("count", "exact"))
+
+    pages = None if total is None else (ceil(total / per_page) if total else 0)
+
+    fields = parse_fields(req)
+    body = {
+        "items": [project(serializer(i), fields) for i in items],
         "page": page, "per_page": per_page, "total": total, "pages": pages
-    }, 200
+    }
+    if estimate:
+        body["total_is_estimate"] = True
+    return body, 200
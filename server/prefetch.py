@@ -0,0 +1,166 @@
+# server/prefetch.py
+"""Warm the recipe detail cache for the top hits of a search.
+
+After /recipes/search answers, ``prefetcher.schedule`` hands the first
+PREFETCH_TOP_K results to a small worker pool, which fetches the details the
+cache doesn't have yet (one informationBulk call per search). Opening one of
+those recipes, or adding it to a plan, then reads a fresh cache row instead
+of waiting on the provider; a request that arrives while its prefetch is
+still running waits for it rather than fetching the same recipe twice.
+
+Every upstream fetch is charged against a per-user and a global budget per
+PREFETCH_BUDGET_WINDOW, so prefetching can't eat the provider quota that
+interactive requests need. Work that doesn't fit the queue or the budget is
+simply dropped. Off unless PREFETCH_ENABLED is set.
+
+``stats()`` reports how much was prefetched and how much of it was used
+(a fresh cache hit on a prefetched recipe); per process, like the caches.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# how many prefetched-but-not-yet-opened recipes to remember for hit_rate
+WARMED_MAX = 4096
+
+
+class Budget:
+    """Fixed-window allowance of upstream fetches, per user and overall."""
+
+    def __init__(self, per_user, total, window, clock=time.monotonic):
+        self.per_user = per_user
+        self.total = total
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._window_start = clock()
+        self._used = {}
+        self._used_total = 0
+
+    def take(self, user_id, n):
+        """Reserve up to ``n`` fetches for ``user_id``; returns how many were granted."""
+        with self._lock:
+            now = self._clock()
+            if now - self._window_start >= self.window:
+                self._window_start = now
+                self._used.clear()
+                self._used_total = 0
+            used = self._used.get(user_id, 0)
+            granted = max(0, min(n, self.per_user - used, self.total - self._used_total))
+            if granted:
+                self._used[user_id] = used + granted
+                self._used_total += granted
+            return granted
+
+
+class Prefetcher:
+    def __init__(self, app=None):
+        self.enabled = False
+        self._executor = None
+        self._slots = None
+        self._inflight = {}
+        self._warmed = OrderedDict()
+        self._stats = {"scheduled": 0, "dropped": 0, "over_budget": 0, "over_quota": 0, "fetched": 0, "used": 0, "errors": 0}
+        self._lock = threading.RLock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("PREFETCH_ENABLED", False)
+        self.top_k = app.config.get("PREFETCH_TOP_K", 3)
+        self.budget = Budget(
+            app.config.get("PREFETCH_USER_BUDGET", 30),
+            app.config.get("PREFETCH_GLOBAL_BUDGET", 300),
+            app.config.get("PREFETCH_BUDGET_WINDOW", 3600),
+        )
+        workers = app.config.get("PREFETCH_WORKERS", 2)
+        if self.enabled and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+            # bounded backlog: beyond this, new searches don't queue more work
+            self._slots = threading.BoundedSemaphore(workers * 4)
+        app.extensions["prefetch"] = self
+
+    def schedule(self, app, user_id, provider, external_ids):
+        """Queue a warm-up of the first ``top_k`` ids; returns the future or None."""
+        if not self.enabled:
+            return None
+        ids = [str(i) for i in dict.fromkeys(external_ids)][: self.top_k]
+        if not ids:
+            return None
+        if not self._slots.acquire(blocking=False):
+            self._bump("dropped")
+            return None
+        self._bump("scheduled")
+        # submit, register and hook up the cleanup in one locked section, so
+        # _done can't run before the ids are in _inflight and leave them
+        # pointing at a finished future (RLock: it may run inline here)
+        with self._lock:
+            future = self._executor.submit(self._run, app, user_id, provider, ids)
+            for eid in ids:
+                self._inflight.setdefault((provider, eid), future)
+            future.add_done_callback(lambda f: self._done(provider, ids, f))
+        return future
+
+    def _done(self, provider, ids, future):
+        self._slots.release()
+        with self._lock:
+            for eid in ids:
+                if self._inflight.get((provider, eid)) is future:
+                    del self._inflight[(provider, eid)]
+
+    def _run(self, app, user_id, provider, ids):
+        from .extensions import db
+        from .recipe_cache import prefetch_details
+        from .recipes_api import QuotaExceeded
+
+        with app.app_context():
+            try:
+                fetched, over_budget = prefetch_details(provider, ids, lambda n: self.budget.take(user_id, n))
+            except QuotaExceeded:
+                db.session.rollback()
+                self._bump("over_quota")
+            except Exception:
+                db.session.rollback()
+                self._bump("errors")
+                app.logger.warning("prefetch failed for %s %s", provider, ids, exc_info=True)
+            else:
+                with self._lock:
+                    self._stats["fetched"] += len(fetched)
+                    self._stats["over_budget"] += over_budget
+                    for eid in fetched:
+                        self._warmed[(provider, eid)] = True
+                    while len(self._warmed) > WARMED_MAX:
+                        self._warmed.popitem(last=False)
+            finally:
+                db.session.remove()
+
+    def wait(self, provider, external_id, timeout):
+        """Block (up to ``timeout``) on a running prefetch of this recipe.
+        Returns True if there was one."""
+        with self._lock:
+            future = self._inflight.get((provider, str(external_id)))
+        if future is None:
+            return False
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            pass
+        return True
+
+    def note_hit(self, provider, external_id):
+        """Called on a fresh cache hit; counts the first use of a prefetched recipe."""
+        with self._lock:
+            if self._warmed.pop((provider, external_id), None):
+                self._stats["used"] += 1
+
+    def _bump(self, counter):
+        with self._lock:
+            self._stats[counter] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hit_rate"] = round(stats["used"] / stats["fetched"], 4) if stats["fetched"] else 0.0
+        stats["enabled"] = self.enabled
+        return stats
@@ -0,0 +1,235 @@
+# server/quota.py
+"""Spoonacular point budget shared by every worker on the host.
+
+Spoonacular bills each call in points against a daily quota that resets at
+midnight UTC; once it's gone every call fails (402) for the rest of the day.
+``QuotaManager`` sits in front of ``recipes_api.client``: before each upstream
+attempt it reserves the call's estimated cost from
+
+* the day's budget (QUOTA_DAILY_POINTS), and
+* a token bucket refilled at QUOTA_DAILY_POINTS / day with room for
+  QUOTA_BURST points (default: a quarter of the daily budget), which spreads
+  the quota over the whole day instead of letting a busy morning spend it.
+
+It is off unless QUOTA_DAILY_POINTS is set.
+
+Background work can't spend the last part of either: prefetches stop once
+less than QUOTA_RESERVE_PREFETCH of the budget (and of the bucket) is left,
+cache refreshes below QUOTA_RESERVE_REFRESH, so what remains goes to
+interactive requests. A call that can't be paid for raises ``QuotaExceeded``
+and callers answer from their caches instead.
+
+The state lives in a small SQLite file (QUOTA_STORE, default
+``<instance>/quota.sqlite3``) updated under ``BEGIN IMMEDIATE``, so gunicorn
+workers share one budget. The provider's X-API-Quota-* response headers
+correct our estimates as we go.
+"""
+import contextlib
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+INTERACTIVE = "interactive"
+REFRESH = "refresh"
+PREFETCH = "prefetch"
+
+_priority = contextvars.ContextVar("quota_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def priority(name):
+    """Charge upstream calls made inside the block to ``name``."""
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def _today():
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _header(resp, name):
+    try:
+        return float(resp.headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class SQLiteQuotaStore:
+    """One row of bucket state in a SQLite file, read-modify-written under
+    ``BEGIN IMMEDIATE`` (the write lock is taken up front, so two processes
+    can't both spend the same tokens)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS quota (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            day TEXT NOT NULL,
+            spent REAL NOT NULL,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL,
+            upstream_used REAL,
+            upstream_left REAL
+        )
+    """
+    FIELDS = ("day", "spent", "tokens", "updated", "upstream_used", "upstream_left")
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def update(self, fn, initial):
+        """Run ``fn(state) -> result`` on the stored state (a dict, created
+        from ``initial`` if missing) and save whatever it changed."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM quota WHERE id = 1").fetchone()
+            state = dict(zip(self.FIELDS, row)) if row else dict(initial)
+            result = fn(state)
+            conn.execute(
+                f"INSERT OR REPLACE INTO quota (id, {', '.join(self.FIELDS)}) "
+                f"VALUES (1, {', '.join('?' for _ in self.FIELDS)})",
+                [state[f] for f in self.FIELDS],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+
+class QuotaManager:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.store = None
+        self._denied = {INTERACTIVE: 0, REFRESH: 0, PREFETCH: 0}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from .recipes_api import client
+
+        self.daily = float(app.config.get("QUOTA_DAILY_POINTS", 0))
+        self.enabled = self.daily > 0
+        self.burst = float(app.config.get("QUOTA_BURST", 0)) or self.daily / 4
+        self.rate = self.daily / 86400.0
+        self.reserves = {
+            INTERACTIVE: 0.0,
+            REFRESH: app.config.get("QUOTA_RESERVE_REFRESH", 0.2),
+            PREFETCH: app.config.get("QUOTA_RESERVE_PREFETCH", 0.4),
+        }
+        path = app.config.get("QUOTA_STORE")
+        if not path:
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, "quota.sqlite3")
+        self.store = SQLiteQuotaStore(path)
+        client.quota = self if self.enabled else None
+        app.extensions["quota"] = self
+
+    def _initial(self):
+        return {"day": _today(), "spent": 0.0, "tokens": self.burst, "updated": time.time(),
+                "upstream_used": None, "upstream_left": None}
+
+    def _refill(self, state):
+        now = time.time()
+        today = _today()
+        if state["day"] != today:
+            state.update(day=today, spent=0.0, upstream_used=None, upstream_left=None)
+        elapsed = max(0.0, now - state["updated"])
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.rate)
+        state["updated"] = now
+
+    def acquire(self, cost, priority=None):
+        """Reserve ``cost`` points for a call at ``priority`` (default: the
+        current ``priority()`` block). Returns False if it can't be paid for."""
+        priority = priority or current_priority()
+        reserve = self.reserves.get(priority, 0.0)
+
+        def take(state):
+            self._refill(state)
+            if self.daily - state["spent"] - cost < reserve * self.daily:
+                return False
+            if state["tokens"] - cost < reserve * self.burst:
+                return False
+            state["tokens"] -= cost
+            state["spent"] += cost
+            return True
+
+        ok = self.store.update(take, self._initial())
+        if not ok:
+            with self._lock:
+                self._denied[priority] = self._denied.get(priority, 0) + 1
+        return ok
+
+    def settle(self, estimate, resp):
+        """Correct the reservation from the response's quota headers:
+        X-API-Quota-Request is what this call cost, X-API-Quota-Used and
+        X-API-Quota-Left are the account's totals for the day."""
+        actual = _header(resp, "X-API-Quota-Request")
+        used = _header(resp, "X-API-Quota-Used")
+        left = _header(resp, "X-API-Quota-Left")
+        if actual is None and used is None and left is None:
+            return
+
+        def apply(state):
+            self._refill(state)
+            if actual is not None:
+                state["tokens"] = min(self.burst, state["tokens"] - (actual - estimate))
+                state["spent"] += actual - estimate
+            if used is not None:
+                # the provider's count wins (it also sees other keys' clients)
+                state["spent"] = used
+                state["upstream_used"] = used
+            if left is not None:
+                state["upstream_left"] = left
+                state["spent"] = max(state["spent"], self.daily - left)
+
+        self.store.update(apply, self._initial())
+
+    def exhausted(self):
+        """The provider said the quota is gone (402): stop until tomorrow."""
+        def apply(state):
+            self._refill(state)
+            state["spent"] = max(state["spent"], self.daily)
+        self.store.update(apply, self._initial())
+
+    def stats(self):
+        if not self.enabled:
+            return {"enabled": False}
+
+        def read(state):
+            self._refill(state)
+            return dict(state)
+
+        state = self.store.update(read, self._initial())
+        with self._lock:
+            denied = dict(self._denied)
+        return {
+            "enabled": True,
+            "day": state["day"],
+            "daily_points": self.daily,
+            "spent": round(state["spent"], 3),
+            "remaining": round(max(0.0, self.daily - state["spent"]), 3),
+            "tokens": round(state["tokens"], 3),
+            "upstream_used": state["upstream_used"],
+            "upstream_left": state["upstream_left"],
+            "denied": denied,
+        }
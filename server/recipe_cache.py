@@ -0,0 +1,218 @@
+# server/recipe_cache.py
+"""Read-through cache for provider recipe details, stored in external_recipes.
+
+Fresh rows (younger than RECIPE_CACHE_TTL) are served straight from the
+database. Rows that are stale but still inside the RECIPE_CACHE_SWR window are
+served as-is while a background thread refreshes them. Anything older (or
+missing) is fetched upstream synchronously; if that fetch fails we fall back to
+whatever stale copy we have.
+"""
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db, jobs, prefetcher
+from .models import ExternalRecipe
+from . import quota, recipes_api
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _bump(counter):
+    with _lock:
+        _stats[counter] += 1
+
+
+def cache_stats():
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def _fetch(external_id):
+    return recipes_api.get_recipe_detail(external_id)
+
+
+def _upsert(provider, external_id, detail, row=None):
+    """Upsert a normalized detail into external_recipes (no commit)."""
+    values = {
+        "title": (detail.get("title") or "")[:300],
+        "image": detail.get("image"),
+        "ingredients": json.dumps(detail.get("ingredients") or []),
+        "instructions": detail.get("instructions") or "",
+        "source_url": detail.get("sourceUrl"),
+        "fetched_at": _utcnow(),
+    }
+    if row is None:
+        row = ExternalRecipe.query.filter_by(provider=provider, external_id=external_id).first()
+    if row is None:
+        try:
+            with db.session.begin_nested():
+                row = ExternalRecipe(provider=provider, external_id=external_id, **values)
+                db.session.add(row)
+        except IntegrityError:
+            # another worker cached it first; overwrite with our copy
+            row = ExternalRecipe.query.filter_by(provider=provider, external_id=external_id).one()
+    for k, v in values.items():
+        setattr(row, k, v)
+    return row
+
+
+def _store(provider, external_id, detail):
+    row = _upsert(provider, external_id, detail)
+    db.session.commit()
+    return row
+
+
+def _refresh(provider, external_id):
+    try:
+        with quota.priority(quota.REFRESH):
+            detail = _fetch(external_id)
+        _store(provider, external_id, detail)
+        _bump("refreshes")
+    except recipes_api.QuotaExceeded:
+        # the stale copy keeps being served; a later read retries
+        db.session.rollback()
+    except Exception:
+        db.session.rollback()
+        _bump("errors")
+        current_app.logger.warning("background refresh failed for %s/%s", provider, external_id)
+
+
+def _schedule_refresh(provider, external_id):
+    app = current_app._get_current_object()
+    jobs.submit(app, _refresh, provider, external_id, key=("refresh", provider, external_id))
+
+
+def _freshness(row):
+    """'fresh', 'stale' (inside the SWR window), 'expired' or None (no detail)."""
+    if row is None or row.fetched_at is None or row.ingredients is None:
+        return None
+    age = _utcnow() - row.fetched_at
+    ttl = timedelta(seconds=current_app.config["RECIPE_CACHE_TTL"])
+    if age <= ttl:
+        return "fresh"
+    if age <= ttl + timedelta(seconds=current_app.config["RECIPE_CACHE_SWR"]):
+        return "stale"
+    return "expired"
+
+
+def _hit(provider, external_id, row):
+    _bump("hits")
+    prefetcher.note_hit(provider, external_id)
+    return row.to_detail()
+
+
+def get_recipe_detail(provider, external_id):
+    """Return the normalized detail for (provider, external_id), cache first."""
+    external_id = str(external_id)
+    row = ExternalRecipe.query.filter_by(provider=provider, external_id=external_id).first()
+
+    state = _freshness(row)
+    if state not in ("fresh", "stale") and prefetcher.wait(
+        provider, external_id, current_app.config["PREFETCH_WAIT_SECONDS"]
+    ):
+        # a search just queued this one; use its result instead of a second fetch
+        db.session.expire_all()
+        row = ExternalRecipe.query.filter_by(provider=provider, external_id=external_id).first()
+        state = _freshness(row)
+    if state == "fresh":
+        return _hit(provider, external_id, row)
+    if state == "stale":
+        _bump("stale_hits")
+        _schedule_refresh(provider, external_id)
+        return row.to_detail()
+    if state is None:
+        row = None
+
+    _bump("misses")
+    try:
+        detail = _fetch(external_id)
+    except Exception:
+        if row is None:
+            raise
+        _bump("errors")
+        current_app.logger.warning("upstream failed, serving stale %s/%s", provider, external_id)
+        return row.to_detail()
+
+    _store(provider, external_id, detail)
+    return detail
+
+
+def get_recipe_details(provider, external_ids):
+    """Batch variant of get_recipe_detail: one cache query, one bulk upstream
+    call for the misses. Returns {external_id: detail}; ids the provider could
+    not return (and that have no stale copy) are simply absent."""
+    ids = list(dict.fromkeys(str(i) for i in external_ids))
+    if not ids:
+        return {}
+    rows = {
+        r.external_id: r
+        for r in ExternalRecipe.query.filter(
+            ExternalRecipe.provider == provider, ExternalRecipe.external_id.in_(ids)
+        )
+    }
+
+    details, missing = {}, []
+    for eid in ids:
+        row = rows.get(eid)
+        state = _freshness(row)
+        if state == "fresh":
+            details[eid] = _hit(provider, eid, row)
+        elif state == "stale":
+            _bump("stale_hits")
+            _schedule_refresh(provider, eid)
+            details[eid] = row.to_detail()
+        else:
+            _bump("misses")
+            missing.append(eid)
+
+    if missing:
+        try:
+            fetched = recipes_api.get_recipe_details_bulk(missing)
+        except Exception:
+            _bump("errors")
+            current_app.logger.warning("bulk upstream fetch failed for %d recipes", len(missing))
+            fetched = {}
+        for eid in missing:
+            if eid in fetched:
+                _upsert(provider, eid, fetched[eid], row=rows.get(eid))
+                details[eid] = fetched[eid]
+            elif _freshness(rows.get(eid)) == "expired":
+                details[eid] = rows[eid].to_detail()
+        db.session.commit()
+    return details
+
+
+def prefetch_details(provider, external_ids, take):
+    """Fetch the details the cache lacks (missing or expired) for
+    ``external_ids``, as many as ``take(n)`` allows. Stale rows are left to
+    the usual refresh-on-read. Returns (fetched ids, ids skipped for budget)."""
+    rows = {
+        r.external_id: r
+        for r in ExternalRecipe.query.filter(
+            ExternalRecipe.provider == provider, ExternalRecipe.external_id.in_(external_ids)
+        )
+    }
+    wanted = [eid for eid in external_ids if _freshness(rows.get(eid)) in (None, "expired")]
+    if not wanted:
+        return [], 0
+    granted = take(len(wanted))
+    if not granted:
+        return [], len(wanted)
+    with quota.priority(quota.PREFETCH):
+        fetched = recipes_api.get_recipe_details_bulk(wanted[:granted])
+    for eid, detail in fetched.items():
+        _upsert(provider, eid, detail, row=rows.get(eid))
+    db.session.commit()
+    return list(fetched), len(wanted) - granted
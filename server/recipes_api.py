@@ -1,7 +1,19 @@
 # server/recipes_api.py
 import os
 import re
+import random
+import threading
+import time
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson as _json
+except ImportError:  # optional; same speedup as the response encoder
+    import json as _json
 
 SPOONACULAR_KEY = (
     os.getenv("SPOONACULAR_API_KEY")
@@ -21,41 +33,249 @@ def _strip_html(s: str) -> str:
 
 BASE = "https://api.spoonacular.com"
 
-def search_recipes(query, offset=0, number=10):
+POOL_SIZE = int(os.getenv("SPOONACULAR_POOL_SIZE", 20))
+MAX_RETRIES = int(os.getenv("SPOONACULAR_MAX_RETRIES", 3))
+CONNECT_TIMEOUT = float(os.getenv("SPOONACULAR_CONNECT_TIMEOUT", 3.05))
+# read timeouts per endpoint
+TIMEOUTS = {
+    "search": float(os.getenv("SPOONACULAR_SEARCH_TIMEOUT", 10)),
+    "detail": float(os.getenv("SPOONACULAR_DETAIL_TIMEOUT", 15)),
+}
+BREAKER_THRESHOLD = int(os.getenv("SPOONACULAR_BREAKER_THRESHOLD", 5))
+BREAKER_RESET = float(os.getenv("SPOONACULAR_BREAKER_RESET", 30))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(RuntimeError):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class QuotaExceeded(UpstreamError):
+    """The shared point budget (quota.py) can't pay for this call."""
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; after ``reset_timeout``
+    seconds lets a single trial call through (half-open) and closes again if
+    it succeeds."""
+
+    def __init__(self, threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back a half-open trial that never reached the provider."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+def _retry_after(resp):
+    """Seconds to wait according to a Retry-After header, or None."""
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderClient:
+    """Shared keep-alive session for the recipe provider with retries,
+    jittered exponential backoff and a circuit breaker."""
+
+    def __init__(self, base=BASE, pool_size=POOL_SIZE, max_retries=MAX_RETRIES,
+                 connect_timeout=CONNECT_TIMEOUT, timeouts=None,
+                 backoff_base=0.5, backoff_max=8.0, breaker=None, sleep=time.sleep, quota=None):
+        self.base = base
+        self.quota = quota
+        self.max_retries = max_retries
+        self.connect_timeout = connect_timeout
+        self.timeouts = dict(TIMEOUTS, **(timeouts or {}))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET)
+        self._sleep = sleep
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, resp=None):
+        delay = _retry_after(resp)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return delay
+
+    def get(self, path, params=None, endpoint="default", cost=1.0):
+        """GET ``path``; ``cost`` is the estimated quota points per attempt."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Upstream unavailable (circuit open)")
+
+        timeout = (self.connect_timeout, self.timeouts.get(endpoint, 10))
+        attempt = 0
+        while True:
+            if self.quota is not None and not self.quota.acquire(cost):
+                # says nothing about provider health; let the next call be the trial
+                self.breaker.release_trial()
+                raise QuotaExceeded("Upstream quota budget exhausted", status=429)
+            resp = None
+            try:
+                resp = self.session.get(f"{self.base}{path}", params=params, timeout=timeout)
+            except requests.RequestException as e:
+                # connection errors and timeouts, but also redirect loops, broken
+                # chunked bodies...: all count against the breaker
+                error = UpstreamError(f"Upstream request error: {e}")
+            else:
+                if self.quota is not None:
+                    self.quota.settle(cost, resp)
+                if resp.ok:
+                    self.breaker.record_success()
+                    return resp
+                error = UpstreamError(f"Upstream {resp.status_code}: {resp.text[:300]}", status=resp.status_code)
+                if resp.status_code == 402 and self.quota is not None:
+                    # daily points used up upstream
+                    self.quota.exhausted()
+                if resp.status_code not in RETRY_STATUSES:
+                    # client-side errors say nothing about provider health
+                    self.breaker.record_success()
+                    raise error
+
+            delay = self._backoff(attempt, resp)
+            if attempt >= self.max_retries or delay > self.backoff_max:
+                self.breaker.record_failure()
+                raise error
+            attempt += 1
+            self._sleep(delay)
+
+
+client = ProviderClient()
+
+# Search results only need what a result card shows. Asking complexSearch for
+# addRecipeInformation returns the full recipe (summary HTML, instructions,
+# diets, ...) for every hit and costs extra quota per result, so it's opt-in.
+SearchHit = namedtuple("SearchHit", "provider external_id title image")
+RichSearchHit = namedtuple(
+    "RichSearchHit", SearchHit._fields + ("ready_in_minutes", "servings", "source_url", "summary")
+)
+
+
+def _parse_search(content, rich=False):
+    data = _json.loads(content)
+    results = data.get("results") or []
+    if rich:
+        items = [
+            RichSearchHit(
+                "spoonacular", str(it["id"]), it.get("title"), it.get("image"),
+                it.get("readyInMinutes"), it.get("servings"), it.get("sourceUrl"),
+                _strip_html(it.get("summary") or ""),
+            )
+            for it in results
+        ]
+    else:
+        items = [SearchHit("spoonacular", str(it["id"]), it.get("title"), it.get("image")) for it in results]
+    return {"items": items, "total": data.get("totalResults", 0)}
+
+
+def search_recipes(query, offset=0, number=10, rich=False):
+    """One page of complexSearch hits as ``{"items": [SearchHit], "total"}``.
+
+    ``rich=True`` also requests recipe information and returns
+    ``RichSearchHit``s (timing, servings, source URL, plain-text summary).
+    """
     require_key()
     params = {
         "apiKey": SPOONACULAR_KEY,
         "query": query,
         "offset": offset,
         "number": number,
-        "addRecipeInformation": True,
     }
-    r = requests.get(f"{BASE}/recipes/complexSearch", params=params, timeout=10)
-    if not r.ok:
-        raise RuntimeError(f"Upstream {r.status_code}: {r.text[:300]}")
-    data = r.json()
-    items = []
-    for it in data.get("results", []):
-        items.append({
-            "provider": "spoonacular",
-            "external_id": str(it["id"]),
-            "title": it.get("title"),
-            "image": it.get("image"),
-        })
-    return {"items": items, "total": data.get("totalResults", 0)}
+    # 1 point + 0.01 per result, + 0.025 per result for recipe information
+    cost = 1 + 0.01 * number
+    if rich:
+        params["addRecipeInformation"] = True
+        cost += 0.025 * number
+    r = client.get("/recipes/complexSearch", params=params, endpoint="search", cost=cost)
+    return _parse_search(r.content, rich=rich)
 
 def get_recipe_detail(external_id: str):
     require_key()
-    url = f"{BASE}/recipes/{external_id}/information"
-    resp = requests.get(
-        url,
+    resp = client.get(
+        f"/recipes/{external_id}/information",
         params={"apiKey": SPOONACULAR_KEY, "includeNutrition": "false"},
-        timeout=15,
+        endpoint="detail",
     )
-    if not resp.ok:
-        raise RuntimeError(f"Upstream {resp.status_code}: {resp.text[:300]}")
-    data = resp.json()
+    return _normalize_detail(resp.json())
+
+BULK_CHUNK = 50
+
+def get_recipe_details_bulk(external_ids):
+    """Fetch many details via informationBulk; returns {external_id: detail}."""
+    require_key()
+    ids = [str(i) for i in dict.fromkeys(external_ids)]
+    details = {}
+    for start in range(0, len(ids), BULK_CHUNK):
+        chunk = ids[start:start + BULK_CHUNK]
+        resp = client.get(
+            "/recipes/informationBulk",
+            params={"apiKey": SPOONACULAR_KEY, "ids": ",".join(chunk), "includeNutrition": "false"},
+            endpoint="detail",
+            cost=1 + 0.5 * (len(chunk) - 1),  # 1 point + 0.5 per additional recipe
+        )
+        for data in resp.json() or []:
+            if data.get("id") is not None:
+                details[str(data["id"])] = _normalize_detail(data)
+    return details
 
+def _normalize_detail(data):
     title = data.get("title") or ""
     image = data.get("image")
 
@@ -0,0 +1,385 @@
+# server/search.py
+"""Full-text search over local recipes and the cached external catalog.
+
+PostgreSQL: a stored generated ``tsvector`` column (title weighted A, body
+weighted B) with a GIN index, queried with ``websearch_to_tsquery`` and
+ranked by ``ts_rank_cd``.
+
+SQLite (dev/tests): an external-content FTS5 table kept in sync by
+triggers, ranked by ``bm25``. Terms are prefix-matched.
+
+Other databases fall back to unranked, case-insensitive substring matching.
+
+The DDL below is applied by ``after_create`` hooks on the tables for
+``db.create_all()`` setups; migrations keep frozen copies of what it was
+when they were written. Note that a SQLite batch
+migration that recreates an indexed table drops its triggers; re-run
+``sqlite_ddl`` for it afterwards.
+
+``federated_search`` merges the user's recipes with one external source per
+query: the catalog or, when it can't fill a page, a deadline-bounded
+provider query.
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import current_app
+from sqlalchemy import DDL, event, func, literal_column, or_, select, text
+
+from .extensions import db, jobs
+from .models import ExternalRecipe, Recipe
+
+TS_CONFIG = "english"
+
+# table -> (title column, body column); the title gets the higher weight
+FTS_COLUMNS = {
+    "recipes": ("title", "ingredients"),
+    "external_recipes": ("title", "ingredients"),
+}
+# bodies holding JSON [{name, quantity}, ...]: only the names are indexed, so
+# the keys ("name", "quantity") don't match every row
+FTS_JSON_BODIES = {"external_recipes"}
+
+
+def _postgres_body(table, body):
+    if table in FTS_JSON_BODIES:
+        return f"coalesce(jsonb_path_query_array({body}::jsonb, '$[*].name'), '[]')"
+    return f"coalesce({body}, '')"
+
+
+def postgres_ddl(table):
+    title, body = FTS_COLUMNS[table]
+    return [
+        f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce({title}, '')), 'A') || "
+        f"setweight(to_tsvector('{TS_CONFIG}', {_postgres_body(table, body)}), 'B')"
+        ") STORED",
+        f"CREATE INDEX ix_{table}_search_vector ON {table} USING gin (search_vector)",
+    ]
+
+
+def postgres_drop(table):
+    return [
+        f"DROP INDEX IF EXISTS ix_{table}_search_vector",
+        f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector",
+    ]
+
+
+def _sqlite_values(table, row):
+    title, body = FTS_COLUMNS[table]
+    if table not in FTS_JSON_BODIES:
+        return f"{row}.{title}, {row}.{body}"
+    names = (
+        f"(SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each("
+        f"CASE WHEN json_valid({row}.{body}) THEN {row}.{body} END) WHERE type = 'object')"
+    )
+    return f"{row}.{title}, {names}"
+
+
+def sqlite_ddl(table):
+    """Tables whose body is the column itself get an external-content FTS5
+    table; JSON bodies a contentless one fed the extracted names (FTS5 would
+    read the raw column back on 'rebuild')."""
+    cols = ", ".join(FTS_COLUMNS[table])
+    new, old = _sqlite_values(table, "new"), _sqlite_values(table, "old")
+    fts = f"{table}_fts"
+    if table in FTS_JSON_BODIES:
+        content = "content=''"
+        # index rows that existed before the table did
+        backfill = [
+            f"INSERT INTO {fts}({fts}) VALUES ('delete-all')",
+            f"INSERT INTO {fts}(rowid, {cols}) SELECT t.id, {_sqlite_values(table, 't')} FROM {table} t",
+        ]
+    else:
+        content = f"content='{table}', content_rowid='id'"
+        backfill = [f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"]
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, {content}, tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        *backfill,
+    ]
+
+
+def sqlite_drop(table):
+    fts = f"{table}_fts"
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+for _model in (Recipe, ExternalRecipe):
+    _table = _model.__table__
+    for _stmt in postgres_ddl(_table.name):
+        event.listen(_table, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
+    for _stmt in sqlite_ddl(_table.name):
+        event.listen(_table, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+    for _stmt in sqlite_drop(_table.name):
+        event.listen(_table, "before_drop", DDL(_stmt).execute_if(dialect="sqlite"))
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Alembic autogenerate filter: the search objects live outside the models."""
+    if type_ == "table" and any(name.startswith(f"{t}_fts") for t in FTS_COLUMNS):
+        return False
+    if name == "search_vector" or name in {f"ix_{t}_search_vector" for t in FTS_COLUMNS}:
+        return False
+    return True
+
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts5_query(q):
+    """User text -> FTS5 MATCH expression: every word, prefix-matched, quoted
+    so FTS5 operators in the input are treated as text."""
+    terms = _TERM_RE.findall(q.lower())
+    return " AND ".join(f'"{t}"*' for t in terms)
+
+
+def _search_postgres(model, columns, where, q, limit, offset):
+    tsq = func.websearch_to_tsquery(TS_CONFIG, q)
+    vector = literal_column(f"{model.__tablename__}.search_vector")
+    rank = func.ts_rank_cd(vector, tsq)
+    where = (*where, vector.op("@@")(tsq))
+    rows = db.session.execute(
+        select(*columns, rank.label("rank"))
+        .where(*where)
+        .order_by(rank.desc(), model.id.desc())
+        .limit(limit).offset(offset)
+    ).all()
+    total = db.session.execute(select(func.count()).select_from(model).where(*where)).scalar()
+    return rows, total
+
+
+def _search_sqlite(table, columns, where, params, q, limit, offset):
+    match = _fts5_query(q)
+    if not match:
+        return [], 0
+    fts = f"{table}_fts"
+    params = dict(params, match=match, limit=limit, offset=offset)
+    body = f"FROM {fts} JOIN {table} t ON t.id = {fts}.rowid WHERE {fts} MATCH :match"
+    if where:
+        body += f" AND {where}"
+    # bm25: lower is better; title matches weigh 10x body matches
+    rows = db.session.execute(text(
+        f"SELECT {columns}, -bm25({fts}, 10.0, 1.0) AS rank {body} "
+        f"ORDER BY bm25({fts}, 10.0, 1.0), t.id DESC LIMIT :limit OFFSET :offset"
+    ), params).all()
+    total = db.session.execute(text(f"SELECT count(*) {body}"), params).scalar()
+    return rows, total
+
+
+def _search_like(model, columns, where, q, limit, offset):
+    """Other dialects: every word must appear (case-insensitively) in the title
+    or body (titles only for JSON bodies); no ranking, newest first."""
+    terms = _TERM_RE.findall(q.lower())
+    if not terms:
+        return [], 0
+    table = model.__tablename__
+    searched = FTS_COLUMNS[table][:1] if table in FTS_JSON_BODIES else FTS_COLUMNS[table]
+    haystacks = [func.lower(getattr(model, c)) for c in searched]
+    where = (*where, *(or_(*(h.contains(t, autoescape=True) for h in haystacks)) for t in terms))
+    rows = db.session.execute(
+        select(*columns, literal_column("0").label("rank"))
+        .where(*where)
+        .order_by(model.id.desc())
+        .limit(limit).offset(offset)
+    ).all()
+    total = db.session.execute(select(func.count()).select_from(model).where(*where)).scalar()
+    return rows, total
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def search_local_recipes(user_id, q, limit=10, offset=0):
+    """Ranked matches among ``user_id``'s recipes: ([row(id, user_id, title, rank)], total)."""
+    dialect = _dialect()
+    if dialect == "postgresql":
+        return _search_postgres(
+            Recipe, (Recipe.id, Recipe.user_id, Recipe.title), (Recipe.user_id == user_id,), q, limit, offset
+        )
+    if dialect == "sqlite":
+        return _search_sqlite(
+            "recipes", "t.id, t.user_id, t.title", "t.user_id = :uid", {"uid": user_id}, q, limit, offset
+        )
+    return _search_like(
+        Recipe, (Recipe.id, Recipe.user_id, Recipe.title), (Recipe.user_id == user_id,), q, limit, offset
+    )
+
+
+def search_catalog(q, limit=10, offset=0, provider=None, exclude_titles_of=()):
+    """Ranked matches in the cached external catalog:
+    ([row(provider, external_id, title, image, rank)], total). Entries titled
+    (case-insensitively) like one of the recipes ``exclude_titles_of`` are
+    left out."""
+    dialect = _dialect()
+    if dialect == "sqlite":
+        where = ["t.provider = :provider"] if provider else []
+        if exclude_titles_of:
+            ids = ", ".join(str(int(i)) for i in exclude_titles_of)
+            where.append(f"lower(t.title) NOT IN (SELECT lower(title) FROM recipes WHERE id IN ({ids}))")
+        return _search_sqlite(
+            "external_recipes", "t.provider, t.external_id, t.title, t.image",
+            " AND ".join(where), {"provider": provider}, q, limit, offset,
+        )
+    cols = (ExternalRecipe.provider, ExternalRecipe.external_id, ExternalRecipe.title, ExternalRecipe.image)
+    where = (ExternalRecipe.provider == provider,) if provider else ()
+    if exclude_titles_of:
+        local_titles = select(func.lower(Recipe.title)).where(Recipe.id.in_(exclude_titles_of))
+        where = (*where, func.lower(ExternalRecipe.title).not_in(local_titles))
+    if dialect == "postgresql":
+        return _search_postgres(ExternalRecipe, cols, where, q, limit, offset)
+    return _search_like(ExternalRecipe, cols, where, q, limit, offset)
+
+
+# -------- federated search --------
+EXTERNAL_SOURCES = ("catalog", "provider")
+
+_provider_pool = None
+_provider_pool_lock = threading.Lock()
+
+
+def _pool():
+    global _provider_pool
+    with _provider_pool_lock:
+        if _provider_pool is None:
+            _provider_pool = ThreadPoolExecutor(
+                max_workers=current_app.config["FEDERATED_PROVIDER_WORKERS"], thread_name_prefix="federated"
+            )
+        return _provider_pool
+
+
+def remember_results(provider, items):
+    """Add provider hits the catalog hasn't seen (title/image only; the detail
+    cache fills in the rest on first open) so later searches stay local."""
+    ids = [it.external_id for it in items]
+    known = set(db.session.execute(
+        select(ExternalRecipe.external_id)
+        .where(ExternalRecipe.provider == provider, ExternalRecipe.external_id.in_(ids))
+    ).scalars())
+    new = [
+        {"provider": provider, "external_id": it.external_id, "title": it.title[:300], "image": it.image}
+        for it in items if it.external_id not in known and it.title
+    ]
+    if not new:
+        return
+    try:
+        db.session.execute(ExternalRecipe.__table__.insert(), new)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()  # a concurrent search inserted some of them; harmless
+
+
+def federated_search(user_id, q, page=1, per_page=10, provider="spoonacular", source=None):
+    """One ranked list: the user's own recipes first, then external recipes.
+
+    External recipes come from one source per query, ``source``: the local
+    catalog (external_recipes) or the provider. Without one, the catalog is
+    used if it can fill a page and the choice is returned as
+    ``external_source``; clients pass it back for the following pages so the
+    list doesn't switch sources halfway. The provider call runs on a worker
+    thread (when ``source`` is "provider", concurrently with the local and
+    catalog queries) and is abandoned after FEDERATED_DEADLINE seconds (its result
+    still lands in the search cache and the catalog for the next request);
+    the page then holds the catalog's matches. External hits titled like one
+    of the user's matching recipes are dropped. Returns the response body.
+    """
+    from .recipes_api import search_recipes
+
+    started = time.monotonic()
+    start = (page - 1) * per_page
+
+    local_rows, local_total = search_local_recipes(user_id, q, limit=per_page, offset=start)
+    items = [{"source": "local", "id": r.id, "title": r.title, "image": None} for r in local_rows]
+
+    # window of the external list this page needs
+    ext_offset = max(0, start - local_total)
+    ext_limit = per_page - len(items)
+
+    def ask_provider():
+        cache = current_app.extensions["search_cache"]
+        key = (" ".join(q.lower().split()), ext_offset, ext_limit)
+        return _pool().submit(cache.get_or_load, key, lambda: search_recipes(q, offset=ext_offset, number=ext_limit))
+
+    # a client that already settled on the provider gets its call started
+    # now, so it runs while the remaining local and catalog queries do
+    future = ask_provider() if source == "provider" and ext_limit > 0 else None
+
+    # every local match, not just this page's, so each page drops the same duplicates
+    local_matches = local_rows
+    if local_total > len(local_rows):
+        local_matches, _ = search_local_recipes(user_id, q, limit=local_total)
+    local_titles = {(r.title or "").lower() for r in local_matches}
+
+    catalog_rows, catalog_total = search_catalog(
+        q, limit=max(ext_limit, 1), offset=ext_offset, provider=provider,
+        exclude_titles_of=[r.id for r in local_matches],
+    )
+    if source is None:
+        source = "catalog" if catalog_total >= per_page else "provider"
+    sources = {"local": len(items), "catalog": 0, "provider": 0}
+    external_total, partial = catalog_total, False
+    catalog_items = [
+        {"source": "catalog", "provider": r.provider, "external_id": r.external_id, "title": r.title, "image": r.image}
+        for r in catalog_rows
+    ]
+
+    if ext_limit <= 0:
+        external = []
+    elif source == "catalog":
+        external = catalog_items
+    else:
+        if future is None:
+            future = ask_provider()
+        remaining = current_app.config["FEDERATED_DEADLINE"] - (time.monotonic() - started)
+        try:
+            data = future.result(timeout=max(0.0, remaining))
+        except FutureTimeout:
+            partial = True
+            current_app.logger.info("federated search: provider missed the deadline for %r", q)
+        except Exception:
+            partial = True
+            current_app.logger.warning("federated search: provider failed for %r", q, exc_info=True)
+        if partial:
+            # best effort: whatever the catalog has for this window
+            external = catalog_items
+        else:
+            # the provider's total is its own estimate; duplicates are only
+            # known for the hits on this page
+            external = [
+                {"source": "provider", **it._asdict()} for it in data["items"]
+                if (it.title or "").lower() not in local_titles
+            ]
+            external_total = max(catalog_total, data["total"] - (len(data["items"]) - len(external)))
+            if data["items"]:
+                jobs.submit(current_app._get_current_object(), remember_results, provider, data["items"])
+
+    for item in external[:ext_limit]:
+        items.append(item)
+        sources[item["source"]] += 1
+
+    total = local_total + external_total
+    return {
+        "items": items,
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "pages": (total + per_page - 1) // per_page,
+        "sources": sources,
+        "external_source": source,
+        "partial": partial,
+    }
@@ -0,0 +1,149 @@
+# server/serialization.py
+"""Response serialization: a pluggable fast JSON provider and ``?fields=``.
+
+JSON_BACKEND picks the encoder Flask uses for every dict/list a view
+returns: "orjson" or "msgspec" when installed, "stdlib" for Flask's default,
+or "auto" (first available of orjson, msgspec, stdlib).
+
+``?fields=id,title,items.title,items.recipe.title`` trims a response to the
+named keys (dotted names reach into nested objects and lists). Models take
+the parsed tree in ``to_dict(fields=...)`` so they can skip building nested
+objects nobody asked for; ``project`` then trims whatever is left.
+"""
+import abc
+import dataclasses
+import decimal
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+
+def _default(o):
+    # same fallbacks as Flask's provider, minus dates (the backends emit ISO 8601)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class _BytesJSONProvider(DefaultJSONProvider, abc.ABC):
+    """Base for encoders that produce bytes: skips the str round trip."""
+
+    @abc.abstractmethod
+    def _encode(self, obj):
+        """``obj`` as UTF-8 JSON bytes."""
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(obj)  # pretty-printed via the stdlib
+        return self._app.response_class(self._encode(obj) + b"\n", mimetype=self.mimetype)
+
+
+class OrjsonProvider(_BytesJSONProvider):
+    name = "orjson"
+
+    def _encode(self, obj):
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+class MsgspecProvider(_BytesJSONProvider):
+    name = "msgspec"
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._encoder = msgspec.json.Encoder(enc_hook=_default)
+        self._decoder = msgspec.json.Decoder()
+
+    def _encode(self, obj):
+        return self._encoder.encode(obj)
+
+    def loads(self, s, **kwargs):
+        return self._decoder.decode(s)
+
+
+class StdlibProvider(DefaultJSONProvider):
+    name = "stdlib"
+
+
+BACKENDS = {
+    "orjson": (OrjsonProvider, lambda: orjson is not None),
+    "msgspec": (MsgspecProvider, lambda: msgspec is not None),
+    "stdlib": (StdlibProvider, lambda: True),
+}
+
+
+def json_provider_class(backend="auto"):
+    """Provider class for ``backend``, falling back to the stdlib if the
+    requested library is not installed."""
+    if backend == "auto":
+        for name in ("orjson", "msgspec"):
+            cls, available = BACKENDS[name]
+            if available():
+                return cls
+        return StdlibProvider
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown JSON_BACKEND {backend!r}")
+    cls, available = BACKENDS[backend]
+    return cls if available() else StdlibProvider
+
+
+def init_app(app):
+    app.json = json_provider_class(app.config.get("JSON_BACKEND", "auto"))(app)
+
+
+# -------- ?fields= --------
+def parse_fields(req, param="fields"):
+    """``a,b.c,b.d`` -> {"a": None, "b": {"c": None, "d": None}}; None when absent.
+
+    A ``None`` leaf means "the whole value".
+    """
+    raw = req.args.get(param)
+    if not raw:
+        return None
+    tree = {}
+    for path in raw.split(","):
+        parts = [p for p in path.strip().split(".") if p]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break  # the whole value is already selected
+            node[part] = child
+            node = child
+        else:
+            node[parts[-1]] = None
+    return tree or None
+
+
+def project(data, fields):
+    """Trim ``data`` (dicts/lists of dicts) to the ``fields`` tree."""
+    if fields is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {k: project(data[k], sub) for k, sub in fields.items() if k in data}
+
@@ -0,0 +1,107 @@
+# server/snapshots.py
+"""Shared ingredient snapshots for meal items; external ones can be filled in
+the background."""
+import json
+
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from .etags import bump_plans
+from .extensions import db, jobs
+from .ingredients import canonical_snapshot, normalize_ingredients, recipe_lines, snapshot_hash
+from .models import IngredientSnapshot, MealItem, SnapshotIngredient
+
+
+def get_or_create_snapshot(raw_items):
+    """Return the shared snapshot for this ingredient list, creating it (and
+    its normalized rows) the first time the content is seen."""
+    items = canonical_snapshot(raw_items)
+    digest = snapshot_hash(items)
+    snapshot = IngredientSnapshot.query.filter_by(content_hash=digest).first()
+    if snapshot is not None:
+        return snapshot
+    try:
+        with db.session.begin_nested():
+            snapshot = IngredientSnapshot(
+                content_hash=digest,
+                ingredients=json.dumps(items),
+                rows=[SnapshotIngredient(**row) for row in normalize_ingredients(items)],
+            )
+            db.session.add(snapshot)
+    except IntegrityError:
+        # created concurrently by another request
+        snapshot = IngredientSnapshot.query.filter_by(content_hash=digest).one()
+    return snapshot
+
+
+def apply_snapshot(mi, ingredients):
+    """Point an external meal item at the shared snapshot of its ingredients."""
+    mi.snapshot = get_or_create_snapshot(ingredients)
+
+
+def apply_recipe(mi, recipe):
+    """Point a local-recipe meal item at the snapshot of the recipe's text."""
+    mi.snapshot = get_or_create_snapshot(recipe_lines(recipe.ingredients)) if recipe else None
+
+
+def _job_key(meal_item_id):
+    return ("snapshot", meal_item_id)
+
+
+def fill_snapshot(meal_item_id):
+    """Fetch recipe detail for a pending meal item and store its snapshot."""
+    from .recipe_cache import get_recipe_detail
+
+    mi = db.session.get(MealItem, meal_item_id)
+    if mi is None or mi.snapshot_status != "pending":
+        return
+    try:
+        detail = get_recipe_detail(mi.external_provider or "spoonacular", mi.external_id)
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("snapshot failed for meal_item %s", meal_item_id)
+        mi = db.session.get(MealItem, meal_item_id)
+        if mi is not None:
+            mi.snapshot_status = "failed"
+            bump_plans(mi.meal_plan_id)
+            db.session.commit()
+        return
+
+    apply_snapshot(mi, detail["ingredients"])
+    if not mi.external_title:
+        mi.external_title = detail["title"]
+    if not mi.external_image:
+        mi.external_image = detail.get("image")
+    mi.snapshot_status = "ready"
+    bump_plans(mi.meal_plan_id)
+    db.session.commit()
+
+
+def schedule_snapshot(meal_item_id):
+    app = current_app._get_current_object()
+    return jobs.submit(app, fill_snapshot, meal_item_id, key=_job_key(meal_item_id))
+
+
+def resume_snapshots(plan_id, pending_ids=(), failed_ids=()):
+    """Re-enqueue snapshot jobs that are no longer running: ``pending`` items
+    whose job was lost (a worker restart) and, when given, ``failed`` ones,
+    which go back to pending first. Jobs already queued in this process are
+    not duplicated (and fill_snapshot skips items that are no longer pending)."""
+    failed_ids = list(failed_ids)
+    if failed_ids:
+        db.session.execute(
+            update(MealItem)
+            .where(MealItem.id.in_(failed_ids), MealItem.snapshot_status == "failed")
+            .values(snapshot_status="pending"),
+            execution_options={"synchronize_session": False},
+        )
+        bump_plans(plan_id)
+        db.session.commit()
+    for meal_item_id in [*pending_ids, *failed_ids]:
+        schedule_snapshot(meal_item_id)
+
+
+def wait_for_snapshots(meal_item_ids, timeout):
+    """Wait (up to ``timeout`` seconds) for snapshot jobs running in this process."""
+    jobs.wait_for([_job_key(i) for i in meal_item_ids], timeout=timeout)
@@ -0,0 +1,74 @@
+# server/tests/conftest.py
+from contextlib import contextmanager
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from server.app import create_app
+from server.config import Config
+from server.extensions import db
+from server.models import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        # a file, not :memory:, so background job threads see the same data
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        JWT_SECRET_KEY = "test-secret-key-long-enough-for-hs256"
+        QUOTA_DAILY_POINTS = 0
+        QUOTA_STORE = str(tmp_path / "quota.sqlite3")
+        IMAGE_CACHE_DIR = str(tmp_path / "images")
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    user = User(email="cook@example.com", username="cook")
+    user.password_hash = "secret"
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth(user):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+@pytest.fixture
+def assert_max_queries(app):
+    """Guard a block against N+1 regressions:
+
+        with assert_max_queries(4):
+            client.get(f"/meal_plans/{plan_id}", headers=auth)
+    """
+    @contextmanager
+    def check(limit):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        if len(statements) > limit:
+            listing = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(statements))
+            raise AssertionError(f"expected at most {limit} queries, got {len(statements)}:\n{listing}")
+    return check
@@ -0,0 +1,70 @@
+# server/tests/test_cache.py
+import threading
+import time
+
+import pytest
+
+from server.cache import TTLCache
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(maxsize=8, ttl=60)
+    callers = 8
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return object()
+
+    results = [None] * callers
+
+    def worker(i):
+        results[i] = cache.get_or_load("k", loader)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(callers)]
+    threads[0].start()
+    assert started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    # let the followers reach the in-flight load before it finishes
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] < callers - 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert cache.stats()["misses"] == 1
+
+
+def test_failed_load_reaches_waiters_and_is_not_cached():
+    cache = TTLCache(maxsize=8, ttl=60)
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", boom)
+    assert cache.get_or_load("k", lambda: 42) == 42
+    assert cache.stats()["load_errors"] == 1
+
+
+def test_entries_expire_and_lru_evicts():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: None)   # touch a
+    cache.get_or_load("c", lambda: 3)      # evicts b
+
+    assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"   # evicts a
+    now[0] = 11
+    assert cache.get_or_load("c", lambda: "fresh") == "fresh"
+    stats = cache.stats()
+    assert stats["evictions"] == 2 and stats["expired"] == 1
@@ -0,0 +1,80 @@
+# server/tests/test_catalog_import.py
+import json
+import logging
+
+import pytest
+
+from server import catalog_import
+from server.models import ExternalRecipe
+
+GOOD = [
+    {"id": 1, "title": "Crème brûlée", "ingredients": [{"name": "cream", "quantity": "500 ml"}]},
+    {"id": 2, "title": "Pesto"},
+    {"id": 3, "title": "Soup", "ingredients": []},
+]
+BAD = '{"id": 9, "title": "Broken", "ingredients": [}'
+
+
+def run(app, path, *args):
+    return app.test_cli_runner().invoke(args=["import-catalog", str(path), *args])
+
+
+def titles():
+    return sorted(r.title for r in ExternalRecipe.query)
+
+
+def ndjson(tmp_path):
+    lines = [json.dumps(GOOD[0], ensure_ascii=False), BAD, json.dumps(GOOD[1]), json.dumps(GOOD[2])]
+    path = tmp_path / "dump.ndjson"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path, len((lines[0] + "\n").encode("utf-8"))
+
+
+def json_array(tmp_path):
+    head = "[\n  " + json.dumps(GOOD[0], ensure_ascii=False) + ",\n  "
+    body = head + BAD + ",\n  " + ",\n  ".join(json.dumps(r) for r in GOOD[1:]) + "\n]\n"
+    path = tmp_path / "dump.json"
+    path.write_text(body, encoding="utf-8")
+    return path, len(head.encode("utf-8"))
+
+
+@pytest.mark.parametrize("chunk", [1 << 20, 7])
+@pytest.mark.parametrize("make_dump", [ndjson, json_array])
+def test_malformed_records_are_skipped(monkeypatch, caplog, app, tmp_path, make_dump, chunk):
+    monkeypatch.setattr(catalog_import, "READ_CHUNK", chunk)  # 7: records straddle chunk boundaries
+    path, bad_offset = make_dump(tmp_path)
+
+    with caplog.at_level(logging.WARNING, logger="server.catalog_import"):
+        result = run(app, path, "--batch-size", "2")
+
+    assert result.exit_code == 0, result.output
+    assert "4 records, 3 imported, 1 skipped" in result.output
+    assert f"malformed record at byte {bad_offset}:" in caplog.text
+    assert titles() == ["Crème brûlée", "Pesto", "Soup"]
+
+
+def test_truncated_array_is_an_error(app, tmp_path):
+    path = tmp_path / "dump.json"
+    path.write_text('[{"id": 1, "title": "A"}, {"id": 2, "tit', encoding="utf-8")
+    result = run(app, path)
+    assert result.exit_code != 0
+    assert "unexpected end of JSON array" in result.output
+
+
+def test_last_record_wins_within_a_batch(app, tmp_path):
+    path = tmp_path / "dump.ndjson"
+    path.write_text('{"id": 1, "title": "First"}\n{"id": 1, "title": "Second"}\n', encoding="utf-8")
+    assert run(app, path).exit_code == 0
+    assert titles() == ["Second"]
+
+
+def test_unsupported_database_fails_before_reading(monkeypatch, app, tmp_path):
+    monkeypatch.setattr(catalog_import, "_dialect", lambda: "mysql")
+    path = tmp_path / "dump.ndjson"
+    path.write_text("not json at all\n", encoding="utf-8")
+
+    result = run(app, path)
+
+    assert result.exit_code == 1
+    assert "catalog import is not available on mysql" in result.output
+    assert not (tmp_path / "dump.ndjson.checkpoint").exists()
@@ -0,0 +1,84 @@
+# server/tests/test_events.py
+import json
+
+import pytest
+
+from server.events import LocalBroker, PostgresBroker
+
+
+@pytest.fixture
+def plan_id(client, auth):
+    return client.post("/meal_plans", json={"week_start": "2026-10-12"}, headers=auth).get_json()["id"]
+
+
+def read_event(chunks):
+    """Next non-comment frame of an SSE stream as (event, data)."""
+    for chunk in chunks:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith("event:"):
+            kind, data = chunk.strip().split("\n")
+            return kind[len("event: "):], json.loads(data[len("data: "):])
+    raise AssertionError("stream ended")
+
+
+def test_stream_receives_committed_writes(app, client, auth, plan_id):
+    app.config["SSE_HEARTBEAT_SECONDS"] = 0.05
+    resp = client.get(f"/meal_plans/{plan_id}/shopping/stream", headers=auth, buffered=False)
+    chunks = iter(resp.response)
+    try:
+        kind, data = read_event(chunks)
+        assert kind == "ready" and data["meal_plan_id"] == plan_id
+
+        created = client.post("/shopping_items", json={"meal_plan_id": plan_id, "name": "basil"}, headers=auth)
+        assert created.status_code == 201
+
+        kind, data = read_event(chunks)
+        assert kind == "created"
+        assert data["item"]["name"] == "basil" and data["meal_plan_id"] == plan_id
+    finally:
+        resp.close()
+
+
+def test_slow_subscriber_gets_one_resync():
+    broker = LocalBroker(queue_size=2)
+    with broker.subscribe("plan:1") as sub:
+        for i in range(5):
+            broker.publish("plan:1", {"type": "created", "n": i})
+        broker.publish("plan:2", {"type": "created"})
+
+        assert sub.get(timeout=0) == {"type": "resync"}
+        assert sub.get(timeout=0) is None
+
+
+class Stop(BaseException):
+    pass
+
+
+def test_postgres_listener_reconnects_and_resyncs(monkeypatch):
+    broker = PostgresBroker(engine=None)
+    broker.RETRY_DELAY = 0
+    monkeypatch.setattr("server.events.time.sleep", lambda s: None)
+    sub = LocalBroker.subscribe(broker, "plan:1")   # without starting the thread
+
+    attempts = []
+
+    def connect():
+        attempts.append(len(attempts))
+        if len(attempts) == 2:
+            raise OSError("database is restarting")
+        return type("Conn", (), {"close": lambda self: None})()
+
+    def drain(conn):
+        if len(attempts) == 1:
+            broker.deliver("plan:1", {"type": "created"})
+            raise OSError("server closed the connection unexpectedly")
+        raise Stop
+
+    broker._connect = connect
+    broker._drain = drain
+    with pytest.raises(Stop):
+        broker._listen()
+
+    assert len(attempts) == 3
+    assert sub.get(timeout=0) == {"type": "created"}
+    assert sub.get(timeout=0) == {"type": "resync"}
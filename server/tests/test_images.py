@@ -0,0 +1,175 @@
+# server/tests/test_images.py
+import io
+import os
+
+import pytest
+
+from server import images
+from server.images import ImageCache, ImageError
+
+HOST = "img.example.com"
+INDEX = len("0" * 64 + " image/png")  # bytes of one urls/ entry
+
+
+class Fetcher:
+    """Stub upstream: url -> (bytes, content type), counting calls."""
+
+    def __init__(self, bodies=None):
+        self.bodies = bodies or {}
+        self.calls = []
+
+    def __call__(self, url):
+        self.calls.append(url)
+        if url not in self.bodies:
+            raise ImageError("upstream 404 for image")
+        return self.bodies[url], "image/png"
+
+
+def png(width, height, color=(200, 30, 30)):
+    Image = pytest.importorskip("PIL.Image")
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(out, "PNG")
+    return out.getvalue()
+
+
+def url(name):
+    return f"https://{HOST}/{name}"
+
+
+@pytest.fixture
+def fetcher():
+    return Fetcher()
+
+
+@pytest.fixture
+def cache(tmp_path, fetcher):
+    return ImageCache(str(tmp_path), max_bytes=1 << 20, allowed_hosts=[HOST], fetcher=fetcher)
+
+
+def test_fetches_once_then_serves_from_disk(cache, fetcher):
+    fetcher.bodies[url("a.png")] = b"\x89PNG fake"
+
+    first = cache.get(url("a.png"))
+    second = cache.get(url("a.png"))
+
+    assert fetcher.calls == [url("a.png")]
+    assert first == second
+    assert first.content_type == "image/png"
+    with open(first.path, "rb") as f:
+        assert f.read() == b"\x89PNG fake"
+
+
+def test_same_bytes_are_stored_once(cache, fetcher):
+    fetcher.bodies[url("a.png")] = fetcher.bodies[url("copy.png")] = b"same"
+    assert cache.get(url("a.png")).path == cache.get(url("copy.png")).path
+    assert cache.stats()["bytes"] == len(b"same") + 2 * INDEX
+
+
+def test_a_new_cache_reuses_the_directory(tmp_path, cache, fetcher):
+    fetcher.bodies[url("a.png")] = b"bytes"
+    cache.get(url("a.png"))
+
+    again = ImageCache(str(tmp_path), allowed_hosts=[HOST], fetcher=fetcher)
+    again.get(url("a.png"))
+    assert len(fetcher.calls) == 1
+    assert again.stats()["bytes"] == len(b"bytes") + INDEX
+
+
+@pytest.mark.parametrize("bad", ["https://evil.example.com/a.png", "ftp://img.example.com/a.png", "", None])
+def test_only_allowed_hosts_are_fetched(cache, fetcher, bad):
+    with pytest.raises(ImageError) as err:
+        cache.get(bad)
+    assert err.value.status == 400
+    assert fetcher.calls == []
+
+
+def test_unknown_size_is_rejected(cache):
+    with pytest.raises(ImageError) as err:
+        cache.get(url("a.png"), "huge")
+    assert err.value.status == 400
+
+
+def test_fetch_errors_become_bad_gateway(cache, fetcher):
+    def broken(url):
+        raise OSError("connection reset")
+    cache.fetcher = broken
+    with pytest.raises(ImageError) as err:
+        cache.get(url("a.png"))
+    assert err.value.status == 502
+    assert "connection reset" in str(err.value)
+
+
+def test_thumbnails_fit_the_size(cache, fetcher):
+    Image = pytest.importorskip("PIL.Image")
+    fetcher.bodies[url("big.png")] = png(400, 200)
+
+    thumb = cache.get(url("big.png"), "grid")
+
+    assert thumb.etag.endswith("-grid")
+    with Image.open(thumb.path) as img:
+        assert img.width <= 64 and img.height <= 64
+    assert cache.get(url("big.png"), "grid").path == thumb.path
+    assert len(fetcher.calls) == 1
+
+
+def test_without_pillow_every_size_is_the_original(monkeypatch, cache, fetcher):
+    monkeypatch.setattr(images, "Image", None)
+    fetcher.bodies[url("a.png")] = b"original"
+    assert cache.get(url("a.png"), "list") == cache.get(url("a.png"))
+
+
+def test_evicts_least_recently_used_past_max_bytes(tmp_path, fetcher):
+    cache = ImageCache(str(tmp_path), max_bytes=1000, allowed_hosts=[HOST], fetcher=fetcher)
+    for name in ("old", "used", "new"):
+        fetcher.bodies[url(name)] = name.encode() * (300 // len(name))
+    old, used = cache.get(url("old")), cache.get(url("used"))
+    old_index = cache._index_path(url("old"))
+    os.utime(old_index, (0, 0))
+    os.utime(old.path, (1, 1))
+    os.utime(used.path, (2, 2))
+    cache.get(url("used"))  # a read makes it recent again
+
+    new = cache.get(url("new"))
+
+    assert not os.path.exists(old.path) and not os.path.exists(old_index)
+    assert os.path.exists(used.path) and os.path.exists(new.path)
+    assert cache.stats()["bytes"] <= 1000
+
+
+def test_query_string_variants_share_one_entry(tmp_path, cache, fetcher):
+    fetcher.bodies[url("a.png")] = b"bytes"
+
+    for suffix in ("", "?v=1", "?v=2#x", "?cache-bust=123"):
+        cache.get(f"https://IMG.example.com/a.png{suffix}")
+
+    assert fetcher.calls == [url("a.png")]
+    assert len(os.listdir(tmp_path / "urls")) == 1
+
+
+@pytest.mark.parametrize("content_type", ["image/svg+xml", "text/html", "image/pngé", ""])
+def test_only_raster_types_are_cached(tmp_path, cache, content_type):
+    cache.fetcher = lambda url: (b"<svg onload=alert(1)>", content_type)
+    with pytest.raises(ImageError) as err:
+        cache.get(url("a.svg"))
+    assert err.value.status == 502
+    assert not (tmp_path / "urls").exists()
+
+
+def test_proxy_sends_etag_and_honours_if_none_match(app, client):
+    fetcher = Fetcher({"https://img.spoonacular.com/r.png": b"\x89PNG body"})
+    app.extensions["image_cache"].fetcher = fetcher
+
+    resp = client.get("/images", query_string={"url": "https://img.spoonacular.com/r.png"})
+    assert resp.status_code == 200
+    assert resp.data == b"\x89PNG body"
+    assert "public" in resp.headers["Cache-Control"]
+
+    again = client.get("/images", query_string={"url": "https://img.spoonacular.com/r.png"},
+                       headers={"If-None-Match": resp.headers["ETag"]})
+    assert again.status_code == 304
+    assert len(fetcher.calls) == 1
+
+
+def test_proxy_rejects_other_hosts(client):
+    resp = client.get("/images", query_string={"url": "https://evil.example.com/x.png"})
+    assert resp.status_code == 400
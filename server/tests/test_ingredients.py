@@ -0,0 +1,60 @@
+# server/tests/test_ingredients.py
+from collections import namedtuple
+
+import pytest
+
+from server.ingredients import Quantity, parse_quantity, summarize_groups
+
+Group = namedtuple("Group", "name_key name family unit quantity total count first_id")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2 cups flour", Quantity(2.0, "cup", "volume")),
+    ("1/2 tsp salt", Quantity(0.5, "tsp", "volume")),
+    ("1 1/2 cups milk", Quantity(1.5, "cup", "volume")),
+    ("1½ cups milk", Quantity(1.5, "cup", "volume")),
+    ("¾ lb beef", Quantity(0.75, "lb", "mass")),
+    (".5 kg potatoes", Quantity(0.5, "kg", "mass")),
+    ("2-3 cloves garlic", Quantity(3.0, "clove", "count:clove")),
+    ("2 to 3 tbsp. oil", Quantity(3.0, "tbsp", "volume")),
+    ("1 T butter", Quantity(1.0, "tbsp", "volume")),
+    ("1 t butter", Quantity(1.0, "tsp", "volume")),
+    ("3 Cups water", Quantity(3.0, "cup", "volume")),
+    ("2 eggs", Quantity(2.0, None, "count")),
+    ("2 tbſp sugar", Quantity(2.0, None, "count")),   # only matches through case folding
+    ("1/0 cup", None),
+    ("a pinch of salt", None),
+    ("", None),
+])
+def test_parse_quantity(text, expected):
+    assert parse_quantity(text) == expected
+
+
+def g(name, quantity, family=None, unit=None, total=None, count=1, first_id=1):
+    return Group(name.lower(), name, family, unit, quantity, total, count, first_id)
+
+
+@pytest.mark.parametrize("groups, expected", [
+    # a single occurrence keeps its text verbatim
+    ([g("Flour", "2 cups", "volume", "cup", 473.176)], "2 cups"),
+    # same family, different units: summed, shown in the unit seen first
+    ([g("Milk", "1 cup", "volume", "cup", 236.588, first_id=1),
+      g("Milk", "8 tbsp", "volume", "tbsp", 118.294, first_id=2)], "1 1/2 cups"),
+    ([g("Beef", "1 lb", "mass", "lb", 453.592, first_id=2),
+      g("Beef", "8 oz", "mass", "oz", 226.796, first_id=1)], "24 oz"),
+    # two "1 1/2 tsp" rows, grouped in SQL: total is the sum of both
+    ([g("Sugar", "1 1/2 tsp", "volume", "tsp", 14.78676, count=2)], "3 tsp"),
+    # incompatible families are listed side by side
+    ([g("Butter", "2 tbsp", "volume", "tbsp", 29.5736, first_id=1),
+      g("Butter", "100 g", "mass", "g", 100.0, first_id=2)], "2 tbsp + 100 g"),
+    ([g("Garlic", "2 cloves", "count:clove", "clove", 2.0, first_id=1),
+      g("Garlic", "1 head", "count:head", "head", 1.0, first_id=2)], "2 cloves + 1 head"),
+    # unparsed text is kept once, after the parsed totals
+    ([g("Salt", "a pinch", count=2, first_id=2),
+      g("Salt", "1 tsp", "volume", "tsp", 4.92892, first_id=1)], "1 tsp + a pinch"),
+    # rows without a quantity don't count
+    ([g("Eggs", ""), g("Eggs", "", first_id=2)], ""),
+])
+def test_summarize_groups(groups, expected):
+    (entry,) = summarize_groups(groups).values()
+    assert entry == {"name": groups[0].name, "quantity": expected}
@@ -0,0 +1,43 @@
+# server/tests/test_meal_items_batch.py
+import pytest
+
+from server import recipe_cache
+
+
+@pytest.fixture
+def plan_id(client, auth):
+    return client.post("/meal_plans", json={"week_start": "2026-10-12"}, headers=auth).get_json()["id"]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    known = {}
+
+    def details(provider, external_ids):
+        return {eid: known[eid] for eid in external_ids if eid in known}
+    monkeypatch.setattr(recipe_cache, "get_recipe_details", details)
+    return known
+
+
+def post_batch(client, auth, plan_id, items):
+    return client.post("/meal_items/external/batch", json={"meal_plan_id": plan_id, "items": items}, headers=auth)
+
+
+def test_only_invalid_slots_is_a_client_error(client, auth, plan_id, upstream):
+    resp = post_batch(client, auth, plan_id, [{"day": "mon"}, {"meal_type": "dinner", "external_id": "1"}])
+    assert resp.status_code == 400
+    assert resp.get_json()["created"] == 0
+
+
+def test_upstream_failure_is_a_bad_gateway(client, auth, plan_id, upstream):
+    resp = post_batch(client, auth, plan_id, [{"day": "mon"}, {"day": "mon", "meal_type": "dinner", "external_id": "1"}])
+    assert resp.status_code == 502
+    assert [r["error"] for r in resp.get_json()["results"]] == [
+        "day, meal_type and external_id are required", "RECIPE_UPSTREAM_ERROR"]
+
+
+def test_partial_success_is_created(client, auth, plan_id, upstream):
+    upstream["1"] = {"title": "Soup", "image": None, "ingredients": [{"name": "leek", "quantity": "1 leek"}]}
+    resp = post_batch(client, auth, plan_id, [{"day": "mon"}, {"day": "mon", "meal_type": "dinner", "external_id": "1"}])
+    assert resp.status_code == 201
+    assert resp.get_json()["created"] == 1
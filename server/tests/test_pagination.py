@@ -0,0 +1,87 @@
+# server/tests/test_pagination.py
+import base64
+import json
+
+import pytest
+
+
+@pytest.fixture
+def recipes(client, auth):
+    return [
+        client.post("/recipes", json={"title": f"Recipe {i}", "ingredients": "", "steps": ""}, headers=auth).get_json()["id"]
+        for i in range(7)
+    ]
+
+
+@pytest.fixture
+def plans(client, auth):
+    # repeated weeks: the id breaks the tie in the (week_start, id) keyset
+    weeks = ["2026-10-05", "2026-10-12", "2026-10-12", "2026-10-19", "2026-10-12", "2026-09-28"]
+    return [client.post("/meal_plans", json={"week_start": w}, headers=auth).get_json()["id"] for w in weeks]
+
+
+def walk(client, auth, url):
+    """Follow ``next`` tokens from the first page; returns the pages' ids."""
+    pages, token = [], ""
+    while True:
+        resp = client.get(f"{url}&after={token}", headers=auth)
+        assert resp.status_code == 200
+        body = resp.get_json()
+        pages.append([item["id"] for item in body["items"]])
+        assert body["has_more"] == (body["next"] is not None)
+        if not body["has_more"]:
+            return pages
+        token = body["next"]
+
+
+def test_cursor_pages_cover_everything_once(client, auth, recipes):
+    pages = walk(client, auth, "/recipes?per_page=3")
+
+    assert [len(p) for p in pages] == [3, 3, 1]
+    flat = [i for p in pages for i in p]
+    assert flat == sorted(recipes, reverse=True)
+
+
+def test_cursor_pages_with_ties_on_the_leading_key(client, auth, plans):
+    pages = walk(client, auth, "/meal_plans?per_page=2")
+
+    flat = [i for p in pages for i in p]
+    assert len(flat) == len(set(flat)) == len(plans)
+    offset = client.get("/meal_plans?per_page=100", headers=auth).get_json()["items"]
+    assert flat == [p["id"] for p in offset]
+
+
+def test_next_token_round_trips(client, auth, recipes):
+    first = client.get("/recipes?per_page=2&after=", headers=auth).get_json()
+    again = client.get(f"/recipes?per_page=2&after={first['next']}", headers=auth).get_json()
+    repeat = client.get(f"/recipes?per_page=2&after={first['next']}", headers=auth).get_json()
+
+    assert again == repeat
+    assert not set(i["id"] for i in first["items"]) & set(i["id"] for i in again["items"])
+    assert again["items"][0]["id"] < first["items"][-1]["id"]
+
+
+def token(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("url, after", [
+    ("/recipes", "not a cursor!"),
+    ("/recipes", token(["abc"])),                  # id must be an int
+    ("/recipes", token([1, 2])),                   # wrong number of keys
+    ("/recipes", token({"id": 1})),
+    ("/meal_plans", token(["12/10/2026", 1])),     # not an ISO date
+    ("/shopping_items", "%00"),
+])
+def test_invalid_cursor_is_rejected(client, auth, recipes, url, after):
+    resp = client.get(f"{url}?after={after}", headers=auth)
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "invalid 'after' cursor"}
+    assert "ETag" not in resp.headers
+
+
+def test_pages_carry_an_etag(client, auth, recipes):
+    resp = client.get("/recipes?per_page=2&after=", headers=auth)
+    assert resp.status_code == 200 and resp.headers["ETag"]
+    again = client.get("/recipes?per_page=2&after=", headers={**auth, "If-None-Match": resp.headers["ETag"]})
+    assert again.status_code == 304
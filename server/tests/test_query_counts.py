@@ -0,0 +1,75 @@
+# server/tests/test_query_counts.py
+"""N+1 guards: these endpoints must cost the same number of queries for a
+3-item plan as for a full week."""
+import pytest
+
+from server import recipe_cache
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+MEALS = ["breakfast", "lunch", "dinner"]
+
+
+@pytest.fixture
+def fake_detail(monkeypatch):
+    def detail(provider, external_id):
+        return {
+            "title": f"External {external_id}",
+            "image": None,
+            "ingredients": [
+                {"name": "flour", "quantity": "1 cup flour"},
+                {"name": f"spice {external_id}", "quantity": "2 tsp spice"},
+            ],
+            "instructions": "",
+        }
+    monkeypatch.setattr(recipe_cache, "get_recipe_detail", detail)
+
+
+def make_plan(client, auth, n_items):
+    plan_id = client.post("/meal_plans", json={"week_start": "2026-10-12"}, headers=auth).get_json()["id"]
+    slots = [(day, meal) for day in DAYS for meal in MEALS][:n_items]
+    for n, (day, meal) in enumerate(slots):
+        if n % 2:
+            recipe = client.post(
+                "/recipes",
+                json={"title": f"Recipe {n}", "ingredients": f"{n + 1} cups rice\n2 eggs", "steps": "Cook."},
+                headers=auth,
+            ).get_json()
+            body = {"meal_plan_id": plan_id, "recipe_id": recipe["id"], "day": day, "meal_type": meal}
+            resp = client.post("/meal_items", json=body, headers=auth)
+        else:
+            body = {"meal_plan_id": plan_id, "external_id": str(600 + n), "day": day, "meal_type": meal, "async": False}
+            resp = client.post("/meal_items/external", json=body, headers=auth)
+        assert resp.status_code == 201
+    return plan_id
+
+
+@pytest.mark.parametrize("n_items", [3, 21])
+def test_get_meal_plan_query_count(client, auth, fake_detail, assert_max_queries, n_items):
+    plan_id = make_plan(client, auth, n_items)
+    client.post(f"/meal_plans/{plan_id}/generate_shopping", headers=auth)
+
+    # revision check, plan, items (+ recipes joined), shopping items
+    with assert_max_queries(4):
+        resp = client.get(f"/meal_plans/{plan_id}", headers=auth)
+    assert resp.status_code == 200
+    assert len(resp.get_json()["items"]) == n_items
+
+    with assert_max_queries(1):
+        resp = client.get(f"/meal_plans/{plan_id}", headers={**auth, "If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+
+
+@pytest.mark.parametrize("n_items", [3, 21])
+def test_generate_shopping_query_count(client, auth, fake_detail, assert_max_queries, n_items):
+    plan_id = make_plan(client, auth, n_items)
+
+    with assert_max_queries(7):
+        resp = client.post(f"/meal_plans/{plan_id}/generate_shopping", headers=auth)
+    assert resp.status_code == 200
+    names = {item["name"] for item in resp.get_json()}
+    assert "flour" in names
+
+    # unchanged plan: nothing to write
+    with assert_max_queries(5):
+        resp = client.post(f"/meal_plans/{plan_id}/generate_shopping", headers=auth)
+    assert resp.headers["X-Shopping-Changes"] == "inserted=0,updated=0,deleted=0"
@@ -0,0 +1,95 @@
+# server/tests/test_quota.py
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from server import recipes_api
+from server.quota import INTERACTIVE, PREFETCH, REFRESH, QuotaManager
+
+
+@pytest.fixture
+def make_quota(monkeypatch, tmp_path):
+    # init_app hooks the manager into the shared provider client
+    monkeypatch.setattr(recipes_api.client, "quota", None)
+
+    def make(**config):
+        app = Flask(__name__, instance_path=str(tmp_path))
+        app.config.update(QUOTA_STORE=str(tmp_path / "quota.sqlite3"), **config)
+        return QuotaManager(app)
+    return make
+
+
+def response(**headers):
+    return SimpleNamespace(headers={f"X-API-Quota-{k}": str(v) for k, v in headers.items()})
+
+
+def test_disabled_by_default(make_quota):
+    quota = make_quota()
+    assert not quota.enabled
+    assert recipes_api.client.quota is None
+
+
+def test_burst_defaults_to_a_quarter_of_the_day(make_quota):
+    quota = make_quota(QUOTA_DAILY_POINTS=400)
+    assert quota.enabled and quota.burst == 100
+    assert recipes_api.client.quota is quota
+
+
+def test_background_work_keeps_off_the_reserve(make_quota):
+    quota = make_quota(QUOTA_DAILY_POINTS=100, QUOTA_BURST=100)
+    assert quota.acquire(55, INTERACTIVE)
+
+    assert not quota.acquire(10, PREFETCH)      # would leave 35 < 40% reserved
+    assert quota.acquire(10, REFRESH)           # 35 left >= 20%
+    assert not quota.acquire(20, REFRESH)       # would leave 15 < 20%
+    assert quota.acquire(30, INTERACTIVE)       # interactive may spend it all
+    assert not quota.acquire(10, INTERACTIVE)
+
+    stats = quota.stats()
+    assert stats["spent"] == pytest.approx(95)
+    assert stats["denied"] == {INTERACTIVE: 1, REFRESH: 1, PREFETCH: 1}
+
+
+def test_burst_limits_spending_at_once(make_quota):
+    quota = make_quota(QUOTA_DAILY_POINTS=1000, QUOTA_BURST=10)
+    assert quota.acquire(8)
+    assert not quota.acquire(8)                 # the day has room, the bucket doesn't
+
+
+def test_settle_charges_the_actual_cost(make_quota):
+    quota = make_quota(QUOTA_DAILY_POINTS=100, QUOTA_BURST=100)
+    quota.acquire(1)
+    quota.settle(1, response(Request=4))
+    assert quota.stats()["spent"] == pytest.approx(4)
+
+    quota.settle(1, response())                 # no headers: nothing to correct
+    assert quota.stats()["spent"] == pytest.approx(4)
+
+
+def test_usage_is_restored_from_the_used_header(make_quota):
+    quota = make_quota(QUOTA_DAILY_POINTS=100, QUOTA_BURST=100)
+    quota.acquire(1)
+    quota.settle(1, response(Request=1, Used=90, Left=10))
+
+    # another worker on the host shares the stored state
+    other = make_quota(QUOTA_DAILY_POINTS=100, QUOTA_BURST=100)
+    stats = other.stats()
+    assert stats["spent"] == 90 and stats["upstream_used"] == 90 and stats["upstream_left"] == 10
+    assert not other.acquire(20)
+    assert other.acquire(10)
+
+
+def test_left_header_never_lowers_spending(make_quota):
+    quota = make_quota(QUOTA_DAILY_POINTS=100, QUOTA_BURST=100)
+    quota.acquire(30)
+    quota.settle(30, response(Left=95))
+    assert quota.stats()["spent"] == pytest.approx(30)
+    quota.settle(0, response(Left=20))
+    assert quota.stats()["spent"] == pytest.approx(80)
+
+
+def test_exhausted_stops_everything(make_quota):
+    quota = make_quota(QUOTA_DAILY_POINTS=100, QUOTA_BURST=100)
+    quota.exhausted()
+    assert not quota.acquire(1, INTERACTIVE)
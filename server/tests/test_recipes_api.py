@@ -0,0 +1,60 @@
+# server/tests/test_recipes_api.py
+import pytest
+import requests
+
+from server.recipes_api import CircuitBreaker, CircuitOpenError, ProviderClient, QuotaExceeded, UpstreamError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(**kwargs):
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10, clock=clock)
+    return ProviderClient(breaker=breaker, max_retries=0, sleep=lambda s: None, **kwargs), clock
+
+
+@pytest.mark.parametrize("exc", [requests.TooManyRedirects, requests.exceptions.InvalidURL,
+                                 requests.exceptions.ChunkedEncodingError])
+def test_any_request_error_settles_a_half_open_trial(exc):
+    client, clock = make_client()
+
+    def fail(*args, **kwargs):
+        raise exc("boom")
+    client.session.get = fail
+
+    with pytest.raises(UpstreamError):
+        client.get("/x")                     # opens the breaker
+    clock.now += 10                          # half-open: one trial allowed
+    with pytest.raises(UpstreamError) as err:
+        client.get("/x")
+    assert not isinstance(err.value, CircuitOpenError)
+    assert client.breaker.state == "open"    # the failed trial re-opened it...
+    clock.now += 10
+    assert client.breaker.allow()            # ...and a later trial is allowed again
+
+
+class NoQuota:
+    def acquire(self, cost):
+        return False
+
+
+def test_quota_denial_gives_back_the_half_open_trial():
+    client, clock = make_client()
+
+    def fail(*args, **kwargs):
+        raise requests.ConnectionError("down")
+    client.session.get = fail
+
+    with pytest.raises(UpstreamError):
+        client.get("/x")                     # opens the breaker
+    clock.now += 10
+    client.quota = NoQuota()
+    with pytest.raises(QuotaExceeded):
+        client.get("/x")                     # takes the trial, never calls upstream
+    assert client.breaker.allow()            # the trial is free again
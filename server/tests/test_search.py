@@ -0,0 +1,139 @@
+# server/tests/test_search.py
+import json
+import threading
+
+import pytest
+
+from server import recipes_api, search
+from server.extensions import db
+from server.models import ExternalRecipe
+from server.recipes_api import SearchHit
+
+
+@pytest.fixture
+def recipes(client, auth):
+    for title, ingredients in (("Tomato soup", "tomato\nonion"), ("Pancakes", "flour\nmilk"),
+                               ("Shakshuka", "eggs\ntomato")):
+        client.post("/recipes", json={"title": title, "ingredients": ingredients, "steps": ""}, headers=auth)
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "mysql"])
+def test_local_search(monkeypatch, client, auth, recipes, dialect):
+    if dialect != "sqlite":
+        monkeypatch.setattr(search, "_dialect", lambda: dialect)  # no FTS: LIKE fallback
+    resp = client.get("/recipes/local_search?q=Tomato", headers=auth)
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["total"] == 2
+    assert {r["title"] for r in body["items"]} == {"Tomato soup", "Shakshuka"}
+
+
+def test_like_fallback_needs_every_word(monkeypatch, client, auth, recipes):
+    monkeypatch.setattr(search, "_dialect", lambda: "mysql")
+    resp = client.get("/recipes/local_search?q=tomato+eggs", headers=auth)
+    assert [r["title"] for r in resp.get_json()["items"]] == ["Shakshuka"]
+
+
+def add_catalog(*recipes, first_id=1):
+    for external_id, (title, names) in enumerate(recipes, first_id):
+        ingredients = json.dumps([{"name": n, "quantity": f"1 {n}"} for n in names]) if names is not None else None
+        db.session.add(ExternalRecipe(provider="spoonacular", external_id=str(external_id), title=title,
+                                      ingredients=ingredients))
+    db.session.commit()
+
+
+def catalog_titles(q):
+    rows, total = search.search_catalog(q)
+    assert total == len(rows)
+    return sorted(r.title for r in rows)
+
+
+def test_catalog_indexes_ingredient_names_not_json_keys(app):
+    add_catalog(("Pesto", ["basil", "pine nuts"]), ("Toast", None))
+
+    assert catalog_titles("name") == []
+    assert catalog_titles("quantity") == []
+    assert catalog_titles("basil") == ["Pesto"]
+
+    pesto = ExternalRecipe.query.filter_by(title="Pesto").one()
+    pesto.ingredients = json.dumps([{"name": "parsley", "quantity": "1 bunch"}])
+    db.session.commit()
+    assert catalog_titles("basil") == []
+    assert catalog_titles("parsley") == ["Pesto"]
+
+    db.session.delete(pesto)
+    db.session.commit()
+    assert catalog_titles("parsley") == []
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    calls = []
+
+    def search_recipes(q, offset=0, number=10):
+        calls.append((offset, number))
+        hits = [SearchHit("spoonacular", str(100 + offset + i), f"Tomato dish {offset + i}", None) for i in range(number)]
+        return {"items": hits, "total": 40}
+    monkeypatch.setattr(recipes_api, "search_recipes", search_recipes)
+    return calls
+
+
+def unified(client, auth, page, **params):
+    query = {"q": "tomato", "per_page": 2, "page": page, **params}
+    resp = client.get("/recipes/unified_search", query_string=query, headers=auth)
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def test_unified_search_pages_through_the_catalog(client, auth, recipes, provider):
+    add_catalog(("Tomato soup", ["tomato"]), ("Tomato salad", ["tomato"]), ("Tomato tart", ["tomato"]),
+                ("Tomato pie", ["tomato"]), ("Tomato Soup", ["tomato"]))
+
+    pages = [unified(client, auth, page) for page in (1, 2, 3, 4)]
+
+    assert provider == []
+    assert {p["external_source"] for p in pages} == {"catalog"}
+    # 2 own recipes + 3 catalog entries; the two "tomato soup" entries duplicate an own recipe
+    assert {p["total"] for p in pages} == {5}
+    titles = [item["title"] for p in pages for item in p["items"]]
+    assert sorted(titles) == ["Shakshuka", "Tomato pie", "Tomato salad", "Tomato soup", "Tomato tart"]
+
+
+def test_unified_search_stays_on_the_chosen_source(client, auth, provider):
+    add_catalog(("Tomato soup", ["tomato"]))  # not enough for a page
+
+    first = unified(client, auth, 1)
+    assert first["external_source"] == "provider"
+
+    add_catalog(*[(f"Tomato dish {i}", ["tomato"]) for i in range(10)], first_id=10)  # the catalog catches up
+    second = unified(client, auth, 2, external_source=first["external_source"])
+
+    assert second["sources"]["provider"] == 2
+    assert provider == [(0, 2), (2, 2)]
+
+
+def test_unified_search_rejects_unknown_sources(client, auth):
+    resp = client.get("/recipes/unified_search?q=tomato&external_source=web", headers=auth)
+    assert resp.status_code == 400
+
+
+def test_chosen_provider_runs_alongside_the_catalog_query(monkeypatch, client, auth, provider):
+    started = threading.Event()
+    overlapped = []
+    search_catalog = search.search_catalog
+
+    def provider_call(q, offset=0, number=10):
+        started.set()
+        return {"items": [], "total": 0}
+
+    def catalog(*args, **kwargs):
+        overlapped.append(started.wait(2))   # the provider call is already on its way
+        return search_catalog(*args, **kwargs)
+
+    monkeypatch.setattr(recipes_api, "search_recipes", provider_call)
+    monkeypatch.setattr(search, "search_catalog", catalog)
+    body = unified(client, auth, 1, external_source="provider")
+
+    assert overlapped == [True]
+    assert body["external_source"] == "provider" and not body["partial"]
@@ -0,0 +1,15 @@
+# server/tests/test_serialization.py
+import pytest
+
+from server.serialization import _BytesJSONProvider
+
+
+def test_bytes_provider_requires_an_encoder(app):
+    with pytest.raises(TypeError):
+        _BytesJSONProvider(app)
+
+
+def test_fields_trims_the_plan(client, auth):
+    plan = client.post("/meal_plans", json={"week_start": "2026-10-12"}, headers=auth).get_json()
+    resp = client.get(f"/meal_plans/{plan['id']}?fields=id,user_id", headers=auth)
+    assert resp.get_json() == {"id": plan["id"], "user_id": plan["user_id"]}
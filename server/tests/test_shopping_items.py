@@ -0,0 +1,32 @@
+# server/tests/test_shopping_items.py
+import pytest
+
+
+@pytest.fixture
+def item(client, auth):
+    plan = client.post("/meal_plans", json={"week_start": "2026-10-12"}, headers=auth).get_json()
+    body = {"meal_plan_id": plan["id"], "name": "milk", "quantity": "1 l"}
+    return client.post("/shopping_items", json=body, headers=auth).get_json()
+
+
+@pytest.mark.parametrize("field", ["name", "quantity"])
+def test_bulk_update_rejects_overlong_text(client, auth, item, field):
+    changes = [{"id": item["id"], field: "x" * 256}, {"id": item["id"] + 1000, "checked": True}]
+    resp = client.patch("/shopping_items", json=changes, headers=auth)
+
+    assert resp.status_code == 200
+    first = resp.get_json()["results"][0]
+    assert first["ok"] is False
+    assert first["error"] == f"{field} must be at most 255 characters"
+    assert resp.get_json()["updated"] == 0
+
+
+@pytest.mark.parametrize("field", ["name", "quantity"])
+def test_single_update_rejects_overlong_text(client, auth, item, field):
+    resp = client.patch(f"/shopping_items/{item['id']}", json={field: "x" * 256}, headers=auth)
+    assert resp.status_code == 400
+
+
+def test_bulk_update_accepts_the_column_limit(client, auth, item):
+    resp = client.patch("/shopping_items", json=[{"id": item["id"], "name": "x" * 255}], headers=auth)
+    assert resp.get_json()["results"][0]["ok"] is True
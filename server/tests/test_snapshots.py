@@ -0,0 +1,90 @@
+# server/tests/test_snapshots.py
+import pytest
+
+from server import recipe_cache
+from server.extensions import db, jobs
+from server.models import MealItem
+from server.recipes_api import CircuitOpenError, QuotaExceeded, UpstreamError
+from server.snapshots import _job_key
+
+
+@pytest.fixture
+def plan_id(client, auth):
+    return client.post("/meal_plans", json={"week_start": "2026-10-12"}, headers=auth).get_json()["id"]
+
+
+@pytest.fixture
+def fake_detail(monkeypatch):
+    def detail(provider, external_id):
+        return {"title": f"R{external_id}", "image": None,
+                "ingredients": [{"name": "basil", "quantity": "1 bunch basil"}], "instructions": ""}
+    monkeypatch.setattr(recipe_cache, "get_recipe_detail", detail)
+
+
+def add_stuck_item(plan_id, status):
+    mi = MealItem(meal_plan_id=plan_id, day="mon", meal_type="dinner",
+                  external_provider="spoonacular", external_id="42", snapshot_status=status)
+    db.session.add(mi)
+    db.session.commit()
+    return mi.id
+
+
+@pytest.mark.parametrize("value", ["false", 1, "yes"])
+def test_async_flag_must_be_a_bool(client, auth, plan_id, value):
+    body = {"meal_plan_id": plan_id, "external_id": "42", "day": "mon", "meal_type": "dinner", "async": value}
+    resp = client.post("/meal_items/external", json=body, headers=auth)
+    assert resp.status_code == 400
+
+
+def test_resume_restarts_lost_and_failed_snapshots(app, client, auth, plan_id, fake_detail):
+    lost = add_stuck_item(plan_id, "pending")  # as if its worker died
+    failed = add_stuck_item(plan_id, "failed")
+
+    client.get(f"/meal_plans/{plan_id}", headers=auth)   # reads have no side effects
+    db.session.expire_all()
+    assert db.session.get(MealItem, lost).snapshot_status == "pending"
+
+    resp = client.post(f"/meal_plans/{plan_id}/snapshots/resume", headers=auth)
+    assert resp.get_json() == {"resumed": 2}
+    jobs.wait_for([_job_key(lost), _job_key(failed)], timeout=5)
+
+    db.session.expire_all()
+    assert db.session.get(MealItem, lost).snapshot_status == "ready"
+    assert db.session.get(MealItem, failed).snapshot_status == "ready"
+
+
+def test_generate_shopping_retries_failed_snapshots(client, auth, plan_id, fake_detail):
+    mid = add_stuck_item(plan_id, "failed")
+
+    resp = client.post(f"/meal_plans/{plan_id}/generate_shopping", headers=auth)
+
+    assert resp.status_code == 200
+    assert resp.headers["X-Pending-Snapshots"] == "0"
+    assert [item["name"] for item in resp.get_json()] == ["basil"]
+    db.session.expire_all()
+    assert db.session.get(MealItem, mid).snapshot_status == "ready"
+
+
+def test_external_id_is_required(client, auth, plan_id):
+    body = {"meal_plan_id": plan_id, "day": "mon", "meal_type": "dinner", "async": False}
+    resp = client.post("/meal_items/external", json=body, headers=auth)
+    assert resp.status_code == 400
+    assert MealItem.query.count() == 0
+
+
+@pytest.mark.parametrize("error, status, code", [
+    (QuotaExceeded("budget", status=429), 503, "RECIPE_QUOTA_EXHAUSTED"),
+    (CircuitOpenError("circuit open"), 502, "RECIPE_UPSTREAM_ERROR"),
+    (UpstreamError("Upstream 500", status=500), 502, "RECIPE_UPSTREAM_ERROR"),
+])
+def test_sync_add_reports_upstream_failures(monkeypatch, client, auth, plan_id, error, status, code):
+    def detail(provider, external_id):
+        raise error
+    monkeypatch.setattr(recipe_cache, "get_recipe_detail", detail)
+    body = {"meal_plan_id": plan_id, "external_id": "42", "day": "mon", "meal_type": "dinner", "async": False}
+
+    resp = client.post("/meal_items/external", json=body, headers=auth)
+
+    assert resp.status_code == status
+    assert resp.get_json()["error"] == code
+    assert MealItem.query.count() == 0